@@ -0,0 +1,155 @@
+import asyncio
+import bisect
+import itertools
+import re
+from collections import defaultdict
+from http import HTTPStatus
+from typing import NamedTuple
+
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.config import settings
+from core.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_SHED
+
+
+class RouteClass(NamedTuple):
+    """Группа роутов с общим лимитом. Освободившийся слот достается ожидающему запросу с меньшим priority"""
+
+    name: str
+    priority: int
+    concurrency: int
+    queue: int
+
+
+# Классы роутов по шаблонам пути, подходит первый. Пути вне /api не относятся ни к одному классу
+ROUTE_PATTERNS: list[tuple[re.Pattern, str]] = [
+    (re.compile(r"^/api/v1/films/export$"), "export"),
+    (re.compile(r"^/api/v1/(films|persons)/search/?$"), "search"),
+    # Карточки и жанры почти всегда отдаются из кэша или справочника в памяти
+    (re.compile(r"^/api/v1/(films|persons|genres)/[^/]+/$|^/api/v1/genres/?$"), "detail"),
+    (re.compile(r"^/api/"), "list"),
+]
+
+
+def classify(path: str) -> str | None:
+    """Класс роута по пути: detail, list, search, export или None для путей вне /api"""
+    return next((name for pattern, name in ROUTE_PATTERNS if pattern.match(path)), None)
+
+
+def route_classes() -> dict[str, RouteClass]:
+    config = settings.admission
+    return {
+        "detail": RouteClass("detail", 0, config.detail_concurrency, config.detail_queue),
+        "list": RouteClass("list", 1, config.list_concurrency, config.list_queue),
+        "search": RouteClass("search", 2, config.search_concurrency, config.search_queue),
+        "export": RouteClass("export", 3, config.export_concurrency, config.export_queue),
+    }
+
+
+class AdmissionController:
+    """Слоты обработки запросов воркера.
+
+    Запрос занимает слот, если не превышены общий лимит max_concurrency и лимит его класса.
+    Иначе он ждет в очереди класса не дольше queue_timeout, а при полной очереди сразу отклоняется.
+    """
+
+    def __init__(self, max_concurrency: int, queue_timeout: float) -> None:
+        self._max_concurrency = max_concurrency
+        self._queue_timeout = queue_timeout
+        self._total = 0
+        self._in_flight: dict[str, int] = defaultdict(int)
+        self._queued: dict[str, int] = defaultdict(int)
+        # Ожидающие запросы по возрастанию (priority, порядок прихода)
+        self._waiters: list[tuple[int, int, RouteClass, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    async def acquire(self, route_class: RouteClass) -> bool:
+        """Занять слот
+
+        Returns:
+            bool: слот занят, после обработки запроса его нужно вернуть release. False - запрос надо отклонить
+        """
+        if self._has_capacity(route_class):
+            self._admit(route_class)
+            return True
+        if self._queued[route_class.name] >= route_class.queue:
+            ADMISSION_SHED.labels(route_class.name, "queue_full").inc()
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (route_class.priority, next(self._sequence), route_class, future)
+        bisect.insort(self._waiters, waiter, key=lambda item: item[:2])
+        self._set_queued(route_class, 1)
+        try:
+            await asyncio.wait_for(future, self._queue_timeout)
+        except BaseException as exc:
+            if future.done() and not future.cancelled():
+                # Слот выдали одновременно с отменой ожидания
+                self.release(route_class)
+            else:
+                self._waiters.remove(waiter)
+                self._set_queued(route_class, -1)
+            if isinstance(exc, asyncio.TimeoutError):
+                ADMISSION_SHED.labels(route_class.name, "timeout").inc()
+                return False
+            raise
+        return True
+
+    def release(self, route_class: RouteClass) -> None:
+        self._total -= 1
+        self._in_flight[route_class.name] -= 1
+        ADMISSION_IN_FLIGHT.labels(route_class.name).dec()
+        self._wake()
+
+    def _has_capacity(self, route_class: RouteClass) -> bool:
+        return self._total < self._max_concurrency and self._in_flight[route_class.name] < route_class.concurrency
+
+    def _admit(self, route_class: RouteClass) -> None:
+        self._total += 1
+        self._in_flight[route_class.name] += 1
+        ADMISSION_IN_FLIGHT.labels(route_class.name).inc()
+
+    def _wake(self) -> None:
+        # Ожидающие без свободного слота своего класса пропускаются, чтобы не задерживать другие классы
+        for waiter in list(self._waiters):
+            if self._total >= self._max_concurrency:
+                return
+            _, _, route_class, future = waiter
+            if not self._has_capacity(route_class):
+                continue
+            self._waiters.remove(waiter)
+            self._set_queued(route_class, -1)
+            self._admit(route_class)
+            future.set_result(None)
+
+    def _set_queued(self, route_class: RouteClass, delta: int) -> None:
+        self._queued[route_class.name] += delta
+        ADMISSION_QUEUE_DEPTH.labels(route_class.name).inc(delta)
+
+
+class AdmissionMiddleware:
+    """Сброс нагрузки: запросы сверх лимитов сразу получают 503 с Retry-After, а не ждут до таймаута nginx"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.controller = AdmissionController(settings.admission.max_concurrency, settings.admission.queue_timeout)
+        self.routes = route_classes()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (route_class := self.routes.get(classify(scope["path"]))) is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.controller.acquire(route_class):
+            response = ORJSONResponse(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                content={"detail": "Service overloaded"},
+                headers={"Retry-After": str(settings.admission.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class)
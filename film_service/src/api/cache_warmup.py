@@ -0,0 +1,17 @@
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from services.cache_warmer import CacheWarmer, get_cache_warmer
+
+router = APIRouter()
+
+
+@router.post("/cache/warmup", include_in_schema=False)
+async def warmup(warmer: Optional[CacheWarmer] = Depends(get_cache_warmer)) -> dict:
+    """Прогреть кэш по запросу, например после сброса Redis. Роут вне /api, nginx его не проксирует.
+    Возвращает количество прогретых и неудавшихся ключей и длительность в секундах"""
+    if warmer is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Cache warmup is disabled")
+    return (await warmer.warm_now())._asdict()
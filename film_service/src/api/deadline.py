@@ -0,0 +1,44 @@
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from api.admission import classify
+from core import deadline
+from core.config import settings
+
+DEADLINE_HEADER = "X-Request-Timeout"
+
+
+def request_timeout(route_class: str, header: str | None) -> float:
+    """Бюджет запроса в секундах: из заголовка, но не больше значения класса роута. 0 - без ограничения"""
+    default = getattr(settings.deadline, f"{route_class}_timeout")
+    try:
+        requested = float(header) if header else 0
+    except ValueError:
+        requested = 0
+    if requested <= 0:
+        return default
+    return min(requested, default) if default else requested
+
+
+class DeadlineMiddleware:
+    """Бюджет времени запроса к API.
+
+    Бюджет задает вышестоящий сервис заголовком X-Request-Timeout (секунды) или берется из настроек класса роута.
+    Вызовы ES и Redis получают остаток бюджета как таймаут (см. core.deadline).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (route_class := classify(scope["path"])) is None:
+            await self.app(scope, receive, send)
+            return
+
+        timeout = request_timeout(route_class, Headers(scope=scope).get(DEADLINE_HEADER))
+        if not timeout:
+            await self.app(scope, receive, send)
+            return
+        partial = getattr(settings.deadline, f"{route_class}_partial")
+        with deadline.limit(timeout, partial=partial, reserve=settings.deadline.reserve):
+            await self.app(scope, receive, send)
@@ -0,0 +1,81 @@
+import hashlib
+from http import HTTPStatus
+
+from fastapi import Request, Response
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+from core.degradation import track_request
+
+STALE_HEADER = "X-Served-Stale"
+
+
+def make_etag(payload: bytes) -> str:
+    """Слабый ETag: совпадает у ответов с одинаковым содержимым, даже если они по-разному сериализованы"""
+    return f'W/"{hashlib.blake2b(payload, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Сравнение If-None-Match с ETag по правилам слабого сравнения (RFC 9110, 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+class Conditional:
+    """Условный GET для ответа роута.
+
+    ETag считается по готовому телу ответа, поэтому проверка If-None-Match не требует ни сборки моделей,
+    ни повторной сериализации: при совпадении роут возвращает пустой 304.
+    """
+
+    def __init__(self, request: Request, response: Response, max_age: int) -> None:
+        self._request = request
+        self._response = response
+        self._max_age = max_age
+
+    def not_modified(self, etag: str) -> Response | None:
+        """Проставить ETag и Cache-Control и вернуть 304, если у клиента актуальная версия
+
+        Args:
+            etag: ETag тела ответа
+
+        Returns:
+            Response | None: ответ 304 с заголовками ответа роута или None, если нужно отдать тело
+        """
+        self._response.headers["ETag"] = etag
+        self._response.headers["Cache-Control"] = f"{settings.http_cache.visibility}, max-age={self._max_age}"
+        if not etag_matches(self._request.headers.get("If-None-Match"), etag):
+            return None
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=dict(self._response.headers))
+
+
+class StaleResponseMiddleware:
+    """Пометка ответов, собранных из теневых копий кэша, пока ES недоступен.
+
+    Такой ответ получает заголовок X-Served-Stale, а Cache-Control: no-cache, чтобы клиент не хранил
+    устаревшие данные max-age секунд после восстановления ES.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stale = track_request()
+
+        async def send_marked(message: Message) -> None:
+            if message["type"] == "http.response.start" and stale[0]:
+                headers = MutableHeaders(scope=message)
+                headers[STALE_HEADER] = "1"
+                headers["Cache-Control"] = "no-cache"
+            await send(message)
+
+        await self.app(scope, receive, send_marked)
@@ -0,0 +1,106 @@
+from typing import Awaitable, Callable
+from urllib.parse import urlencode
+
+import orjson
+from fastapi import Depends, Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from api.http_cache import Conditional, make_etag
+from core.config import settings
+from core.degradation import served_stale
+from db.redis_repository import CachePolicy, RedisRepository, get_redis_repo
+from services.base_service import normalize_query
+
+
+class ResponseCache(Conditional):
+    """Кэш готовых тел ответа роута.
+
+    При попадании байты из Redis отдаются как есть: без сборки моделей, валидации по response_model
+    и повторной сериализации. ETag считается по этим же байтам, поэтому 304 тоже обходится без моделей.
+    Ключ тегируется сущностями ответа и удаляется вместе с их кэшем по событиям ETL.
+    Заголовки из headers, которые роут проставил в ответе, сохраняются вместе с телом.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        response: Response,
+        redis_repository: RedisRepository,
+        max_age: int,
+        policy: CachePolicy,
+        include: set[str] | None = None,
+        by_alias: bool = True,
+        headers: tuple[str, ...] = (),
+    ) -> None:
+        super().__init__(request, response, max_age)
+        self._redis_repo = redis_repository
+        self._policy = CachePolicy(soft_ttl=policy.soft_ttl, hard_ttl=policy.soft_ttl)
+        self._include = include
+        self._by_alias = by_alias
+        self._headers = headers
+        # Поисковый запрос нормализуется, как и в ключе сервиса: "  STAR " и "star" делят ответ
+        params = [
+            (name, normalize_query(value) if name == "query" else value)
+            for name, value in request.query_params.multi_items()
+        ]
+        query = urlencode(sorted(params))
+        self._key = f"response:{request.url.path}?{query}"
+
+    async def get(self) -> Response | None:
+        """Готовый ответ из кэша или None, если роут должен его построить"""
+        if not settings.http_cache.responses_enabled:
+            return None
+        if (data := await self._redis_repo.get_bytes(self._key)) is None:
+            return None
+        if self._headers:
+            # Тело ответа сериализует orjson, поэтому в нем нет перевода строки: первая строка - заголовки
+            headers, data = data.split(b"\n", 1)
+            self._response.headers.update(orjson.loads(headers))
+        return self._render(data)
+
+    async def set(self, content: BaseModel | list[BaseModel]) -> Response:
+        """Сериализовать content так же, как FastAPI по параметрам response_model роута, и сохранить
+
+        Args:
+            content: модели ответа
+
+        Returns:
+            Response: ответ с телом content или 304
+        """
+        data = orjson.dumps(jsonable_encoder(content, include=self._include, by_alias=self._by_alias))
+        # Ответ из теневых копий не кэшируется: иначе он отдавался бы и после восстановления ES
+        if settings.http_cache.responses_enabled and not served_stale():
+            rows = content if isinstance(content, list) else [content]
+            await self._redis_repo.load_bytes(self._key, self._with_headers(data), rows, self._policy)
+        return self._render(data)
+
+    def _with_headers(self, data: bytes) -> bytes:
+        if not self._headers:
+            return data
+        headers = {name: self._response.headers[name] for name in self._headers if name in self._response.headers}
+        return orjson.dumps(headers) + b"\n" + data
+
+    def _render(self, data: bytes) -> Response:
+        return self.not_modified(make_etag(data)) or Response(
+            content=data, media_type="application/json", headers=dict(self._response.headers)
+        )
+
+
+def response_cache(
+    max_age: int,
+    policy: CachePolicy,
+    include: set[str] | None = None,
+    by_alias: bool = True,
+    headers: tuple[str, ...] = (),
+) -> Callable[..., Awaitable[ResponseCache]]:
+    """Зависимость роута с кэшем ответа. include и by_alias должны совпадать с response_model_* роута"""
+
+    async def dependency(
+        request: Request,
+        response: Response,
+        redis_repository: RedisRepository = Depends(get_redis_repo),
+    ) -> ResponseCache:
+        return ResponseCache(request, response, redis_repository, max_age, policy, include, by_alias, headers)
+
+    return dependency
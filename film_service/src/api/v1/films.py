@@ -1,33 +1,115 @@
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, AsyncGenerator, AsyncIterator
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import JSONResponse
+import orjson
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from api.response_cache import ResponseCache, response_cache
+from core.config import settings
 from db.exceptions import MovieNotFoundException
 from models.controller_exceptions import MovieNotFound
-from models.models import LimitOffset, Movie, MovieInfo
+from models.models import (
+    NEXT_CURSOR_HEADER,
+    Cursor,
+    LimitOffset,
+    Movie,
+    MovieIds,
+    MovieInfo,
+    get_cursor,
+    get_movie_fields,
+)
+from services.base_service import MOVIE_CACHE, MOVIES_CACHE, SEARCH_CACHE
 from services.movie_service import MovieService, get_movie_service
 from services.auth_service import security_jwt
 
 router = APIRouter()
 
+FILMS_SORT = "imdb_rating"
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 
 @router.get(
     path="/search/",
-    response_model=list[Movie],
+    response_model=list[MovieInfo],
     response_model_by_alias=False,
     response_model_include={"uuid", "title", "imdb_rating"},
 )
 async def search(
     user: Annotated[dict, Depends(security_jwt)],
     limit_offset: Annotated[LimitOffset, Depends(LimitOffset)],
+    cache: Annotated[
+        ResponseCache,
+        Depends(
+            response_cache(
+                settings.http_cache.search_max_age,
+                SEARCH_CACHE,
+                include={"uuid", "title", "imdb_rating"},
+                by_alias=False,
+            )
+        ),
+    ],
     query: str = Query(min_length=1, description="Название фильма"),
     movie_service: MovieService = Depends(get_movie_service),
-) -> list[Movie]:
+) -> list[MovieInfo]:
     """Поиск фильмов по названию"""
-    return await movie_service.search_movies(query, limit_offset)
+    if cached := await cache.get():
+        return cached
+    return await cache.set(await movie_service.search_movies(query, limit_offset))
+
+
+@router.post(
+    path="/batch",
+    response_model=list[Movie],
+    response_model_by_alias=False,
+)
+async def films_batch(
+    user: Annotated[dict, Depends(security_jwt)],
+    movie_ids: MovieIds,
+    movie_service: MovieService = Depends(get_movie_service),
+) -> list[Movie]:
+    """Получить информацию о нескольких фильмах по UUID.
+
+    Фильмы возвращаются в порядке запроса, ненайденные пропускаются.
+    """
+    return await movie_service.get_movies_by_ids(movie_ids.ids)
+
+
+@router.get(
+    path="/export",
+    response_class=StreamingResponse,
+    responses={HTTPStatus.OK: {"content": {NDJSON_MEDIA_TYPE: {}}, "description": "Фильмы, по одному на строку"}},
+)
+async def films_export(
+    user: Annotated[dict, Depends(security_jwt)],
+    fields: Annotated[tuple[str, ...], Depends(get_movie_fields)],
+    genre_uuid: UUID | None = Query(default=None, alias="genre", description="Идентификатор жанра"),
+    movie_service: MovieService = Depends(get_movie_service),
+) -> StreamingResponse:
+    """Выгрузить весь каталог фильмов или фильмы жанра в формате NDJSON.
+
+    Фильмы идут в порядке id, поля как у списка фильмов, включая параметр fields.
+    Ответ передается по мере чтения индекса, поэтому начинается сразу при любом размере каталога.
+    """
+    batches = movie_service.export_movies(genre_uuid=genre_uuid, fields=fields)
+    # Первая пачка читается до ответа: если ES недоступен, клиент получит 503, а не пустую выгрузку
+    first = await anext(batches, None)
+    return StreamingResponse(ndjson(first, batches), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def ndjson(
+    first: list[MovieInfo] | None, batches: AsyncGenerator[list[MovieInfo], None]
+) -> AsyncIterator[bytes]:
+    """Строки NDJSON по пачке за раз. Выгрузка закрывается, даже если клиент отключился, не дочитав ее"""
+    try:
+        batch = first
+        while batch is not None:
+            yield b"".join(orjson.dumps(row.dict(by_alias=True)) + b"\n" for row in batch)
+            batch = await anext(batches, None)
+    finally:
+        await batches.aclose()
 
 
 @router.get(
@@ -39,14 +121,19 @@ async def search(
 async def film_details(
     user: Annotated[dict, Depends(security_jwt)],
     film_id: UUID,
+    cache: Annotated[
+        ResponseCache, Depends(response_cache(settings.http_cache.film_max_age, MOVIE_CACHE, by_alias=False))
+    ],
     movie_service: MovieService = Depends(get_movie_service),
 ) -> Movie:
     """Получить информацию о фильме по UUID."""
+    if cached := await cache.get():
+        return cached
     try:
         movie = await movie_service.get_movie_by_id(id_=film_id)
     except MovieNotFoundException as exc:
             return JSONResponse(status_code=HTTPStatus.NOT_FOUND, content={"detail": exc.detail})
-    return movie
+    return await cache.set(movie)
 
 
 @router.get(
@@ -56,16 +143,37 @@ async def film_details(
 )
 async def films(
     user: Annotated[dict, Depends(security_jwt)],
+    response: Response,
     limit_offset: Annotated[LimitOffset, Depends(LimitOffset)],
+    cursor: Annotated[Cursor | None, Depends(get_cursor(FILMS_SORT))],
+    fields: Annotated[tuple[str, ...], Depends(get_movie_fields)],
+    cache: Annotated[
+        ResponseCache,
+        Depends(response_cache(settings.http_cache.films_max_age, MOVIES_CACHE, headers=(NEXT_CURSOR_HEADER,))),
+    ],
     sort: str = Query(
-        default="imdb_rating",
+        default=FILMS_SORT,
         regex=r"[+-]?(imdb_rating|id)",
         description="Сортировка по рейтингу (-imdb_rating = desc)",
     ),
     genre_uuid: UUID | None = Query(default=None, alias="genre", description="Идентификатор жанра"),
     movie_service: MovieService = Depends(get_movie_service),
 ) -> list[MovieInfo]:
-    """Получить список популярных фильмов/фильмов в определенном жанре."""
+    """Получить список популярных фильмов/фильмов в определенном жанре.
+
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    Поля фильма, кроме uuid, title и imdb_rating, отдаются только по параметру fields.
+    Если включена предвыборка, следующая страница строится в кэше в фоне.
+    """
+    if cached := await cache.get():
+        return cached
     if genre_uuid is None:
-        return await movie_service.find_movies(sort=sort, limit_offset=limit_offset)
-    return await movie_service.find_movies_by_genre_uuid(genre_uuid=genre_uuid, sort=sort, limit_offset=limit_offset)
+        movies = await movie_service.find_movies(sort=sort, limit_offset=limit_offset, cursor=cursor, fields=fields)
+    else:
+        movies = await movie_service.find_movies_by_genre_uuid(
+            genre_uuid=genre_uuid, sort=sort, limit_offset=limit_offset, cursor=cursor, fields=fields
+        )
+    movie_service.prefetch_next_page(movies, sort, limit_offset, cursor=cursor, fields=fields, genre_uuid=genre_uuid)
+    if next_cursor := movie_service.next_cursor(movies, sort, limit_offset):
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor.encode()
+    return await cache.set(movies)
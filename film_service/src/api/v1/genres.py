@@ -5,9 +5,12 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, Query
 from fastapi.responses import JSONResponse
 
+from api.response_cache import ResponseCache, response_cache
+from core.config import settings
 from db.exceptions import GenreNotFoundException
 from models.controller_exceptions import GenreNotFound
 from models.models import Genre, LimitOffset
+from services.base_service import GENRE_CACHE
 from services.genre_service import GenreService, get_genre_service
 from services.auth_service import security_jwt
 
@@ -23,14 +26,19 @@ router = APIRouter()
 async def genre_details(
     user: Annotated[dict, Depends(security_jwt)],
     genre_id: UUID,
+    cache: Annotated[
+        ResponseCache, Depends(response_cache(settings.http_cache.genre_max_age, GENRE_CACHE, by_alias=False))
+    ],
     genre_service: GenreService = Depends(get_genre_service)
 ) -> Genre:
     """Получить информацию о жанре"""
+    if cached := await cache.get():
+        return cached
     try:
         genre = await genre_service.get_genre_by_id(id_=genre_id)
     except GenreNotFoundException as exc:
         return JSONResponse(status_code=HTTPStatus.NOT_FOUND, content={"detail": exc.detail})
-    return genre
+    return await cache.set(genre)
 
 
 @router.get(
@@ -42,6 +50,12 @@ async def genre_details(
 async def genres(
     user: Annotated[dict, Depends(security_jwt)],
     limit_offset: Annotated[LimitOffset, Depends(LimitOffset)],
+    cache: Annotated[
+        ResponseCache,
+        Depends(
+            response_cache(settings.http_cache.genre_max_age, GENRE_CACHE, include={"uuid", "name"}, by_alias=False)
+        ),
+    ],
     sort: str = Query(
         default="name",
         regex=r"[+-]?(name|id)",
@@ -49,4 +63,7 @@ async def genres(
     genre_service: GenreService = Depends(get_genre_service),
 ) -> list[Genre]:
     """Получить списко всех жанров"""
-    return await genre_service.find_genres(sort=sort, limit_offset=limit_offset)
+    if cached := await cache.get():
+        return cached
+    genres = await genre_service.find_genres(sort=sort, limit_offset=limit_offset)
+    return await cache.set(genres)
@@ -2,17 +2,22 @@ from http import HTTPStatus
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from fastapi.responses import JSONResponse
 
+from api.response_cache import ResponseCache, response_cache
+from core.config import settings
 from db.exceptions import PersonNotFoundException
 from models.controller_exceptions import PersonNotFound
-from models.models import LimitOffset, MovieInfo, Person, PersonInfo
+from models.models import NEXT_CURSOR_HEADER, Cursor, LimitOffset, MovieInfo, Person, PersonInfo, get_cursor
+from services.base_service import PERSON_CACHE
 from services.person_service import PersonService, get_person_service
 from services.auth_service import security_jwt
 
 router = APIRouter()
 
+PERSONS_SORT = "id"
+
 
 @router.get(path="/search/")
 async def search(
@@ -34,14 +39,19 @@ async def search(
 async def person_details(
     user: Annotated[dict, Depends(security_jwt)],
     person_id: UUID,
+    cache: Annotated[
+        ResponseCache, Depends(response_cache(settings.http_cache.person_max_age, PERSON_CACHE, by_alias=False))
+    ],
     person_service: PersonService = Depends(get_person_service)
 ) -> PersonInfo:
     """Получить персону по идентификатору"""
+    if cached := await cache.get():
+        return cached
     try:
         person = await person_service.get_person_by_id(id_=person_id)
     except PersonNotFoundException as exc:
         return JSONResponse(status_code=HTTPStatus.NOT_FOUND, content={"detail": exc.detail})
-    return person
+    return await cache.set(person)
 
 
 @router.get(
@@ -66,12 +76,17 @@ async def films(
 )
 async def persons(
     user: Annotated[dict, Depends(security_jwt)],
+    response: Response,
     limit_offset: Annotated[LimitOffset, Depends(LimitOffset)],
+    cursor: Annotated[Cursor | None, Depends(get_cursor(PERSONS_SORT))],
     sort: str = Query(
-        default="id",
+        default=PERSONS_SORT,
         regex=r"[+-]?(id)",
     ),
     person_service: PersonService = Depends(get_person_service),
 ) -> list[Person]:
-    """Получить список всех персон"""
-    return await person_service.find_persons(sort=sort, limit_offset=limit_offset)
+    """Получить список всех персон. Курсор следующей страницы возвращается в заголовке X-Next-Cursor"""
+    persons = await person_service.find_persons(sort=sort, limit_offset=limit_offset, cursor=cursor)
+    if next_cursor := person_service.next_cursor(persons, sort, limit_offset):
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor.encode()
+    return persons
@@ -0,0 +1,33 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+
+from api.response_cache import ResponseCache, response_cache
+from core.config import settings
+from models.models import Suggestions
+from services.base_service import SUGGEST_CACHE
+from services.suggest_service import SuggestService, get_suggest_service
+from services.auth_service import security_jwt
+
+router = APIRouter()
+
+
+@router.get(
+    path="",
+    response_model=Suggestions,
+    response_model_by_alias=False,
+)
+async def suggest(
+    user: Annotated[dict, Depends(security_jwt)],
+    cache: Annotated[
+        ResponseCache, Depends(response_cache(settings.http_cache.suggest_max_age, SUGGEST_CACHE, by_alias=False))
+    ],
+    query: str = Query(min_length=1, max_length=100, description="Начало названия фильма или имени персоны"),
+    size: int = Query(default=5, gt=0, le=20, description="Количество подсказок каждого вида"),
+    suggest_service: SuggestService = Depends(get_suggest_service),
+) -> Suggestions:
+    """Подсказки при наборе: фильмы и персоны, в названии или имени которых есть слова с введенными префиксами"""
+    if cached := await cache.get():
+        return cached
+    suggestions = await suggest_service.suggest(query, size)
+    return await cache.set(suggestions)
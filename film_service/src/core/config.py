@@ -7,11 +7,151 @@ class RedisConfig(BaseSettings):
     host: str = Field(env="REDIS_HOST", default="0.0.0.0")
     port: int = Field(env="REDIS_PORT", default=6379)
     cache_expire: int | float = Field(env="CACHE_EXPIRE", default=300)
+    lock_enabled: bool = Field(env="CACHE_LOCK_ENABLED", default=False)
+    lock_timeout: float = Field(env="CACHE_LOCK_TIMEOUT", default=10)
+    lock_blocking_timeout: float = Field(env="CACHE_LOCK_BLOCKING_TIMEOUT", default=5)
+
+
+class CacheConfig(BaseSettings):
+    """TTL кэша по методам сервисов.
+
+    После soft_ttl значение отдается как устаревшее и обновляется в фоне, после hard_ttl удаляется из Redis.
+    """
+
+    movie_soft_ttl: int | float = Field(env="CACHE_MOVIE_SOFT_TTL", default=60)
+    movie_hard_ttl: int | float = Field(env="CACHE_MOVIE_HARD_TTL", default=300)
+    movies_soft_ttl: int | float = Field(env="CACHE_MOVIES_SOFT_TTL", default=300)
+    movies_hard_ttl: int | float = Field(env="CACHE_MOVIES_HARD_TTL", default=1800)
+    search_soft_ttl: int | float = Field(env="CACHE_SEARCH_SOFT_TTL", default=60)
+    search_hard_ttl: int | float = Field(env="CACHE_SEARCH_HARD_TTL", default=300)
+    genre_soft_ttl: int | float = Field(env="CACHE_GENRE_SOFT_TTL", default=600)
+    genre_hard_ttl: int | float = Field(env="CACHE_GENRE_HARD_TTL", default=3600)
+    person_soft_ttl: int | float = Field(env="CACHE_PERSON_SOFT_TTL", default=120)
+    person_hard_ttl: int | float = Field(env="CACHE_PERSON_HARD_TTL", default=600)
+    # Жанры читаются из справочника в памяти воркера, а genre_*_ttl действуют, пока он не загружен
+    genre_catalog_enabled: bool = Field(env="CACHE_GENRE_CATALOG_ENABLED", default=True)
+    genre_catalog_refresh: int | float = Field(env="CACHE_GENRE_CATALOG_REFRESH", default=300)
+    suggest_soft_ttl: int | float = Field(env="CACHE_SUGGEST_SOFT_TTL", default=60)
+    suggest_hard_ttl: int | float = Field(env="CACHE_SUGGEST_HARD_TTL", default=300)
+
+    local_enabled: bool = Field(env="CACHE_LOCAL_ENABLED", default=True)
+    local_ttl: int | float = Field(env="CACHE_LOCAL_TTL", default=5)
+    local_max_entries: int = Field(env="CACHE_LOCAL_MAX_ENTRIES", default=1024)
+    local_max_bytes: int = Field(env="CACHE_LOCAL_MAX_BYTES", default=16 * 1024 * 1024)
+    invalidation_channel: str = Field(env="CACHE_INVALIDATION_CHANNEL", default="cache:invalidate")
+
+    # Теневая копия записи живет дольше hard_ttl и отдается, только пока ES недоступен. 0 - копии не хранятся
+    shadow_ttl: int = Field(env="CACHE_SHADOW_TTL", default=86400)
+    # Промах поиска записи по идентификатору помнится negative_ttl секунд, если ETL не загрузит запись раньше.
+    # 0 - промахи не кэшируются
+    negative_ttl: int = Field(env="CACHE_NEGATIVE_TTL", default=30)
+
+    codec: str = Field(env="CACHE_CODEC", default="v1")
+    compress_threshold: int = Field(env="CACHE_COMPRESS_THRESHOLD", default=4096)
+
+    # Ключи тегов должны жить не меньше самого долгого hard_ttl
+    tags_enabled: bool = Field(env="CACHE_TAGS_ENABLED", default=True)
+    tag_ttl: int = Field(env="CACHE_TAG_TTL", default=7200)
+    events_stream: str = Field(env="CACHE_EVENTS_STREAM", default="etl:changes")
+    events_group: str = Field(env="CACHE_EVENTS_GROUP", default="film_service")
+
+    # Предвыборка следующей страницы списка фильмов в фоне: не больше prefetch_concurrency построений сразу
+    # и prefetch_max_pending заданий в работе и в очереди, остальные отбрасываются
+    prefetch_enabled: bool = Field(env="CACHE_PREFETCH_ENABLED", default=False)
+    prefetch_concurrency: int = Field(env="CACHE_PREFETCH_CONCURRENCY", default=2)
+    prefetch_max_pending: int = Field(env="CACHE_PREFETCH_MAX_PENDING", default=32)
+
+
+class WarmupConfig(BaseSettings):
+    """Прогрев кэша самыми частыми запросами при старте и после событий ETL"""
+
+    enabled: bool = Field(env="WARMUP_ENABLED", default=True)
+    movie_sorts: list[str] = Field(env="WARMUP_MOVIE_SORTS", default=["-imdb_rating", "imdb_rating"])
+    movie_pages: int = Field(env="WARMUP_MOVIE_PAGES", default=3)
+    genre_movie_pages: int = Field(env="WARMUP_GENRE_MOVIE_PAGES", default=1)
+    genre_sort: str = Field(env="WARMUP_GENRE_SORT", default="name")
+    page_size: int = Field(env="WARMUP_PAGE_SIZE", default=50)
+    concurrency: int = Field(env="WARMUP_CONCURRENCY", default=4)
+    # Пауза после события ETL, чтобы прогреть кэш один раз после серии загрузок
+    debounce: float = Field(env="WARMUP_DEBOUNCE", default=5)
+
+
+class HttpCacheConfig(BaseSettings):
+    """Cache-Control ответов по роутам, max-age в секундах.
+
+    Ответы отдаются только авторизованным пользователям, поэтому по умолчанию private:
+    кэшировать их может клиент, а nginx только проксирует условные запросы.
+    """
+
+    visibility: str = Field(env="HTTP_CACHE_VISIBILITY", default="private")
+    film_max_age: int = Field(env="HTTP_CACHE_FILM_MAX_AGE", default=60)
+    films_max_age: int = Field(env="HTTP_CACHE_FILMS_MAX_AGE", default=30)
+    search_max_age: int = Field(env="HTTP_CACHE_SEARCH_MAX_AGE", default=30)
+    genre_max_age: int = Field(env="HTTP_CACHE_GENRE_MAX_AGE", default=300)
+    person_max_age: int = Field(env="HTTP_CACHE_PERSON_MAX_AGE", default=60)
+    suggest_max_age: int = Field(env="HTTP_CACHE_SUGGEST_MAX_AGE", default=60)
+    # Готовые тела ответов в Redis живут soft_ttl метода сервиса
+    responses_enabled: bool = Field(env="HTTP_CACHE_RESPONSES_ENABLED", default=True)
+
+
+class AdmissionConfig(BaseSettings):
+    """Лимиты одновременных запросов воркера.
+
+    Роуты делятся на классы: карточки (detail), списки (list), поиск (search) и выгрузка (export).
+    У класса свой лимит и очередь, а свободный слот достается классу в этом порядке.
+    Запрос, который не дождался слота за queue_timeout секунд или не поместился в очередь, получает 503.
+    """
+
+    enabled: bool = Field(env="ADMISSION_ENABLED", default=True)
+    max_concurrency: int = Field(env="ADMISSION_MAX_CONCURRENCY", default=256)
+    queue_timeout: float = Field(env="ADMISSION_QUEUE_TIMEOUT", default=1)
+    retry_after: int = Field(env="ADMISSION_RETRY_AFTER", default=1)
+    detail_concurrency: int = Field(env="ADMISSION_DETAIL_CONCURRENCY", default=256)
+    detail_queue: int = Field(env="ADMISSION_DETAIL_QUEUE", default=512)
+    list_concurrency: int = Field(env="ADMISSION_LIST_CONCURRENCY", default=128)
+    list_queue: int = Field(env="ADMISSION_LIST_QUEUE", default=256)
+    search_concurrency: int = Field(env="ADMISSION_SEARCH_CONCURRENCY", default=32)
+    search_queue: int = Field(env="ADMISSION_SEARCH_QUEUE", default=32)
+    export_concurrency: int = Field(env="ADMISSION_EXPORT_CONCURRENCY", default=2)
+    export_queue: int = Field(env="ADMISSION_EXPORT_QUEUE", default=0)
+
+
+class DeadlineConfig(BaseSettings):
+    """Бюджет времени запроса по классам роутов (см. AdmissionConfig), в секундах. 0 - без ограничения.
+
+    Клиент может сократить бюджет заголовком X-Request-Timeout, но не увеличить.
+    Вызовы ES и Redis ждут не дольше остатка бюджета. Когда он исчерпан, роут класса с partial отдает
+    теневые копии кэша, как при недоступном ES, а без partial или без копий отвечает 504.
+    """
+
+    enabled: bool = Field(env="DEADLINE_ENABLED", default=True)
+    detail_timeout: float = Field(env="DEADLINE_DETAIL_TIMEOUT", default=3)
+    list_timeout: float = Field(env="DEADLINE_LIST_TIMEOUT", default=5)
+    search_timeout: float = Field(env="DEADLINE_SEARCH_TIMEOUT", default=5)
+    export_timeout: float = Field(env="DEADLINE_EXPORT_TIMEOUT", default=0)
+    detail_partial: bool = Field(env="DEADLINE_DETAIL_PARTIAL", default=True)
+    list_partial: bool = Field(env="DEADLINE_LIST_PARTIAL", default=True)
+    search_partial: bool = Field(env="DEADLINE_SEARCH_PARTIAL", default=False)
+    export_partial: bool = Field(env="DEADLINE_EXPORT_PARTIAL", default=False)
+    # Часть бюджета на чтение теневых копий после ожидания ES
+    reserve: float = Field(env="DEADLINE_RESERVE", default=0.1)
 
 
 class ElasticConfig(BaseSettings):
     host: str = Field(env="ELASTIC_HOST", default="0.0.0.0")
     port: int = Field(env="ELASTIC_PORT", default=9200)
+    msearch_enabled: bool = Field(env="ELASTIC_MSEARCH_ENABLED", default=False)
+    msearch_window: float = Field(env="ELASTIC_MSEARCH_WINDOW", default=0.002)
+    msearch_max_batch: int = Field(env="ELASTIC_MSEARCH_MAX_BATCH", default=50)
+    # Время на один вызов ES. После breaker_failure_threshold сбоев подряд ES не вызывается
+    # breaker_recovery_timeout секунд, а сервисы отдают теневые копии кэша
+    timeout: float = Field(env="ELASTIC_TIMEOUT", default=2)
+    breaker_enabled: bool = Field(env="ELASTIC_BREAKER_ENABLED", default=True)
+    breaker_failure_threshold: int = Field(env="ELASTIC_BREAKER_FAILURE_THRESHOLD", default=5)
+    breaker_recovery_timeout: float = Field(env="ELASTIC_BREAKER_RECOVERY_TIMEOUT", default=10)
+    # Выгрузка каталога: фильмов в одном запросе к ES и время жизни point in time между запросами
+    export_batch_size: int = Field(env="ELASTIC_EXPORT_BATCH_SIZE", default=1000)
+    export_keep_alive: str = Field(env="ELASTIC_EXPORT_KEEP_ALIVE", default="1m")
 
     @property
     def url(self) -> str:
@@ -26,6 +166,11 @@ class BaseConfig(BaseSettings):
 
     host_auth: str = Field(env="AUTH_HOST", default="0.0.0.0")
     port_auth: int = Field(env="AUTH_PORT", default=8080)
+    auth_timeout: float = Field(env="AUTH_TIMEOUT", default=5)
+    auth_pool_size: int = Field(env="AUTH_POOL_SIZE", default=100)
+    auth_cache_max_ttl: int | float = Field(env="AUTH_CACHE_MAX_TTL", default=60)
+    auth_cache_max_entries: int = Field(env="AUTH_CACHE_MAX_ENTRIES", default=10000)
+    auth_cache_max_bytes: int = Field(env="AUTH_CACHE_MAX_BYTES", default=16 * 1024 * 1024)
 
     jwt_secret_key: str = Field(env="SECRET", default="secret")
     jwt_algorithm: str = Field(env="ALGORITHM", default="secret")
@@ -33,7 +178,16 @@ class BaseConfig(BaseSettings):
     sentry_dsn: str = Field(env="SENTRY_DSN", default="https://e24a3aedb026bfac6a3aa05ca67e919a@o4506173799727104.ingest.sentry.io/4506173902618624")
 
     redis: RedisConfig = RedisConfig()
+    cache: CacheConfig = CacheConfig()
     elastic: ElasticConfig = ElasticConfig()
+    warmup: WarmupConfig = WarmupConfig()
+    http_cache: HttpCacheConfig = HttpCacheConfig()
+    admission: AdmissionConfig = AdmissionConfig()
+    deadline: DeadlineConfig = DeadlineConfig()
+
+    @property
+    def url_auth_me(self) -> str:
+        return f"http://{self.host_auth}:{self.port_auth}/api/v1/auth/me/"
 
 
 settings: BaseConfig = BaseConfig()
@@ -0,0 +1,73 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Iterator, NamedTuple, TypeVar
+
+from db.exceptions import DeadlineExceededException
+
+T = TypeVar("T")
+
+
+class Deadline(NamedTuple):
+    # Момент по time.monotonic, к которому запрос должен получить ответ
+    expires_at: float
+    # При исчерпании бюджета роут отдает теневые копии кэша, а не ошибку
+    partial: bool
+    # Часть бюджета, которую ожидание ES оставляет на чтение теневых копий из Redis
+    reserve: float
+
+
+_deadline: ContextVar[Deadline | None] = ContextVar("deadline", default=None)
+
+
+@contextmanager
+def limit(timeout: float, partial: bool = False, reserve: float = 0) -> Iterator[None]:
+    """Ограничить вызовы хранилищ внутри блока бюджетом timeout секунд"""
+    token = _deadline.set(Deadline(time.monotonic() + timeout, partial, reserve if partial else 0))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def clear() -> None:
+    """Снять ограничение в текущем контексте: для работы, общей для нескольких запросов"""
+    _deadline.set(None)
+
+
+def remaining(reserve: bool = False) -> float | None:
+    """Остаток бюджета в секундах или None, если запрос не ограничен
+
+    Args:
+        reserve: не считать запас на чтение теневых копий
+    """
+    if (deadline := _deadline.get()) is None:
+        return None
+    return deadline.expires_at - time.monotonic() - (deadline.reserve if reserve else 0)
+
+
+def allows_partial() -> bool:
+    deadline = _deadline.get()
+    return deadline is None or deadline.partial
+
+
+async def bounded(awaitable: Awaitable[T], reserve: bool = False) -> T:
+    """Дождаться awaitable не дольше остатка бюджета. По истечении бюджета ожидание отменяется
+
+    Raises:
+        DeadlineExceededException: бюджет исчерпан до или во время ожидания
+    """
+    if (budget := remaining(reserve)) is None:
+        return await awaitable
+    if budget <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceededException("Request deadline exceeded")
+    try:
+        return await asyncio.wait_for(awaitable, budget)
+    except asyncio.TimeoutError as exc:
+        # Таймаут самого вызова, а не бюджета, остается как есть
+        if remaining(reserve) > 0:
+            raise
+        raise DeadlineExceededException("Request deadline exceeded") from exc
@@ -0,0 +1,22 @@
+from contextvars import ContextVar
+
+# Ответ запроса собран из теневых копий кэша. Флаг хранится в списке, чтобы отметка, сделанная в копии контекста
+# (задаче или потоке), была видна в middleware
+_served_stale: ContextVar[list[bool] | None] = ContextVar("served_stale", default=None)
+
+
+def track_request() -> list[bool]:
+    """Начать отслеживать запрос. Первый элемент списка станет True, если запрос получит устаревшие данные"""
+    flag = [False]
+    _served_stale.set(flag)
+    return flag
+
+
+def mark_served_stale() -> None:
+    if (flag := _served_stale.get()) is not None:
+        flag[0] = True
+
+
+def served_stale() -> bool:
+    flag = _served_stale.get()
+    return flag is not None and flag[0]
@@ -0,0 +1,74 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# Миллисекунды и единицы миллисекунд: ответы из кэша и ES укладываются в нижние корзины
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "film_service_http_request_duration_seconds",
+    "Время обработки запроса по шаблону пути роута",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "film_service_http_requests_in_progress",
+    "Запросы, которые обрабатываются сейчас",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+CACHE_REQUESTS = Counter(
+    "film_service_cache_requests_total",
+    "Чтения кэша по семействам ключей. result: local, hit, stale, miss, shadow, negative",
+    ["family", "result"],
+)
+ES_REQUEST_SECONDS = Histogram(
+    "film_service_es_request_duration_seconds",
+    "Время метода репозитория ES на стороне сервиса",
+    ["index", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+ES_TOOK_SECONDS = Histogram(
+    "film_service_es_took_seconds",
+    "Время выполнения поиска в ES по полю took ответа",
+    ["index", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+CIRCUIT_STATE = Gauge(
+    "film_service_circuit_state",
+    "Состояние предохранителя: 0 - замкнут, 1 - пробный запрос, 2 - разомкнут",
+    ["name"],
+    multiprocess_mode="max",
+)
+CIRCUIT_TRANSITIONS = Counter(
+    "film_service_circuit_transitions_total",
+    "Переходы предохранителя в состояние state",
+    ["name", "state"],
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "film_service_admission_in_flight",
+    "Запросы, занявшие слот, по классам роутов",
+    ["route_class"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "film_service_admission_queue_depth",
+    "Запросы, ожидающие слот, по классам роутов",
+    ["route_class"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_SHED = Counter(
+    "film_service_admission_shed_total",
+    "Отклоненные с 503 запросы. reason: queue_full - очередь заполнена, timeout - слот не освободился вовремя",
+    ["route_class", "reason"],
+)
+
+PREFETCH_JOBS = Counter(
+    "film_service_prefetch_jobs_total",
+    "Задания предвыборки. result: dropped - пул занят, cached - ключ уже в кэше, loaded, failed",
+    ["result"],
+)
+
+
+def cache_family(key: str) -> str:
+    """Семейство ключа кэша: movie, movies, genre, person, response..."""
+    return key.partition(":")[0]
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Callable
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError
+
+from core.config import settings
+from db.cache_tags import INDEX_TAGS, tag_key
+from db.codecs import Codec
+
+logger = logging.getLogger(__name__)
+
+# Отправитель инвалидаций в канале локального кэша: не совпадает с origin ни одного воркера
+ORIGIN = "etl"
+
+
+class CacheInvalidator:
+    """Удаление ключей кэша по событиям ETL.
+
+    ETL пишет в stream идентификаторы загруженных в ES записей. Воркеры читают его одной consumer group,
+    поэтому каждое событие обрабатывает один воркер: он удаляет ключи из множеств тегов и рассылает
+    их остальным воркерам через канал инвалидации локального кэша. После удаления ключей вызывается on_change.
+    """
+
+    def __init__(self, redis: Redis, codec: Codec, on_change: Callable[[], None] | None = None) -> None:
+        self._redis = redis
+        self._codec = codec
+        self._on_change = on_change
+        self._consumer = f"{socket.gethostname()}-{os.getpid()}"
+
+    async def listen(self) -> None:
+        while True:
+            try:
+                await self._create_group()
+                while True:
+                    await self._consume()
+            except (RedisError, OSError) as exc:
+                logger.warning("<Cache invalidation consumer failed: %s>", exc)
+                await asyncio.sleep(1)
+
+    async def invalidate(self, index: str, ids: list[str]) -> int:
+        """Удалить ключи кэша, в которых есть записи индекса
+
+        Args:
+            index: индекс ES, в который ETL загрузил записи
+            ids: идентификаторы записей
+
+        Returns:
+            int: количество удаленных ключей
+        """
+        if (prefix := INDEX_TAGS.get(index)) is None or not ids:
+            return 0
+        tags = [tag_key(f"{prefix}:{id_}") for id_ in ids]
+        now = time.time()
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.zrangebyscore(tag, now, "+inf")
+            members = await pipe.execute()
+        keys = {key.decode() for keys in members for key in keys}
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.delete(*tags, *(self._codec.key(key) for key in keys))
+            for key in keys:
+                pipe.publish(settings.cache.invalidation_channel, f"{ORIGIN} {key}")
+            await pipe.execute()
+        logger.info("<Invalidated %s cache keys for %s changed %s>", len(keys), len(ids), index)
+        return len(keys)
+
+    async def _create_group(self) -> None:
+        try:
+            await self._redis.xgroup_create(
+                settings.cache.events_stream, settings.cache.events_group, id="$", mkstream=True
+            )
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    async def _consume(self) -> None:
+        response = await self._redis.xreadgroup(
+            settings.cache.events_group,
+            self._consumer,
+            {settings.cache.events_stream: ">"},
+            count=100,
+            block=5000,
+        )
+        for _, messages in response or []:
+            for message_id, fields in messages:
+                try:
+                    index, ids = fields[b"index"].decode(), fields[b"ids"].decode().split(",")
+                except (KeyError, UnicodeDecodeError):
+                    # Иначе ошибка остановила бы consumer, и инвалидация ждала бы перезапуска воркера
+                    logger.error("<Skipped malformed cache invalidation event %s: %s>", message_id, fields)
+                else:
+                    deleted = await self.invalidate(index, ids)
+                    if deleted and self._on_change:
+                        self._on_change()
+                await self._redis.xack(settings.cache.events_stream, settings.cache.events_group, message_id)
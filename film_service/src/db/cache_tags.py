@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+
+from models.models import Genre, Movie, MovieInfo, Person, PersonInfo, Suggestions
+
+# Индекс ES, который публикует ETL, -> префикс тега его сущностей
+INDEX_TAGS = {"movies": "movie", "genres": "genre", "persons": "person"}
+
+
+def tag_key(tag: str) -> str:
+    """Ключ sorted set Redis с ключами кэша, в которых есть сущность. Вес ключа - время его истечения"""
+    return f"tags:{tag}"
+
+
+def row_tags(row: BaseModel) -> set[str]:
+    """Теги сущности: по ним ключ кэша удаляется, когда ETL сообщает об изменении записи.
+
+    Вложенные сущности не учитываются: ETL заново выгружает фильм при изменении его жанров и персон,
+    а персону при изменении ее фильмов.
+    """
+    if isinstance(row, (Movie, MovieInfo)):
+        return {f"movie:{row.uuid}"}
+    if isinstance(row, Genre):
+        return {f"genre:{row.uuid}"}
+    if isinstance(row, Person):
+        return {f"person:{row.id}"}
+    if isinstance(row, PersonInfo):
+        return {f"person:{row.uuid}"}
+    if isinstance(row, Suggestions):
+        return set().union(*(row_tags(item) for item in [*row.films, *row.persons]))
+    return set()
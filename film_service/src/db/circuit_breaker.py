@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+from enum import Enum
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from core import deadline
+from core.metrics import CIRCUIT_STATE, CIRCUIT_TRANSITIONS
+from db.exceptions import DeadlineExceededException, ServiceUnavailableException
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+
+STATE_VALUES = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
+
+class CircuitBreaker:
+    """Предохранитель для вызовов хранилища.
+
+    Каждый вызов ограничен timeout или остатком бюджета запроса, если он меньше.
+    После failure_threshold сбоев подряд предохранитель размыкается, и следующие recovery_timeout секунд
+    вызовы сразу завершаются ServiceUnavailableException, не дожидаясь хранилища.
+    Затем проходит один пробный вызов: успех замыкает предохранитель, сбой снова размыкает.
+    Сбоем считается только то, что is_failure признает недоступностью, а не, например, ненайденный документ.
+    Вызов, прерванный исчерпанным бюджетом запроса, тоже не сбой: хранилище не получило положенного времени.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        failure_threshold: int,
+        recovery_timeout: float,
+        is_failure: Callable[[Exception], bool] = lambda exc: isinstance(exc, asyncio.TimeoutError),
+    ) -> None:
+        self.name = name
+        self._timeout = timeout
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._is_failure = is_failure
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.state = CircuitState.CLOSED
+        CIRCUIT_STATE.labels(name).set(STATE_VALUES[self.state])
+
+    @property
+    def retry_after(self) -> float:
+        """Через сколько секунд предохранитель пропустит пробный вызов"""
+        if self.state != CircuitState.OPEN:
+            return 0
+        return max(self._opened_at + self._recovery_timeout - time.monotonic(), 0)
+
+    async def call(self, function: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """Выполнить function(*args, **kwargs) через предохранитель
+
+        Raises:
+            ServiceUnavailableException: предохранитель разомкнут, вызов не уложился в timeout
+                или завершился ошибкой недоступности
+            DeadlineExceededException: вызов не уложился в остаток бюджета запроса
+
+        Returns:
+            результат function
+        """
+        budget = deadline.remaining(reserve=True)
+        timeout = self._timeout if budget is None else min(self._timeout, budget)
+        if timeout <= 0:
+            raise DeadlineExceededException(f"No time left to call {self.name}")
+        probe = self._acquire()
+        try:
+            result = await asyncio.wait_for(function(*args, **kwargs), timeout)
+        except Exception as exc:
+            if isinstance(exc, asyncio.TimeoutError) and timeout < self._timeout:
+                if probe:
+                    self._probing = False
+                raise DeadlineExceededException(f"Request deadline exceeded calling {self.name}") from exc
+            if not self._is_failure(exc):
+                self._on_success(probe)
+                raise
+            self._on_failure(probe)
+            raise ServiceUnavailableException(f"{self.name} is unavailable: {exc!r}") from exc
+        except BaseException:
+            # Вызов отменили снаружи: его результат ничего не говорит о хранилище
+            if probe:
+                self._probing = False
+            raise
+        self._on_success(probe)
+        return result
+
+    def _acquire(self) -> bool:
+        """Проверить, можно ли вызывать хранилище. True - вызов пробный"""
+        if self.state == CircuitState.CLOSED:
+            return False
+        if self.state == CircuitState.OPEN and self.retry_after <= 0:
+            self._transition(CircuitState.HALF_OPEN)
+        if self.state == CircuitState.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        raise ServiceUnavailableException(f"Circuit {self.name} is open")
+
+    def _on_success(self, probe: bool) -> None:
+        self._failures = 0
+        if probe:
+            self._probing = False
+            self._transition(CircuitState.CLOSED)
+
+    def _on_failure(self, probe: bool) -> None:
+        self._failures += 1
+        if probe:
+            self._probing = False
+        if probe or (self.state == CircuitState.CLOSED and self._failures >= self._failure_threshold):
+            self._opened_at = time.monotonic()
+            self._transition(CircuitState.OPEN)
+
+    def _transition(self, state: CircuitState) -> None:
+        logger.warning("<Circuit %s: %s -> %s>", self.name, self.state.value, state.value)
+        self.state = state
+        CIRCUIT_STATE.labels(self.name).set(STATE_VALUES[state])
+        CIRCUIT_TRANSITIONS.labels(self.name, state.value).inc()
+
+
+circuit_breaker: Optional[CircuitBreaker] = None
+
+
+# Функция понадобится при внедрении зависимостей
+async def get_circuit_breaker() -> Optional[CircuitBreaker]:
+    return circuit_breaker
@@ -0,0 +1,103 @@
+import abc
+import json
+import zlib
+from typing import Type
+
+import orjson
+from pydantic import BaseModel
+
+from core.config import settings
+
+
+class Codec(abc.ABC):
+    """Формат хранения моделей в Redis. Префикс версии добавляется к ключу, чтобы форматы не смешивались"""
+
+    @property
+    @abc.abstractmethod
+    def version(self) -> str:
+        pass
+
+    @abc.abstractmethod
+    def encode_object(self, row: BaseModel) -> bytes:
+        pass
+
+    @abc.abstractmethod
+    def encode_objects(self, rows: list[BaseModel]) -> bytes:
+        pass
+
+    @abc.abstractmethod
+    def decode_object(self, data: bytes, mapper: Type[BaseModel]) -> BaseModel:
+        pass
+
+    @abc.abstractmethod
+    def decode_objects(self, data: bytes, mapper: Type[BaseModel]) -> list[BaseModel]:
+        pass
+
+    def key(self, key: str) -> str:
+        return f"{self.version}:{key}" if self.version else key
+
+
+class LegacyJsonCodec(Codec):
+    """Исходный формат: список json-строк, закодированный в json еще раз. Ключи без префикса"""
+
+    @property
+    def version(self) -> str:
+        return ""
+
+    def encode_object(self, row: BaseModel) -> bytes:
+        return row.json(by_alias=True).encode()
+
+    def encode_objects(self, rows: list[BaseModel]) -> bytes:
+        return json.dumps([row.json(by_alias=True) for row in rows]).encode()
+
+    def decode_object(self, data: bytes, mapper: Type[BaseModel]) -> BaseModel:
+        return mapper.parse_raw(data)
+
+    def decode_objects(self, data: bytes, mapper: Type[BaseModel]) -> list[BaseModel]:
+        return [mapper.parse_raw(row) for row in json.loads(data)]
+
+
+class OrjsonCodec(Codec):
+    """Один orjson-документ на ключ, сжатый zlib, если он больше порога.
+
+    Сжатые данные отличаем по первому байту: json всегда начинается с "{" или "[".
+    """
+
+    def __init__(self, compress_threshold: int, compress_level: int = 1) -> None:
+        self._compress_threshold = compress_threshold
+        self._compress_level = compress_level
+
+    @property
+    def version(self) -> str:
+        return "v1"
+
+    def encode_object(self, row: BaseModel) -> bytes:
+        return self._pack(orjson.dumps(row.dict(by_alias=True)))
+
+    def encode_objects(self, rows: list[BaseModel]) -> bytes:
+        return self._pack(orjson.dumps([row.dict(by_alias=True) for row in rows]))
+
+    def decode_object(self, data: bytes, mapper: Type[BaseModel]) -> BaseModel:
+        return mapper.parse_obj(orjson.loads(self._unpack(data)))
+
+    def decode_objects(self, data: bytes, mapper: Type[BaseModel]) -> list[BaseModel]:
+        return [mapper.parse_obj(row) for row in orjson.loads(self._unpack(data))]
+
+    def _pack(self, payload: bytes) -> bytes:
+        if self._compress_threshold and len(payload) > self._compress_threshold:
+            return zlib.compress(payload, self._compress_level)
+        return payload
+
+    @staticmethod
+    def _unpack(data: bytes) -> bytes:
+        if data[:1] in (b"{", b"["):
+            return data
+        return zlib.decompress(data)
+
+
+def get_codec(version: str) -> Codec:
+    if version == "v1":
+        return OrjsonCodec(compress_threshold=settings.cache.compress_threshold)
+    if version == "legacy":
+        return LegacyJsonCodec()
+    raise ValueError(f"Unknown cache codec {version}")
@@ -1,14 +1,62 @@
 import abc
-from typing import Any, Type
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, AsyncIterator, Awaitable, Callable, Type, TypeVar
 
-from elasticsearch import AsyncElasticsearch
+from elasticsearch import ApiError, AsyncElasticsearch, TransportError
+from pydantic import BaseModel
 
-from models.models import Genre, LimitOffset, Movie, Person, SortField
+from core import deadline
+from core.metrics import ES_REQUEST_SECONDS, ES_TOOK_SECONDS
+from db.circuit_breaker import CircuitBreaker
+from db.multi_search import MultiSearch
+from models.models import ID_FIELD, Cursor, Genre, LimitOffset, Movie, Person, SortField
+
+logger = logging.getLogger(__name__)
+
+
+T = TypeVar("T")
+
+# Метод репозитория, который сейчас выполняет запрос: по нему помечается took ответа
+_current_method: ContextVar[str] = ContextVar("es_repository_method", default="unknown")
+
+
+def observed(method: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Записывать в метрики время метода репозитория"""
+
+    @wraps(method)
+    async def wrapper(self: "ESRepository", *args: Any, **kwargs: Any) -> T:
+        token = _current_method.set(method.__name__)
+        started = time.perf_counter()
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            ES_REQUEST_SECONDS.labels(self.index_name, method.__name__).observe(time.perf_counter() - started)
+            _current_method.reset(token)
+
+    return wrapper
+
+
+def is_es_failure(exc: Exception) -> bool:
+    """Ошибка говорит о недоступности ES, а не о запросе: таймаут, сбой соединения или ответ 5xx"""
+    if isinstance(exc, (asyncio.TimeoutError, TransportError)):
+        return True
+    return isinstance(exc, ApiError) and exc.meta is not None and exc.meta.status >= 500
 
 
 class ESRepository(abc.ABC):
-    def __init__(self, client: AsyncElasticsearch):
+    def __init__(
+        self,
+        client: AsyncElasticsearch,
+        multi_search: MultiSearch | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+    ):
         self._client = client
+        self._multi_search = multi_search
+        self._circuit_breaker = circuit_breaker
 
     @property
     @abc.abstractmethod
@@ -25,12 +73,103 @@ class ESRepository(abc.ABC):
         query: dict[str, Any],
         limit_offset: LimitOffset,
         sort: SortField | None = None,
+        cursor: Cursor | None = None,
+        projection: Type[BaseModel] | None = None,
     ) -> list[Movie] | list[Person] | list[Genre]:
-        data = await self._client.search(
-            index=self.index_name,
+        """Запрос страницы из индекса
+
+        Args:
+            query: запрос в формате query DSL
+            limit_offset: размер и номер страницы
+            sort: поле сортировки
+            cursor: курсор search_after, при нем номер страницы не используется
+            projection: модель с частью полей документа, из ES запрашиваются только они
+
+        Returns:
+            list: сущности base_model или projection
+        """
+        model = projection or self.base_model
+        data = await self._search(
             query=query,
             size=limit_offset.limit,
-            from_=(limit_offset.offset - 1) * limit_offset.limit,
-            sort=[{sort.field: {"order": sort.operation}}] if sort else None,
+            from_=None if cursor else (limit_offset.offset - 1) * limit_offset.limit,
+            sort=self._sort(sort),
+            search_after=cursor.search_after if cursor else None,
+            source_includes=[field.alias for field in projection.__fields__.values()] if projection else None,
         )
-        return [self.base_model(**model_data["_source"]) for model_data in data["hits"]["hits"]]
+        return [model(**model_data["_source"]) for model_data in data["hits"]["hits"]]
+
+    async def _export(
+        self, query: dict[str, Any], projection: Type[BaseModel], batch_size: int, keep_alive: str
+    ) -> AsyncIterator[list[BaseModel]]:
+        """Все документы запроса пачками по batch_size в порядке id
+
+        Индекс обходится через point in time и search_after: каждая пачка - запрос без from_,
+        и выгрузка видит индекс таким, каким он был при ее начале, даже если ETL тем временем его обновляет.
+        В памяти держится одна пачка. Point in time закрывается, когда выгрузку дочитали или прервали.
+
+        Args:
+            query: запрос в формате query DSL
+            projection: модель с частью полей документа
+            batch_size: количество документов в пачке
+            keep_alive: сколько ES хранит point in time между запросами пачек
+
+        Yields:
+            list: сущности projection
+        """
+        pit = await self._call(self._client.open_point_in_time, index=self.index_name, keep_alive=keep_alive)
+        pit_id = pit["id"]
+        search_after = None
+        try:
+            while True:
+                data = await self._call(
+                    self._client.search,
+                    query=query,
+                    size=batch_size,
+                    sort=self._sort(SortField(ID_FIELD)),
+                    pit={"id": pit_id, "keep_alive": keep_alive},
+                    search_after=search_after,
+                    source_includes=[field.alias for field in projection.__fields__.values()],
+                )
+                # ES может вернуть новый идентификатор point in time, следующий запрос должен идти с ним
+                pit_id = data.get("pit_id", pit_id)
+                hits = data["hits"]["hits"]
+                if hits:
+                    yield [projection(**hit["_source"]) for hit in hits]
+                if len(hits) < batch_size:
+                    return
+                search_after = hits[-1]["sort"]
+        finally:
+            try:
+                await self._client.close_point_in_time(id=pit_id)
+            except Exception as exc:
+                # Незакрытый point in time ES удалит сам через keep_alive
+                logger.warning("<Failed to close point in time of %s: %r>", self.index_name, exc)
+
+    async def _search(self, **params: Any) -> dict[str, Any]:
+        # Одновременные запросы к ES уходят одним _msearch, если он включен
+        if self._multi_search is not None:
+            data = await self._call(self._multi_search.search, self.index_name, **params)
+        else:
+            data = await self._call(self._client.search, index=self.index_name, **params)
+        if "took" in data:
+            ES_TOOK_SECONDS.labels(self.index_name, _current_method.get()).observe(data["took"] / 1000)
+        return data
+
+    async def _call(self, function: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """Вызов клиента ES не дольше остатка бюджета запроса: с предохранителем, если он задан,
+        ограничен по времени и не ждет недоступный ES"""
+        if self._circuit_breaker is None:
+            return await deadline.bounded(function(*args, **kwargs), reserve=True)
+        return await self._circuit_breaker.call(function, *args, **kwargs)
+
+    @staticmethod
+    def _sort(sort: SortField | None) -> list[dict[str, Any]] | None:
+        if sort is None:
+            return None
+        sort_ = [{sort.field: {"order": sort.operation}}]
+        # Без уникального поля порядок документов с равным значением не определен,
+        # и search_after может пропустить или повторить документы на границе страниц
+        if sort.field != ID_FIELD:
+            sort_.append({ID_FIELD: {"order": "asc"}})
+        return sort_
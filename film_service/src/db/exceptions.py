@@ -3,13 +3,25 @@ class BaseRepositoryException(Exception):
         self.detail = detail
 
 
-class MovieNotFoundException(BaseRepositoryException):
+class NotFoundException(BaseRepositoryException):
+    """Запись не найдена в ES"""
+
+
+class MovieNotFoundException(NotFoundException):
     """Фильм не найден в ES"""
 
 
-class GenreNotFoundException(BaseRepositoryException):
+class GenreNotFoundException(NotFoundException):
     """Жанр не найден в ES"""
 
 
-class PersonNotFoundException(BaseRepositoryException):
+class PersonNotFoundException(NotFoundException):
     """Персона не найдена в ES"""
+
+
+class ServiceUnavailableException(BaseRepositoryException):
+    """ES недоступен: ошибка соединения, таймаут запроса или разомкнутый предохранитель"""
+
+
+class DeadlineExceededException(ServiceUnavailableException):
+    """Бюджет времени запроса исчерпан раньше, чем ответило хранилище"""
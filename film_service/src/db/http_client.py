@@ -0,0 +1,10 @@
+from typing import Optional
+
+from aiohttp import ClientSession
+
+session: Optional[ClientSession] = None
+
+
+# Функция понадобится при внедрении зависимостей
+async def get_http_session() -> ClientSession:
+    return session
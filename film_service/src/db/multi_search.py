@@ -0,0 +1,95 @@
+import asyncio
+import dataclasses
+import logging
+from typing import Any, Optional
+
+from elasticsearch import ApiError, AsyncElasticsearch
+
+logger = logging.getLogger(__name__)
+
+# Имена параметров AsyncElasticsearch.search, которые в теле _msearch называются иначе
+BODY_FIELDS = {"from_": "from", "source_includes": "_source"}
+
+
+class MultiSearch:
+    """Объединение одновременных поисковых запросов в один _msearch.
+
+    Запросы, пришедшие за window секунд, уходят в ES одним HTTP-запросом, но не больше max_batch за раз.
+    Каждый вызывающий получает свой ответ или свою ошибку.
+    """
+
+    def __init__(self, client: AsyncElasticsearch, window: float, max_batch: int) -> None:
+        self._client = client
+        self._window = window
+        self._max_batch = max_batch
+        self._pending: list[tuple[str, dict[str, Any], asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._sending: set[asyncio.Task] = set()
+
+    async def search(self, index: str, **params: Any) -> dict[str, Any]:
+        """Выполнить поиск в составе ближайшего _msearch
+
+        Args:
+            index: индекс
+            params: параметры в формате AsyncElasticsearch.search
+
+        Returns:
+            dict: ответ поиска, как у AsyncElasticsearch.search
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        body = {BODY_FIELDS.get(name, name): value for name, value in params.items() if value is not None}
+        self._pending.append((index, body, future))
+        if len(self._pending) >= self._max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: list[tuple[str, dict[str, Any], asyncio.Future]]) -> None:
+        searches = []
+        for index, body, _ in batch:
+            searches.extend(({"index": index}, body))
+        try:
+            data = await self._client.msearch(searches=searches)
+        except Exception as exc:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        logger.debug("<Sent %s searches in one _msearch>", len(batch))
+        for (*_, future), response in zip(batch, data["responses"]):
+            if future.done():
+                continue
+            if "error" in response:
+                future.set_exception(ApiError(str(response["error"]), self._item_meta(data, response), response))
+            else:
+                future.set_result(response)
+
+    @staticmethod
+    def _item_meta(data: Any, response: dict[str, Any]) -> Any:
+        # Весь _msearch отвечает 200, статус ошибки поиска - в его элементе. По нему is_es_failure
+        # отличает сбой шарда (5xx) от ошибки запроса так же, как для одиночного search
+        meta = getattr(data, "meta", None)
+        if meta is None or "status" not in response:
+            return meta
+        return dataclasses.replace(meta, status=response["status"])
+
+
+multi_search: Optional[MultiSearch] = None
+
+
+# Функция понадобится при внедрении зависимостей
+async def get_multi_search() -> Optional[MultiSearch]:
+    return multi_search
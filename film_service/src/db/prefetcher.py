@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from contextlib import suppress
+from functools import partial
+from typing import Awaitable, Callable, Optional
+
+from core import deadline
+from core.metrics import PREFETCH_JOBS
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """Фоновый пул заданий, которые строят ключи кэша до того, как их запросят.
+
+    Одновременно выполняется не больше concurrency заданий, а всего в работе и в очереди - не больше max_pending.
+    Задание сверх предела отбрасывается: предвыборка не копит работу под нагрузкой и не отнимает ES у запросов
+    пользователей. Задание для ключа, который уже строится или ждет очереди, не добавляется повторно.
+    """
+
+    def __init__(self, concurrency: int, max_pending: int) -> None:
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._max_pending = max_pending
+        self._jobs: dict[str, asyncio.Task] = {}
+
+    def submit(self, key: str, job: Callable[[], Awaitable[bool]]) -> bool:
+        """Поставить задание в очередь, не дожидаясь его
+
+        Args:
+            key: ключ кэша, который строит задание
+            job: корутинная функция: True - ключ построен, False - он уже был в кэше
+
+        Returns:
+            bool: задание принято
+        """
+        if key in self._jobs:
+            return False
+        if len(self._jobs) >= self._max_pending:
+            PREFETCH_JOBS.labels("dropped").inc()
+            return False
+        task = asyncio.create_task(self._run(key, job))
+        self._jobs[key] = task
+        task.add_done_callback(partial(self._forget, key))
+        return True
+
+    async def close(self) -> None:
+        for task in list(self._jobs.values()):
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+    async def _run(self, key: str, job: Callable[[], Awaitable[bool]]) -> None:
+        # Задача работает в копии контекста запроса, но не ограничена его бюджетом
+        deadline.clear()
+        async with self._semaphore:
+            try:
+                loaded = await job()
+            except Exception as exc:
+                PREFETCH_JOBS.labels("failed").inc()
+                logger.debug("<Prefetch of %s failed: %r>", key, exc)
+                return
+        PREFETCH_JOBS.labels("loaded" if loaded else "cached").inc()
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._jobs.get(key) is task:
+            del self._jobs[key]
+
+
+prefetcher: Optional[Prefetcher] = None
+
+
+# Функция понадобится при внедрении зависимостей
+async def get_prefetcher() -> Optional[Prefetcher]:
+    return prefetcher
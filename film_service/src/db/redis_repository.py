@@ -1,40 +1,388 @@
-import json
+import asyncio
 import logging
-from typing import Type
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional, Type
 
 from fastapi import Depends
 from pydantic import BaseModel
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import RedisError
 
+from core import deadline
 from core.config import settings
+from core.metrics import CACHE_REQUESTS, cache_family
+from db.cache_tags import row_tags, tag_key
+from db.codecs import Codec, get_codec
 from db.redis import get_redis
 
 logger = logging.getLogger(__name__)
 
 
+class CachePolicy(BaseModel):
+    """Время жизни ключа: после soft_ttl значение устарело, после hard_ttl удаляется"""
+
+    soft_ttl: int | float
+    hard_ttl: int | float
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    stale: bool = False
+
+
+class LocalCache:
+    """LRU-кэш воркера перед Redis, ограниченный по числу записей и по объему.
+
+    Записи живут не дольше ttl, а при записи ключа в Redis другим воркером удаляются
+    по сообщению из канала инвалидации.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: int | float) -> None:
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._size = 0
+        self.origin = uuid.uuid4().hex
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._size}
+
+    def get(self, key: str) -> Any:
+        if (entry := self._entries.get(key)) is None or entry[0] <= time.monotonic():
+            self.pop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def set(self, key: str, value: Any, size: int, ttl: int | float | None = None) -> None:
+        self.pop(key)
+        if size > self._max_bytes:
+            return
+        expires_at = time.monotonic() + min(ttl or self._ttl, self._ttl)
+        self._entries[key] = (expires_at, size, value)
+        self._size += size
+        while len(self._entries) > self._max_entries or self._size > self._max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+
+    def pop(self, key: str) -> None:
+        if (entry := self._entries.pop(key, None)) is not None:
+            self._size -= entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+    async def listen(self, redis: Redis) -> None:
+        """Удалять ключи, которые перезаписали другие воркеры. Сообщение: "<origin> <key>" или "*" """
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(settings.cache.invalidation_channel)
+                    # Пока не были подписаны, могли пропустить инвалидации
+                    self.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._invalidate(message["data"].decode())
+            except (RedisError, OSError) as exc:
+                logger.warning("<Cache invalidation listener failed: %s>", exc)
+                await asyncio.sleep(1)
+
+    def _invalidate(self, message: str) -> None:
+        if message == "*":
+            self.clear()
+            return
+        origin, _, key = message.partition(" ")
+        if origin != self.origin:
+            self.pop(key)
+
+
 class RedisRepository:
-    def __init__(self, client: Redis):
+    """Кэш моделей в Redis.
+
+    С tag_index каждый записанный ключ добавляется в множества тегов его сущностей (см. cache_tags),
+    чтобы CacheInvalidator мог удалить ключ при изменении сущности в ETL. Ключ хранится в множестве
+    с временем своего истечения, и каждая запись в множество удаляет из него истекшие ключи.
+    С shadow_ttl рядом с моделями пишется их теневая копия: она переживает hard_ttl и инвалидацию по тегам,
+    и сервисы читают ее, только когда ES недоступен.
+    С negative_ttl сервисы запоминают, что записи нет в ES: отрицательная запись хранит текст ошибки.
+    Вызовы Redis ждут не дольше остатка бюджета запроса (см. core.deadline).
+    """
+
+    def __init__(
+        self,
+        client: Redis,
+        local_cache: LocalCache | None = None,
+        codec: Codec | None = None,
+        tag_index: bool = False,
+        shadow_ttl: int = 0,
+        negative_ttl: int = 0,
+    ):
         self._client = client
+        self._local_cache = local_cache
+        self._codec = codec or default_codec
+        self._tag_index = tag_index
+        self._shadow_ttl = shadow_ttl
+        self._negative_ttl = negative_ttl
 
     async def get_object(self, key: str, mapper: Type[BaseModel]) -> BaseModel:
-        if data_from_cache := await self._client.get(key):
-            logger.info("<Get response from Redis for request - %s>", key)
-            return mapper.parse_raw(data_from_cache)
-        return None
+        return (await self.get_object_entry(key, mapper)).value
 
     async def get_objects(self, key: str, mapper: Type[BaseModel]) -> list[BaseModel]:
-        if data_from_cache := await self._client.get(key):
+        return (await self.get_objects_entry(key, mapper)).value
+
+    async def get_object_entry(
+        self, key: str, mapper: Type[BaseModel], policy: CachePolicy | None = None
+    ) -> CacheEntry:
+        if self._local_cache and (object_from_memory := self._local_cache.get(key)) is not None:
+            self._count(key, "local")
+            return CacheEntry(object_from_memory)
+        data_from_cache, stale = await self._get(key, policy)
+        self._count(key, ("stale" if stale else "hit") if data_from_cache else "miss")
+        if data_from_cache:
             logger.info("<Get response from Redis for request - %s>", key)
-            return [mapper.parse_raw(genre_from_cache) for genre_from_cache in json.loads(data_from_cache)]
-        return []
+            row = self._codec.decode_object(data_from_cache, mapper)
+            if not stale:
+                self._remember(key, row, len(data_from_cache), policy)
+            return CacheEntry(row, stale)
+        return CacheEntry(None)
+
+    async def get_objects_entry(
+        self, key: str, mapper: Type[BaseModel], policy: CachePolicy | None = None
+    ) -> CacheEntry:
+        if self._local_cache and (objects_from_memory := self._local_cache.get(key)) is not None:
+            self._count(key, "local")
+            return CacheEntry(objects_from_memory)
+        data_from_cache, stale = await self._get(key, policy)
+        self._count(key, ("stale" if stale else "hit") if data_from_cache else "miss")
+        if data_from_cache:
+            logger.info("<Get response from Redis for request - %s>", key)
+            rows = self._codec.decode_objects(data_from_cache, mapper)
+            if not stale:
+                self._remember(key, rows, len(data_from_cache), policy)
+            return CacheEntry(rows, stale)
+        return CacheEntry([])
+
+    async def load_object(self, key: str, row: BaseModel, policy: CachePolicy | None = None) -> None:
+        data = self._codec.encode_object(row)
+        await self._set(key, data, policy, self._tags([row]))
+        self._remember(key, row, len(data), policy)
+
+    async def load_objects(
+        self, key: str, rows: list[BaseModel], policy: CachePolicy | None = None, tags: set[str] = frozenset()
+    ) -> None:
+        data = self._codec.encode_objects(rows)
+        await self._set(key, data, policy, self._tags(rows, tags))
+        if rows:
+            self._remember(key, rows, len(data), policy)
+
+    async def get_object_shadow(self, key: str, mapper: Type[BaseModel]) -> BaseModel | None:
+        """Последний записанный объект ключа из теневой копии или None"""
+        if (data := await self._get_shadow(key)) is None:
+            return None
+        return self._codec.decode_object(data, mapper)
+
+    async def get_objects_shadow(self, key: str, mapper: Type[BaseModel]) -> list[BaseModel] | None:
+        """Последний записанный список объектов ключа из теневой копии или None"""
+        if (data := await self._get_shadow(key)) is None:
+            return None
+        return self._codec.decode_objects(data, mapper)
+
+    async def get_shadows_by_keys(self, keys: list[str], mapper: Type[BaseModel]) -> list[BaseModel | None]:
+        """Теневые копии объектов по нескольким ключам одним MGET, None для отсутствующих"""
+        values = await deadline.bounded(self._client.mget([self._shadow_key(key) for key in keys]))
+        rows = []
+        for key, data in zip(keys, values):
+            if data:
+                self._count(key, "shadow")
+            rows.append(self._codec.decode_object(data, mapper) if data else None)
+        return rows
+
+    async def get_missing(self, key: str) -> str | None:
+        """Текст ошибки из отрицательной записи ключа или None, если запись не помечена отсутствующей"""
+        if self._negative_ttl <= 0:
+            return None
+        missing_key = self._missing_key(key)
+        if self._local_cache and (detail := self._local_cache.get(missing_key)) is not None:
+            self._count(key, "negative")
+            return detail
+        data = await deadline.bounded(self._client.get(self._codec.key(missing_key)))
+        if not data:
+            return None
+        self._count(key, "negative")
+        detail = data.decode()
+        self._remember(missing_key, detail, len(data), None)
+        return detail
+
+    async def load_missing(self, key: str, detail: str, tags: set[str] = frozenset()) -> None:
+        """Пометить ключ отсутствующим на negative_ttl секунд
+
+        Args:
+            key: ключ, значение которого не нашлось в ES
+            detail: текст ошибки, с которой сервис ответит до истечения записи
+            tags: теги записи: когда ETL загрузит ее в ES, CacheInvalidator удалит и отрицательную запись
+        """
+        if self._negative_ttl <= 0:
+            return
+        policy = CachePolicy(soft_ttl=self._negative_ttl, hard_ttl=self._negative_ttl)
+        tags = set(tags) if self._tag_index else set()
+        await self._set(self._missing_key(key), detail.encode(), policy, tags, shadow=False)
+
+    async def exists(self, key: str) -> bool:
+        """Есть ли ключ в Redis, не читая значение и не учитывая чтение в метриках кэша"""
+        return bool(await deadline.bounded(self._client.exists(self._codec.key(key))))
+
+    async def get_bytes(self, key: str) -> bytes | None:
+        """Прочитать данные ключа как есть, без декодирования в модели"""
+        if self._local_cache and (data := self._local_cache.get(key)) is not None:
+            self._count(key, "local")
+            return data
+        data = await deadline.bounded(self._client.get(self._codec.key(key)))
+        self._count(key, "hit" if data else "miss")
+        if data:
+            self._remember(key, data, len(data), None)
+        return data
+
+    async def load_bytes(self, key: str, data: bytes, rows: list[BaseModel], policy: CachePolicy | None = None) -> None:
+        """Записать готовые данные с тегами сущностей rows. Теневая копия не пишется: при недоступности ES
+        сервисы собирают ответ из копий моделей"""
+        await self._set(key, data, policy, self._tags(rows), shadow=False)
+        self._remember(key, data, len(data), policy)
+
+    async def get_objects_by_keys(
+        self, keys: list[str], mapper: Type[BaseModel], policy: CachePolicy | None = None
+    ) -> list[BaseModel | None]:
+        """Прочитать объекты по нескольким ключам одним MGET
+
+        Args:
+            keys: ключи объектов
+            mapper: модель объекта
+            policy: время жизни, с которым объекты попадут в локальный кэш
+
+        Returns:
+            list[BaseModel | None]: объекты в порядке ключей, None для отсутствующих в кэше
+        """
+        rows = [self._local_cache.get(key) if self._local_cache else None for key in keys]
+        missed = [index for index, row in enumerate(rows) if row is None]
+        if len(missed) < len(keys):
+            CACHE_REQUESTS.labels(cache_family(keys[0]), "local").inc(len(keys) - len(missed))
+        if not missed:
+            return rows
+
+        values = await deadline.bounded(self._client.mget([self._codec.key(keys[index]) for index in missed]))
+        for index, data in zip(missed, values):
+            self._count(keys[index], "hit" if data else "miss")
+            if data:
+                rows[index] = self._codec.decode_object(data, mapper)
+                self._remember(keys[index], rows[index], len(data), policy)
+        return rows
+
+    async def load_objects_by_keys(self, rows: dict[str, BaseModel], policy: CachePolicy | None = None) -> None:
+        """Записать объекты под своими ключами одним pipeline"""
+        if not rows:
+            return
+        encoded = {key: self._codec.encode_object(row) for key, row in rows.items()}
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key, data in encoded.items():
+                pipe.set(self._codec.key(key), data, ex=self._expire(policy))
+                self._add_shadow(pipe, key, data)
+                self._add_tags(pipe, key, self._tags([rows[key]]), self._expire(policy))
+                if self._local_cache:
+                    pipe.publish(settings.cache.invalidation_channel, f"{self._local_cache.origin} {key}")
+            await deadline.bounded(pipe.execute())
+        for key, data in encoded.items():
+            self._remember(key, rows[key], len(data), policy)
+
+    async def _get(self, key: str, policy: CachePolicy | None) -> tuple[bytes | None, bool]:
+        key = self._codec.key(key)
+        if policy is None or policy.soft_ttl >= policy.hard_ttl:
+            return await deadline.bounded(self._client.get(key)), False
+
+        async with self._client.pipeline(transaction=False) as pipe:
+            data, ttl = await deadline.bounded(pipe.get(key).ttl(key).execute())
+        # Возраст ключа считаем по оставшемуся TTL, чтобы не хранить время записи рядом с данными
+        return data, 0 <= ttl < policy.hard_ttl - policy.soft_ttl
+
+    async def _set(
+        self, key: str, data: bytes, policy: CachePolicy | None, tags: set[str] = frozenset(), shadow: bool = True
+    ) -> None:
+        shadow = shadow and self._shadow_ttl > 0
+        if self._local_cache is None and not tags and not shadow:
+            await deadline.bounded(self._client.set(self._codec.key(key), data, ex=self._expire(policy)))
+            return
+
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.set(self._codec.key(key), data, ex=self._expire(policy))
+            if shadow:
+                self._add_shadow(pipe, key, data)
+            self._add_tags(pipe, key, tags, self._expire(policy))
+            if self._local_cache:
+                pipe.publish(settings.cache.invalidation_channel, f"{self._local_cache.origin} {key}")
+            await deadline.bounded(pipe.execute())
+
+    async def _get_shadow(self, key: str) -> bytes | None:
+        data = await deadline.bounded(self._client.get(self._shadow_key(key)))
+        if data:
+            self._count(key, "shadow")
+        return data
+
+    @staticmethod
+    def _missing_key(key: str) -> str:
+        return f"missing:{key}"
+
+    def _shadow_key(self, key: str) -> str:
+        return self._codec.key(f"shadow:{key}")
+
+    def _add_shadow(self, pipe: Pipeline, key: str, data: bytes) -> None:
+        if self._shadow_ttl > 0:
+            pipe.set(self._shadow_key(key), data, ex=self._shadow_ttl)
+
+    def _tags(self, rows: list[BaseModel], tags: set[str] = frozenset()) -> set[str]:
+        if not self._tag_index:
+            return set()
+        return set(tags).union(*(row_tags(row) for row in rows))
+
+    @staticmethod
+    def _add_tags(pipe: Pipeline, key: str, tags: set[str], ttl: int) -> None:
+        # Без удаления истекших ключей множество популярной сущности росло бы бесконечно:
+        # запись продлевает его TTL чаще, чем оно успевает истечь
+        now = time.time()
+        for tag in tags:
+            pipe.zadd(tag_key(tag), {key: now + ttl})
+            pipe.zremrangebyscore(tag_key(tag), "-inf", now)
+            pipe.expire(tag_key(tag), settings.cache.tag_ttl)
+
+    @staticmethod
+    def _count(key: str, result: str) -> None:
+        CACHE_REQUESTS.labels(cache_family(key), result).inc()
+
+    def _remember(self, key: str, value: Any, size: int, policy: CachePolicy | None) -> None:
+        if self._local_cache:
+            self._local_cache.set(key, value, size, ttl=policy.soft_ttl if policy else None)
+
+    @staticmethod
+    def _expire(policy: CachePolicy | None) -> int:
+        return int(policy.hard_ttl if policy else settings.redis.cache_expire)
 
-    async def load_object(self, key: str, row: BaseModel) -> None:
-        await self._client.set(key, row.json(by_alias=True), ex=settings.redis.cache_expire)
 
-    async def load_objects(self, key: str, rows: list[BaseModel]) -> None:
-        objects_for_redis = [row.json(by_alias=True) for row in rows]
-        await self._client.set(key, json.dumps(objects_for_redis), ex=settings.redis.cache_expire)
+default_codec: Codec = get_codec(settings.cache.codec)
+local_cache: Optional[LocalCache] = None
 
 
 async def get_redis_repo(redis: Redis = Depends(get_redis)) -> RedisRepository:
-    return RedisRepository(client=redis)
+    return RedisRepository(
+        client=redis,
+        local_cache=local_cache,
+        tag_index=settings.cache.tags_enabled,
+        shadow_ttl=settings.cache.shadow_ttl,
+        negative_ttl=settings.cache.negative_ttl,
+    )
@@ -4,9 +4,11 @@ from uuid import UUID
 from elasticsearch import AsyncElasticsearch, NotFoundError
 from fastapi import Depends
 
+from db.circuit_breaker import CircuitBreaker, get_circuit_breaker
 from db.elastic import get_elastic
-from db.es_repository import ESRepository
+from db.es_repository import ESRepository, observed
 from db.exceptions import GenreNotFoundException
+from db.multi_search import MultiSearch, get_multi_search
 from models.models import Genre, LimitOffset, SortField
 
 
@@ -19,14 +21,16 @@ class GenreElasticsearchRepository(ESRepository):
     def base_model(self) -> Type[Genre]:
         return Genre
 
+    @observed
     async def get_by_id(self, id_: UUID) -> Genre:
         try:
-            genre_form_es = await self._client.get(index="genres", id=id_)
+            genre_form_es = await self._call(self._client.get, index="genres", id=id_)
         except NotFoundError:
             raise GenreNotFoundException(f"Genre with id={id_} not found")
 
         return Genre(**genre_form_es["_source"])
 
+    @observed
     async def find_all(self, sort: str, limit_offset: LimitOffset) -> list[Genre]:
         return await self._request(
             query={"match_all": {}},
@@ -35,5 +39,9 @@ class GenreElasticsearchRepository(ESRepository):
         )
 
 
-async def get_genre_repository(elastic: AsyncElasticsearch = Depends(get_elastic)) -> GenreElasticsearchRepository:
-    return GenreElasticsearchRepository(client=elastic)
+async def get_genre_repository(
+    elastic: AsyncElasticsearch = Depends(get_elastic),
+    multi_search: MultiSearch | None = Depends(get_multi_search),
+    circuit_breaker: CircuitBreaker | None = Depends(get_circuit_breaker),
+) -> GenreElasticsearchRepository:
+    return GenreElasticsearchRepository(client=elastic, multi_search=multi_search, circuit_breaker=circuit_breaker)
@@ -1,13 +1,15 @@
-from typing import Type
+from typing import Any, AsyncIterator, Type
 from uuid import UUID
 
 from elasticsearch import AsyncElasticsearch, NotFoundError
 from fastapi import Depends
 
+from db.circuit_breaker import CircuitBreaker, get_circuit_breaker
 from db.elastic import get_elastic
-from db.es_repository import ESRepository
+from db.es_repository import ESRepository, observed
 from db.exceptions import MovieNotFoundException
-from models.models import LimitOffset, Movie, SortField
+from db.multi_search import MultiSearch, get_multi_search
+from models.models import Cursor, LimitOffset, Movie, MovieInfo, SortField
 
 
 class MoviesElasticsearchRepository(ESRepository):
@@ -19,6 +21,7 @@ class MoviesElasticsearchRepository(ESRepository):
     def base_model(self) -> Type[Movie]:
         return Movie
 
+    @observed
     async def get_by_id(self, id_: UUID) -> Movie:
         """Получить movie по идентификатору
 
@@ -32,65 +35,137 @@ class MoviesElasticsearchRepository(ESRepository):
             Movie: сущность фильма
         """
         try:
-            movie_form_es = await self._client.get(index="movies", id=id_)
+            movie_form_es = await self._call(self._client.get, index="movies", id=id_)
         except NotFoundError:
             raise MovieNotFoundException(f"Movie with id={id_} not found")
 
         return Movie(**movie_form_es["_source"])
 
-    async def find_all(self, sort: str, limit_offset: LimitOffset) -> list[Movie]:
+    @observed
+    async def get_by_ids(self, ids: list[UUID]) -> list[Movie]:
+        """Получить фильмы по идентификаторам одним запросом mget
+
+        Args:
+            ids: идентификаторы фильмов
+
+        Returns:
+            list[Movie]: найденные фильмы в порядке ids, ненайденные пропускаются
+        """
+        movies_from_es = await self._call(self._client.mget, index=self.index_name, ids=[str(id_) for id_ in ids])
+        return [Movie(**doc["_source"]) for doc in movies_from_es["docs"] if doc.get("found")]
+
+    @observed
+    async def find_all(
+        self,
+        sort: str,
+        limit_offset: LimitOffset,
+        cursor: Cursor | None = None,
+        projection: Type[MovieInfo] | None = None,
+    ) -> list[Movie] | list[MovieInfo]:
         return await self._request(
             query={"match_all": {}},
             sort=SortField(sort),
             limit_offset=limit_offset,
+            cursor=cursor,
+            projection=projection,
         )
 
-    async def find_by_genre_id(self, uuid: UUID, sort: str, limit_offset: LimitOffset) -> list[Movie]:
+    @observed
+    async def find_by_genre_id(
+        self,
+        uuid: UUID,
+        sort: str,
+        limit_offset: LimitOffset,
+        cursor: Cursor | None = None,
+        projection: Type[MovieInfo] | None = None,
+    ) -> list[Movie] | list[MovieInfo]:
         return await self._request(
-            query={"nested": {"path": "genres", "query": {"match": {"genres.id": uuid}}}},
+            query=self._genre_query(uuid),
             sort=SortField(sort),
             limit_offset=limit_offset,
+            cursor=cursor,
+            projection=projection,
         )
 
-    async def search(self, query: str, limit_offset: LimitOffset) -> list[Movie]:
+    def export(
+        self, projection: Type[MovieInfo], batch_size: int, keep_alive: str, genre_uuid: UUID | None = None
+    ) -> AsyncIterator[list[MovieInfo]]:
+        """Выгрузить все фильмы индекса или фильмы жанра пачками в порядке id
+
+        Args:
+            projection: модель с частью полей фильма
+            batch_size: количество фильмов в пачке
+            keep_alive: сколько ES хранит point in time между запросами пачек
+            genre_uuid: идентификатор жанра
+
+        Returns:
+            AsyncIterator[list[MovieInfo]]: пачки фильмов, см. ESRepository._export
+        """
+        query = {"match_all": {}} if genre_uuid is None else self._genre_query(genre_uuid)
+        return self._export(query, projection=projection, batch_size=batch_size, keep_alive=keep_alive)
+
+    @observed
+    async def search(
+        self, query: str, limit_offset: LimitOffset, projection: Type[MovieInfo] | None = None
+    ) -> list[Movie] | list[MovieInfo]:
         return await self._request(
             query={"match": {"title": {"query": query, "fuzziness": "auto"}}},
             limit_offset=limit_offset,
+            projection=projection,
+        )
+
+    @observed
+    async def suggest(self, prefix: str, size: int) -> list[MovieInfo]:
+        """Фильмы, в названии которых каждое слово prefix является началом какого-либо слова
+
+        Args:
+            prefix: введенные пользователем слова, последнее может быть не дописано
+            size: количество фильмов
+
+        Returns:
+            list[MovieInfo]: фильмы по убыванию релевантности
+        """
+        return await self._request(
+            query={"match": {"title.suggest": {"query": prefix, "operator": "and"}}},
+            limit_offset=LimitOffset(page_size=size, page_number=1),
+            projection=MovieInfo,
         )
 
+    @observed
     async def find_by_person_ids(
         self, person_ids: list[UUID], limit_offset=LimitOffset(page_size=1000, page_number=1)
     ) -> list[Movie]:
+        ids = [str(id_) for id_ in person_ids]
         return await self._request(
             query={
                 "bool": {
-                    "should": [
-                        {
-                            "nested": {
-                                "path": "actors",
-                                "query": {"terms": {"actors.id": person_ids}},
-                            }
-                        },
+                    "filter": [
                         {
-                            "nested": {
-                                "path": "writers",
-                                "query": {"terms": {"writers.id": person_ids}},
+                            "bool": {
+                                "should": [
+                                    {"terms": {"actor_ids": ids}},
+                                    {"terms": {"writer_ids": ids}},
+                                    {"terms": {"director_ids": ids}},
+                                ],
+                                "minimum_should_match": 1,
                             }
-                        },
-                        {
-                            "nested": {
-                                "path": "directors",
-                                "query": {"terms": {"directors.id": person_ids}},
-                            }
-                        },
-                    ],
-                    "minimum_should_match": 1,
+                        }
+                    ]
                 }
             },
             limit_offset=limit_offset,
             sort=SortField(sort_field_string="-imdb_rating"),
         )
 
+    @staticmethod
+    def _genre_query(uuid: UUID) -> dict[str, Any]:
+        # Фильтр не влияет на релевантность, поэтому ES кэширует его и не обходит вложенные документы genres
+        return {"bool": {"filter": [{"term": {"genre_ids": str(uuid)}}]}}
+
 
-async def get_movie_repository(elastic: AsyncElasticsearch = Depends(get_elastic)) -> MoviesElasticsearchRepository:
-    return MoviesElasticsearchRepository(client=elastic)
+async def get_movie_repository(
+    elastic: AsyncElasticsearch = Depends(get_elastic),
+    multi_search: MultiSearch | None = Depends(get_multi_search),
+    circuit_breaker: CircuitBreaker | None = Depends(get_circuit_breaker),
+) -> MoviesElasticsearchRepository:
+    return MoviesElasticsearchRepository(client=elastic, multi_search=multi_search, circuit_breaker=circuit_breaker)
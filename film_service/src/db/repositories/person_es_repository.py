@@ -4,10 +4,12 @@ from uuid import UUID
 from elasticsearch import AsyncElasticsearch, NotFoundError
 from fastapi import Depends
 
+from db.circuit_breaker import CircuitBreaker, get_circuit_breaker
 from db.elastic import get_elastic
-from db.es_repository import ESRepository
+from db.es_repository import ESRepository, observed
 from db.exceptions import PersonNotFoundException
-from models.models import LimitOffset, Person, SortField
+from db.multi_search import MultiSearch, get_multi_search
+from models.models import Cursor, LimitOffset, Person, PersonFilmography, SortField
 
 
 class PersonElasticsearchRepository(ESRepository):
@@ -16,30 +18,48 @@ class PersonElasticsearchRepository(ESRepository):
         return "persons"
 
     @property
-    def base_model(self) -> Type[Person]:
-        return Person
+    def base_model(self) -> Type[PersonFilmography]:
+        return PersonFilmography
 
-    async def search(self, query: str, limit_offset: LimitOffset) -> list[Person]:
+    @observed
+    async def search(self, query: str, limit_offset: LimitOffset) -> list[PersonFilmography]:
         return await self._request(
             query={"match": {"name": {"query": query, "fuzziness": "auto"}}},
             limit_offset=limit_offset,
         )
 
-    async def find_all(self, sort: str, limit_offset: LimitOffset) -> list[Person]:
+    @observed
+    async def suggest(self, prefix: str, size: int) -> list[Person]:
+        """Персоны, в имени которых каждое слово prefix является началом какого-либо слова"""
+        return await self._request(
+            query={"match": {"name.suggest": {"query": prefix, "operator": "and"}}},
+            limit_offset=LimitOffset(page_size=size, page_number=1),
+            projection=Person,
+        )
+
+    @observed
+    async def find_all(self, sort: str, limit_offset: LimitOffset, cursor: Cursor | None = None) -> list[Person]:
         return await self._request(
             query={"match_all": {}},
             sort=SortField(sort),
             limit_offset=limit_offset,
+            cursor=cursor,
+            projection=Person,
         )
 
-    async def get_by_id(self, id_: UUID) -> Person:
+    @observed
+    async def get_by_id(self, id_: UUID) -> PersonFilmography:
         try:
-            person_form_es = await self._client.get(index="persons", id=id_)
+            person_form_es = await self._call(self._client.get, index="persons", id=id_)
         except NotFoundError:
             raise PersonNotFoundException(f"Person with id={id_} not found")
 
-        return Person(**person_form_es["_source"])
+        return PersonFilmography(**person_form_es["_source"])
 
 
-async def get_person_repository(elastic: AsyncElasticsearch = Depends(get_elastic)) -> PersonElasticsearchRepository:
-    return PersonElasticsearchRepository(client=elastic)
+async def get_person_repository(
+    elastic: AsyncElasticsearch = Depends(get_elastic),
+    multi_search: MultiSearch | None = Depends(get_multi_search),
+    circuit_breaker: CircuitBreaker | None = Depends(get_circuit_breaker),
+) -> PersonElasticsearchRepository:
+    return PersonElasticsearchRepository(client=elastic, multi_search=multi_search, circuit_breaker=circuit_breaker)
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from contextlib import suppress
+from functools import partial
+from typing import Any, Awaitable, Callable, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import LockError, RedisError
+
+from core import deadline
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Объединение одновременных промахов кэша по одному ключу.
+
+    В пределах воркера loader для ключа выполняет только одна корутина, остальные получают её результат.
+    Если передан клиент Redis, построение дополнительно закрывается распределенной блокировкой,
+    чтобы ключ пересобирал только один воркер.
+    Построение не ограничено бюджетом запроса, который его начал: результат нужен и остальным ожидающим,
+    а каждый из них ждет его не дольше своего бюджета.
+    """
+
+    def __init__(self, redis: Redis | None = None) -> None:
+        self._redis = redis
+        self._calls: dict[str, asyncio.Future] = {}
+
+    @property
+    def distributed(self) -> bool:
+        return self._redis is not None
+
+    async def do(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполнить loader для ключа или дождаться уже запущенного
+
+        Args:
+            key: ключ кэша, который пересобирается
+            loader: корутинная функция, строящая значение
+
+        Returns:
+            Any: результат loader, общий для всех ожидающих
+        """
+        # shield: отмена одного клиента не должна отменять построение для остальных
+        return await asyncio.shield(self._start(key, loader))
+
+    def spawn(self, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        """Запустить построение ключа в фоне, не дожидаясь результата"""
+        if key in self._calls:
+            return
+        self._start(key, loader).add_done_callback(partial(self._log_error, key))
+
+    def _start(self, key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        if (call := self._calls.get(key)) is None:
+            call = asyncio.ensure_future(self._run(key, loader))
+            self._calls[key] = call
+            call.add_done_callback(partial(self._forget, key))
+        return call
+
+    async def _run(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        # Задача работает в копии контекста запроса
+        deadline.clear()
+        if self._redis is None:
+            return await loader()
+
+        lock = self._redis.lock(
+            f"lock:{key}",
+            timeout=settings.redis.lock_timeout,
+            blocking_timeout=settings.redis.lock_blocking_timeout,
+        )
+        try:
+            acquired = await lock.acquire()
+        except RedisError as exc:
+            logger.warning("<Can't acquire lock for %s: %s>", key, exc)
+            acquired = False
+        try:
+            return await loader()
+        finally:
+            if acquired:
+                with suppress(LockError, RedisError):
+                    await lock.release()
+
+    def _forget(self, key: str, call: asyncio.Future) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    @staticmethod
+    def _log_error(key: str, call: asyncio.Future) -> None:
+        if not call.cancelled() and (exc := call.exception()) is not None:
+            logger.warning("<Background rebuild of %s failed: %r>", key, exc)
+
+
+single_flight: Optional[SingleFlight] = None
+
+
+# Функция понадобится при внедрении зависимостей
+async def get_single_flight() -> SingleFlight:
+    return single_flight
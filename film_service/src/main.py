@@ -1,22 +1,57 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+import math
+from contextlib import asynccontextmanager, suppress
+from http import HTTPStatus
 
+import aiohttp
 import sentry_sdk
 import uvicorn
 from elasticsearch import AsyncElasticsearch
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.responses import ORJSONResponse
 from redis.asyncio import Redis
 from sentry_sdk.integrations.starlette import StarletteIntegration
 from sentry_sdk.integrations.fastapi import FastApiIntegration
 
-from api.v1 import films, genres, persons
+from api import cache_warmup, metrics
+from api.admission import AdmissionMiddleware
+from api.deadline import DeadlineMiddleware
+from api.http_cache import StaleResponseMiddleware
+from api.metrics import MetricsMiddleware
+from api.v1 import films, genres, persons, suggest
 from core.config import settings
 from core.logger import LOGGING
-from db import elastic, redis
+from db import (
+    circuit_breaker,
+    elastic,
+    http_client,
+    multi_search,
+    prefetcher,
+    redis,
+    redis_repository,
+    single_flight,
+)
+from db.cache_invalidator import CacheInvalidator
+from db.circuit_breaker import CircuitBreaker
+from db.es_repository import is_es_failure
+from db.exceptions import DeadlineExceededException, ServiceUnavailableException
+from db.multi_search import MultiSearch
+from db.prefetcher import Prefetcher
+from db.redis_repository import LocalCache, RedisRepository
+from db.repositories.genre_es_repository import GenreElasticsearchRepository
+from db.repositories.movie_es_repository import MoviesElasticsearchRepository
+from db.single_flight import SingleFlight
+from services import cache_warmer, genre_catalog
+from services.cache_warmer import CacheWarmer
+from services.genre_catalog import GenreCatalog
+from services.genre_service import GenreService
+from services.movie_service import MovieService
 
 logging.config.dictConfig(LOGGING)
 
+logger = logging.getLogger(__name__)
+
 
 sentry_sdk.init(
     dsn=settings.sentry_dsn,
@@ -32,13 +67,105 @@ sentry_sdk.init(
 )
 
 
+def es_repository_params() -> dict:
+    return dict(
+        client=elastic.es, multi_search=multi_search.multi_search, circuit_breaker=circuit_breaker.circuit_breaker
+    )
+
+
+def create_cache_warmer() -> CacheWarmer:
+    redis_repo = RedisRepository(
+        client=redis.redis,
+        local_cache=redis_repository.local_cache,
+        tag_index=settings.cache.tags_enabled,
+        shadow_ttl=settings.cache.shadow_ttl,
+    )
+    return CacheWarmer(
+        movie_service=MovieService(
+            redis_repository=redis_repo,
+            movie_repository=MoviesElasticsearchRepository(**es_repository_params()),
+            single_flight=single_flight.single_flight,
+            genre_catalog=genre_catalog.genre_catalog,
+        ),
+        genre_service=GenreService(
+            redis_repository=redis_repo,
+            genre_repository=GenreElasticsearchRepository(**es_repository_params()),
+            single_flight=single_flight.single_flight,
+            genre_catalog=genre_catalog.genre_catalog,
+        ),
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     redis.redis = Redis(host=settings.redis.host, port=settings.redis.port)
     elastic.es = AsyncElasticsearch(hosts=[settings.elastic.url])
+    if settings.elastic.breaker_enabled:
+        circuit_breaker.circuit_breaker = CircuitBreaker(
+            name="elasticsearch",
+            timeout=settings.elastic.timeout,
+            failure_threshold=settings.elastic.breaker_failure_threshold,
+            recovery_timeout=settings.elastic.breaker_recovery_timeout,
+            is_failure=is_es_failure,
+        )
+    if settings.elastic.msearch_enabled:
+        multi_search.multi_search = MultiSearch(
+            client=elastic.es,
+            window=settings.elastic.msearch_window,
+            max_batch=settings.elastic.msearch_max_batch,
+        )
+    http_client.session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=settings.auth_pool_size),
+        timeout=aiohttp.ClientTimeout(total=settings.auth_timeout),
+    )
+    single_flight.single_flight = SingleFlight(redis=redis.redis if settings.redis.lock_enabled else None)
+    if settings.cache.prefetch_enabled:
+        prefetcher.prefetcher = Prefetcher(
+            concurrency=settings.cache.prefetch_concurrency, max_pending=settings.cache.prefetch_max_pending
+        )
+    invalidation_listener = None
+    if settings.cache.local_enabled:
+        redis_repository.local_cache = LocalCache(
+            max_entries=settings.cache.local_max_entries,
+            max_bytes=settings.cache.local_max_bytes,
+            ttl=settings.cache.local_ttl,
+        )
+        invalidation_listener = asyncio.create_task(redis_repository.local_cache.listen(redis.redis))
+    catalog_tasks = []
+    if settings.cache.genre_catalog_enabled:
+        genre_catalog.genre_catalog = GenreCatalog(GenreElasticsearchRepository(**es_repository_params()))
+        # Прогрев ниже берет список жанров уже из справочника
+        await genre_catalog.genre_catalog.refresh()
+        catalog_tasks = [
+            asyncio.create_task(genre_catalog.genre_catalog.refresh_periodically()),
+            asyncio.create_task(genre_catalog.genre_catalog.listen(redis.redis)),
+        ]
+    warmup = None
+    if settings.warmup.enabled:
+        cache_warmer.cache_warmer = create_cache_warmer()
+        warmup = asyncio.create_task(cache_warmer.cache_warmer.warm())
+    events_consumer = None
+    if settings.cache.tags_enabled:
+        events_consumer = asyncio.create_task(
+            CacheInvalidator(
+                redis=redis.redis,
+                codec=redis_repository.default_codec,
+                on_change=cache_warmer.cache_warmer.schedule if cache_warmer.cache_warmer else None,
+            ).listen()
+        )
     yield
+    if cache_warmer.cache_warmer:
+        await cache_warmer.cache_warmer.close()
+    if prefetcher.prefetcher:
+        await prefetcher.prefetcher.close()
+    for task in (invalidation_listener, events_consumer, warmup, *catalog_tasks):
+        if task:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
     await redis.redis.close()
     await elastic.es.close()
+    await http_client.session.close()
 
 
 app = FastAPI(
@@ -49,9 +176,42 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+if settings.admission.enabled:
+    # Внутри MetricsMiddleware: отклоненные запросы тоже попадают в метрики
+    app.add_middleware(AdmissionMiddleware)
+if settings.deadline.enabled:
+    # Снаружи AdmissionMiddleware: ожидание в очереди тоже расходует бюджет запроса
+    app.add_middleware(DeadlineMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(StaleResponseMiddleware)
+
+
+@app.exception_handler(ServiceUnavailableException)
+async def service_unavailable_handler(request: Request, exc: ServiceUnavailableException) -> ORJSONResponse:
+    """ES недоступен, а теневой копии ответа нет: клиент узнает об этом сразу, а не по таймауту"""
+    logger.warning("<%s %s failed: %s>", request.method, request.url.path, exc.detail)
+    breaker = circuit_breaker.circuit_breaker
+    retry_after = math.ceil(breaker.retry_after) if breaker else 0
+    return ORJSONResponse(
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+        content={"detail": "Service temporarily unavailable"},
+        headers={"Retry-After": str(max(retry_after, 1))},
+    )
+
+
+@app.exception_handler(DeadlineExceededException)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceededException) -> ORJSONResponse:
+    """Бюджет запроса исчерпан, а роут не отдает частичный ответ или теневой копии нет"""
+    logger.warning("<%s %s failed: %s>", request.method, request.url.path, exc.detail)
+    return ORJSONResponse(status_code=HTTPStatus.GATEWAY_TIMEOUT, content={"detail": "Request deadline exceeded"})
+
+
+app.include_router(metrics.router)
+app.include_router(cache_warmup.router)
 app.include_router(films.router, prefix="/api/v1/films", tags=["films"])
 app.include_router(persons.router, prefix="/api/v1/persons", tags=["persons"])
 app.include_router(genres.router, prefix="/api/v1/genres", tags=["genres"])
+app.include_router(suggest.router, prefix="/api/v1/suggest", tags=["suggest"])
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host=settings.host, port=settings.port)
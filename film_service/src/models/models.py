@@ -1,8 +1,12 @@
+import base64
+import binascii
 from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Optional, Type
 
 import orjson
-from fastapi import Query
-from pydantic import UUID4, BaseModel, Field
+from fastapi import HTTPException, Query, Request
+from pydantic import UUID4, BaseModel, Extra, Field, ValidationError, conlist, constr, create_model
 
 
 def orjson_dumps(v, *, default):
@@ -37,6 +41,20 @@ class Person(Base):
     full_name: str = Field(..., alias="name")
 
 
+class PersonFilm(BaseModel):
+    uuid: UUID4 = Field(..., alias="id")
+    title: str
+    # У фильма в Postgres рейтинга может не быть, ETL пишет его в документ персоны как null
+    imdb_rating: float | None = None
+    roles: list[Role]
+
+
+class PersonFilmography(Person):
+    """Документ индекса persons: фильмы с ролями персоны, по убыванию рейтинга"""
+
+    films: list[PersonFilm] = []
+
+
 class Actor(Person):
     pass
 
@@ -70,12 +88,71 @@ class MovieInfo(Base):
     title: str
     imdb_rating: float
 
+    class Config:
+        # Поля Movie, запрошенные параметром fields, должны остаться в ответе
+        extra = Extra.allow
+
+
+class Suggestions(Base):
+    """Подсказки при наборе: фильмы и персоны, в названии или имени которых есть слова с введенными префиксами"""
+
+    films: list[MovieInfo]
+    persons: list[Person]
+
+
+MOVIE_EXTRA_FIELDS = ("description", "genres", "actors", "writers", "directors")
+
+
+@lru_cache()
+def movie_projection(fields: tuple[str, ...] = ()) -> Type[MovieInfo]:
+    """Модель краткой информации о фильме с дополнительными полями Movie
+
+    Args:
+        fields: имена полей Movie из MOVIE_EXTRA_FIELDS
+
+    Returns:
+        Type[MovieInfo]: MovieInfo, если дополнительных полей нет, иначе его наследник с этими полями
+    """
+    if not fields:
+        return MovieInfo
+    return create_model(
+        f"MovieInfo[{','.join(fields)}]",
+        __base__=MovieInfo,
+        **{name: _field_definition(Movie, name) for name in fields},
+    )
+
+
+def _field_definition(model: Type[BaseModel], name: str) -> tuple[Any, Any]:
+    field = model.__fields__[name]
+    return field.outer_type_, ... if field.required else field.default
+
+
+def get_movie_fields(
+    fields: str | None = Query(
+        default=None,
+        description=f"Дополнительные поля фильма через запятую: {', '.join(MOVIE_EXTRA_FIELDS)}",
+    ),
+) -> tuple[str, ...]:
+    if not fields:
+        return ()
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    if unknown := names - set(MOVIE_EXTRA_FIELDS):
+        raise HTTPException(status_code=422, detail=f"Unknown fields {', '.join(sorted(unknown))}")
+    return tuple(sorted(names))
+
+
+class MovieIds(BaseModel):
+    ids: conlist(UUID4, min_items=1, max_items=100) = Field(..., description="Идентификаторы фильмов")
+
 
 class LimitOffset(BaseModel):
     limit: int = Query(default=50, gt=0, alias="page_size", description="Количество элементов на странице")
     offset: int = Query(default=1, gt=0, alias="page_number", description="Номер страницы")
 
 
+ID_FIELD = "id"
+
+
 class SortField(BaseModel):
     operation: str
     field: str
@@ -86,3 +163,66 @@ class SortField(BaseModel):
             super().__init__(operation=map_[sort_field_string[0]], field=sort_field_string[1:], **data)
         else:
             super().__init__(operation="asc", field=sort_field_string, **data)
+
+    @property
+    def cursor_fields(self) -> list[str]:
+        """Поля сортировки в ES: без уникального id порядок равных значений не определен"""
+        return [self.field] if self.field == ID_FIELD else [self.field, ID_FIELD]
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Cursor(BaseModel):
+    """Курсор страницы для search_after: сортировка, для которой он выдан, и значения ее полей
+    у последнего элемента предыдущей страницы"""
+
+    sort: constr(min_length=1)
+    search_after: conlist(Any, min_items=1)
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(orjson.dumps(self.dict())).rstrip(b"=").decode()
+
+    @classmethod
+    def decode(cls, token: str, sort: str) -> "Cursor":
+        """Курсор из токена для запроса с сортировкой sort
+
+        Raises:
+            ValueError: токен поврежден или выдан для другой сортировки. Такой курсор ES отклонил бы
+                или молча вернул бы не ту страницу
+        """
+        try:
+            cursor = cls.parse_obj(orjson.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))))
+        except (binascii.Error, orjson.JSONDecodeError, ValidationError, ValueError):
+            raise ValueError(f"Invalid cursor {token}")
+        if cursor.sort.lstrip("+") != sort.lstrip("+"):
+            raise ValueError(f"Cursor {token} is issued for sort={cursor.sort}, not {sort}")
+        fields = SortField(cursor.sort).cursor_fields
+        if len(cursor.search_after) != len(fields) or not all(
+            cls._valid_value(field, value) for field, value in zip(fields, cursor.search_after)
+        ):
+            raise ValueError(f"Invalid cursor {token}")
+        return cursor
+
+    @staticmethod
+    def _valid_value(field: str, value: Any) -> bool:
+        if field == ID_FIELD:
+            return isinstance(value, str)
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def get_cursor(default_sort: str) -> Callable[..., Optional[Cursor]]:
+    """Зависимость роута с курсором. default_sort должна совпадать со значением по умолчанию параметра sort роута"""
+
+    def dependency(
+        request: Request,
+        cursor: str | None = Query(default=None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+    ) -> Optional[Cursor]:
+        if cursor is None:
+            return None
+        try:
+            return Cursor.decode(cursor, request.query_params.get("sort", default_sort))
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+
+    return dependency
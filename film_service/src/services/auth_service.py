@@ -1,3 +1,4 @@
+import asyncio
 import http
 import time
 import uuid
@@ -9,8 +10,11 @@ import aiohttp
 from jose import jwt
 from fastapi import HTTPException, Request, status as st
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from redis.exceptions import RedisError
 
 from core.config import settings
+from db import http_client, redis
+from db.redis_repository import LocalCache
 
 logger = logging.getLogger(__name__)
 logger.setLevel(level=os.environ.get("LOG_LEVEL", "DEBUG"))
@@ -25,8 +29,18 @@ def decode_token(token: str) -> Optional[dict]:
 
 
 class JWTBearer(HTTPBearer):
+    """Проверка access-токена: подпись и срок локально, отзыв по denylist в Redis, остальное через /auth/me.
+
+    Успешный ответ auth-сервиса кэшируется в воркере по jti до истечения токена, но не дольше auth_cache_max_ttl.
+    """
+
     def __init__(self, auto_error: bool = True):
         super().__init__(auto_error=auto_error)
+        self._introspection_cache = LocalCache(
+            max_entries=settings.auth_cache_max_entries,
+            max_bytes=settings.auth_cache_max_bytes,
+            ttl=settings.auth_cache_max_ttl,
+        )
 
     async def __call__(self, request: Request) -> dict:
         credentials: HTTPAuthorizationCredentials = await super().__call__(request)
@@ -38,24 +52,53 @@ class JWTBearer(HTTPBearer):
         if not decoded_token:
             raise HTTPException(status_code=http.HTTPStatus.FORBIDDEN, detail='Invalid or expired token.')
 
+        jti = decoded_token.get('jti')
+        cacheable = jti is not None and await self.check_denylist(jti)
+        if cacheable and self._introspection_cache.get(jti) is not None:
+            return decoded_token
+
+        await self.introspect(credentials.credentials)
+        if cacheable:
+            self._introspection_cache.set(
+                jti, decoded_token, len(credentials.credentials), ttl=decoded_token['exp'] - time.time()
+            )
+        return decoded_token
+
+    @staticmethod
+    async def check_denylist(jti: str) -> bool:
+        """Отклонить отозванный токен. False, если denylist auth-сервиса проверить не удалось"""
+        try:
+            revoked = await redis.redis.get(jti)
+        except RedisError as error:
+            logger.warning('<Can\'t check token denylist: %s>', error)
+            return False
+        if revoked:
+            raise HTTPException(status_code=http.HTTPStatus.UNAUTHORIZED, detail='Token has been revoked.')
+        return True
+
+    @staticmethod
+    async def introspect(token: str) -> None:
         try:
             headers = {
-                'Authorization': f'Bearer {credentials.credentials}',
+                'Authorization': f'Bearer {token}',
                 'X-Request-Id': str(uuid.uuid4())
             }
-            async with aiohttp.ClientSession(headers=headers) as session:
-                async with session.get(url=settings.url_auth_me) as status:
-                    response = await status.json()
-                    status_code = status.status
-                    if status_code != st.HTTP_200_OK:
-                        raise HTTPException(
-                            status_code=status_code,
-                            detail=response['detail'],
-                        )
+            async with http_client.session.get(url=settings.url_auth_me, headers=headers) as status:
+                response = await status.json()
+                status_code = status.status
+                if status_code != st.HTTP_200_OK:
+                    raise HTTPException(
+                        status_code=status_code,
+                        detail=response['detail'],
+                    )
         except aiohttp.ServerTimeoutError as error:
-            logger.info(credentials.credentials)
+            logger.info(token)
             raise HTTPException(status_code=st.HTTP_504_GATEWAY_TIMEOUT,
                                 detail=str(error))
+        except asyncio.TimeoutError:
+            # Общий таймаут сессии (ClientTimeout.total) не является ClientError
+            raise HTTPException(status_code=st.HTTP_504_GATEWAY_TIMEOUT,
+                                detail='Auth service timeout.')
         except aiohttp.TooManyRedirects as error:
             raise HTTPException(status_code=st.HTTP_502_BAD_GATEWAY,
                                 detail=str(error))
@@ -63,8 +106,6 @@ class JWTBearer(HTTPBearer):
             raise HTTPException(status_code=st.HTTP_503_SERVICE_UNAVAILABLE,
                                 detail=str(error))
 
-        return decoded_token
-
     @staticmethod
     def parse_token(jwt_token: str) -> Optional[dict]:
         return decode_token(jwt_token)
@@ -0,0 +1,194 @@
+import unicodedata
+from functools import partial
+from typing import Any, Awaitable, Callable, Type
+
+from pydantic import BaseModel
+
+from core import deadline
+from core.config import settings
+from core.degradation import mark_served_stale
+from db.exceptions import DeadlineExceededException, NotFoundException, ServiceUnavailableException
+from db.redis_repository import CachePolicy, RedisRepository
+from db.single_flight import SingleFlight
+from models.models import Cursor, LimitOffset, SortField
+
+MOVIE_CACHE = CachePolicy(soft_ttl=settings.cache.movie_soft_ttl, hard_ttl=settings.cache.movie_hard_ttl)
+MOVIES_CACHE = CachePolicy(soft_ttl=settings.cache.movies_soft_ttl, hard_ttl=settings.cache.movies_hard_ttl)
+SEARCH_CACHE = CachePolicy(soft_ttl=settings.cache.search_soft_ttl, hard_ttl=settings.cache.search_hard_ttl)
+GENRE_CACHE = CachePolicy(soft_ttl=settings.cache.genre_soft_ttl, hard_ttl=settings.cache.genre_hard_ttl)
+PERSON_CACHE = CachePolicy(soft_ttl=settings.cache.person_soft_ttl, hard_ttl=settings.cache.person_hard_ttl)
+SUGGEST_CACHE = CachePolicy(soft_ttl=settings.cache.suggest_soft_ttl, hard_ttl=settings.cache.suggest_hard_ttl)
+
+
+def normalize_query(query: str) -> str:
+    """Поисковый запрос в единой форме для ключа кэша и ES: NFKC, casefold, пробелы по краям убраны,
+    серии пробелов заменены одним. Запросы, которые отличаются только регистром или пробелами, делят ключ"""
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+class BaseService:
+    """Общая логика cache-aside для сервисов.
+
+    Значение берется из Redis, при промахе строится одним запросом в ES на ключ.
+    Устаревшее по soft_ttl значение отдается сразу, а обновляется в фоне (stale-while-revalidate).
+    Если ES недоступен, отдается теневая копия ключа из Redis, а без нее ошибка ServiceUnavailableException.
+    Ненайденная по идентификатору запись запоминается в Redis, и повторные запросы получают ошибку без ES.
+    Построение ждется не дольше бюджета запроса. Если бюджет исчерпан, теневая копия отдается только роутам,
+    которым разрешен частичный ответ, а остальные получают DeadlineExceededException.
+    """
+
+    def __init__(self, redis_repository: RedisRepository, single_flight: SingleFlight | None = None) -> None:
+        self._redis_repo = redis_repository
+        self._single_flight = single_flight or SingleFlight()
+
+    @staticmethod
+    def next_cursor(rows: list[BaseModel], sort: str, limit_offset: LimitOffset) -> Cursor | None:
+        """Курсор страницы, следующей за rows
+
+        Значения берутся из последнего элемента по полям сортировки индекса (алиасы моделей совпадают с ними),
+        поэтому курсор можно получить и для страницы из кэша.
+
+        Args:
+            rows: элементы текущей страницы
+            sort: сортировка, с которой получена страница
+            limit_offset: размер страницы
+
+        Returns:
+            Cursor | None: курсор или None, если страница последняя
+        """
+        if not rows or len(rows) < limit_offset.limit:
+            return None
+        last = rows[-1].dict(by_alias=True)
+        return Cursor(sort=sort, search_after=[last[name] for name in SortField(sort).cursor_fields])
+
+    @staticmethod
+    def _page_key(limit_offset: LimitOffset, cursor: Cursor | None = None) -> str:
+        if cursor is None:
+            return f"{limit_offset.limit}:{limit_offset.offset}"
+        return f"{limit_offset.limit}:after:<{cursor.encode()}>"
+
+    async def _get_object(
+        self,
+        key: str,
+        mapper: Type[BaseModel],
+        loader: Callable[[], Awaitable[BaseModel]],
+        policy: CachePolicy | None = None,
+        not_found: Type[NotFoundException] | None = None,
+        tags: set[str] = frozenset(),
+    ) -> BaseModel:
+        """Объект ключа из кэша или из loader
+
+        Args:
+            key: ключ кэша
+            mapper: модель объекта
+            loader: запрос объекта в ES
+            policy: время жизни ключа
+            not_found: ошибка loader, если записи нет. С ней промах кэшируется, и повторный запрос
+                получает эту ошибку без ES
+            tags: теги записи, по которым ETL удалит отрицательную запись, загрузив запись в ES
+
+        Raises:
+            NotFoundException: записи нет в ES
+            ServiceUnavailableException: ES недоступен, и теневой копии нет
+            DeadlineExceededException: бюджет запроса исчерпан, и частичный ответ не разрешен или копии нет
+        """
+        build = partial(self._load_object, key, mapper, loader, policy, not_found is not None, tags)
+        entry = await self._redis_repo.get_object_entry(key, mapper, policy)
+        if entry.value:
+            if entry.stale:
+                self._single_flight.spawn(key, build)
+            return entry.value
+        if not_found and (detail := await self._redis_repo.get_missing(key)) is not None:
+            raise not_found(detail)
+        try:
+            return await deadline.bounded(self._single_flight.do(key, build), reserve=True)
+        except ServiceUnavailableException as exc:
+            return await self._fallback(partial(self._redis_repo.get_object_shadow, key, mapper), exc)
+
+    async def _get_objects(
+        self,
+        key: str,
+        mapper: Type[BaseModel],
+        loader: Callable[[], Awaitable[list[BaseModel]]],
+        policy: CachePolicy | None = None,
+        tags: set[str] = frozenset(),
+    ) -> list[BaseModel]:
+        """Объекты ключа из кэша или из loader. tags дополняют теги сущностей из ответа loader"""
+        build = partial(self._load_objects, key, mapper, loader, policy, tags)
+        entry = await self._redis_repo.get_objects_entry(key, mapper, policy)
+        if entry.value:
+            if entry.stale:
+                self._single_flight.spawn(key, build)
+            return entry.value
+        try:
+            return await deadline.bounded(self._single_flight.do(key, build), reserve=True)
+        except ServiceUnavailableException as exc:
+            return await self._fallback(partial(self._redis_repo.get_objects_shadow, key, mapper), exc)
+
+    async def _prefetch_objects(
+        self,
+        key: str,
+        mapper: Type[BaseModel],
+        loader: Callable[[], Awaitable[list[BaseModel]]],
+        policy: CachePolicy | None = None,
+    ) -> bool:
+        """Построить ключ заранее, если его нет в кэше. Одновременный запрос ключа пользователем
+        объединяется с построением через single flight
+
+        Returns:
+            bool: ключ построен, False - он уже был в кэше
+        """
+        if await self._redis_repo.exists(key):
+            return False
+        await self._single_flight.do(key, partial(self._load_objects, key, mapper, loader, policy))
+        return True
+
+    @staticmethod
+    async def _fallback(get_shadow: Callable[[], Awaitable[Any]], exc: ServiceUnavailableException) -> Any:
+        """Теневая копия вместо значения из недоступного ES или исходная ошибка, если копии нет
+        или бюджет запроса исчерпан, а частичный ответ не разрешен"""
+        if isinstance(exc, DeadlineExceededException) and not deadline.allows_partial():
+            raise exc
+        if (shadow := await get_shadow()) is None:
+            raise exc
+        mark_served_stale()
+        return shadow
+
+    async def _load_object(
+        self,
+        key: str,
+        mapper: Type[BaseModel],
+        loader: Callable[[], Awaitable[BaseModel]],
+        policy: CachePolicy | None,
+        cache_missing: bool = False,
+        tags: set[str] = frozenset(),
+    ) -> BaseModel:
+        # Пока ждали блокировку, ключ мог пересобрать другой воркер
+        if self._single_flight.distributed:
+            entry = await self._redis_repo.get_object_entry(key, mapper, policy)
+            if entry.value and not entry.stale:
+                return entry.value
+        try:
+            row = await loader()
+        except NotFoundException as exc:
+            if cache_missing:
+                await self._redis_repo.load_missing(key, exc.detail, tags)
+            raise
+        await self._redis_repo.load_object(key, row, policy)
+        return row
+
+    async def _load_objects(
+        self,
+        key: str,
+        mapper: Type[BaseModel],
+        loader: Callable[[], Awaitable[list[BaseModel]]],
+        policy: CachePolicy | None,
+        tags: set[str] = frozenset(),
+    ) -> list[BaseModel]:
+        if self._single_flight.distributed:
+            entry = await self._redis_repo.get_objects_entry(key, mapper, policy)
+            if entry.value and not entry.stale:
+                return entry.value
+        rows = await loader()
+        await self._redis_repo.load_objects(key, rows, policy, tags)
+        return rows
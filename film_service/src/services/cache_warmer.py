@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from functools import partial
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+from core.config import WarmupConfig, settings
+from models.models import Genre, LimitOffset
+from services.genre_service import GenreService
+from services.movie_service import MovieService
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupReport(NamedTuple):
+    keys: int
+    failed: int
+    duration: float
+
+
+class CacheWarmer:
+    """Прогрев кэша частыми запросами: первые страницы фильмов по каждой сортировке,
+    первые страницы фильмов каждого жанра и список жанров.
+
+    Запросы идут через сервисы, поэтому свежие ключи не пересобираются, а одновременные
+    с пользователями построения объединяются single flight. Число запросов в ES ограничено concurrency.
+    """
+
+    def __init__(
+        self,
+        movie_service: MovieService,
+        genre_service: GenreService,
+        config: WarmupConfig = settings.warmup,
+    ) -> None:
+        self._movie_service = movie_service
+        self._genre_service = genre_service
+        self._config = config
+        self._scheduled: asyncio.Task | None = None
+        self._running: asyncio.Task | None = None
+
+    async def warm(self) -> WarmupReport:
+        """Прогреть кэш
+
+        Returns:
+            WarmupReport: количество прогретых и неудавшихся ключей, длительность в секундах
+        """
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self._config.concurrency)
+        run = partial(self._run, semaphore)
+
+        genre_pages = await self._find_genres(run)
+        genres = [genre for rows in genre_pages if rows for genre in rows]
+        queries = [
+            partial(self._movie_service.find_movies, sort=sort, limit_offset=self._page(page))
+            for sort in self._config.movie_sorts
+            for page in range(1, self._config.movie_pages + 1)
+        ]
+        queries.extend(
+            partial(
+                self._movie_service.find_movies_by_genre_uuid,
+                genre_uuid=genre.uuid,
+                sort=sort,
+                limit_offset=self._page(page),
+            )
+            for genre in genres
+            for sort in self._config.movie_sorts
+            for page in range(1, self._config.genre_movie_pages + 1)
+        )
+        results = genre_pages + await asyncio.gather(*(run(query) for query in queries))
+
+        failed = results.count(None)
+        report = WarmupReport(keys=len(results) - failed, failed=failed, duration=time.monotonic() - started)
+        logger.info("<Cache warmup: %s keys in %.2fs, %s failed>", report.keys, report.duration, report.failed)
+        return report
+
+    async def warm_now(self) -> WarmupReport:
+        """Прогреть кэш по запросу оператора. Одновременные вызовы ждут один и тот же прогрев"""
+        if self._running is None or self._running.done():
+            self._running = asyncio.create_task(self.warm())
+        return await asyncio.shield(self._running)
+
+    def schedule(self) -> None:
+        """Запустить прогрев в фоне через debounce секунд, если он еще не запланирован"""
+        if self._scheduled is None or self._scheduled.done():
+            self._scheduled = asyncio.create_task(self._warm_later())
+
+    async def close(self) -> None:
+        for task in (self._scheduled, self._running):
+            if task:
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+
+    async def _find_genres(self, run: Callable[[Callable[[], Awaitable]], Awaitable]) -> list[list[Genre] | None]:
+        """Страницы списка жанров до первой неполной, None - страница не получена"""
+        pages = []
+        while True:
+            rows = await run(
+                partial(
+                    self._genre_service.find_genres,
+                    sort=self._config.genre_sort,
+                    limit_offset=self._page(len(pages) + 1),
+                )
+            )
+            pages.append(rows)
+            if rows is None or len(rows) < self._config.page_size:
+                return pages
+
+    async def _warm_later(self) -> None:
+        await asyncio.sleep(self._config.debounce)
+        await self.warm()
+
+    def _page(self, page_number: int) -> LimitOffset:
+        return LimitOffset(page_size=self._config.page_size, page_number=page_number)
+
+    @staticmethod
+    async def _run(semaphore: asyncio.Semaphore, query: Callable[[], Awaitable]):
+        async with semaphore:
+            try:
+                return await query()
+            except Exception as exc:
+                logger.warning("<Cache warmup query failed: %r>", exc)
+                return None
+
+
+cache_warmer: Optional[CacheWarmer] = None
+
+
+# Функция понадобится при внедрении зависимостей
+async def get_cache_warmer() -> Optional[CacheWarmer]:
+    return cache_warmer
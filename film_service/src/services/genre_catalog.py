@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from types import MappingProxyType
+from typing import Mapping, Optional
+from uuid import UUID
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from core.config import settings
+from db.repositories.genre_es_repository import GenreElasticsearchRepository
+from models.models import Genre, LimitOffset, SortField
+
+logger = logging.getLogger(__name__)
+
+SORT_FIELDS = ("name", "id")
+
+
+class GenreSnapshot:
+    """Неизменяемый снимок справочника жанров: словарь по идентификатору и списки во всех сортировках"""
+
+    def __init__(self, genres: list[Genre]) -> None:
+        self.by_id: Mapping[UUID, Genre] = MappingProxyType({genre.uuid: genre for genre in genres})
+        self._orders: Mapping[tuple[str, str], tuple[Genre, ...]] = MappingProxyType(
+            {
+                (field, operation): self._sorted(genres, field, operation == "desc")
+                for field in SORT_FIELDS
+                for operation in ("asc", "desc")
+            }
+        )
+
+    def page(self, sort: str, limit_offset: LimitOffset) -> list[Genre]:
+        sort_field = SortField(sort)
+        rows = self._orders[sort_field.field, sort_field.operation]
+        start = (limit_offset.offset - 1) * limit_offset.limit
+        return list(rows[start : start + limit_offset.limit])  # noqa: E203
+
+    @staticmethod
+    def _sorted(genres: list[Genre], field: str, desc: bool) -> tuple[Genre, ...]:
+        # Порядок как у ES: при равных значениях поля жанры идут по возрастанию id (см. ESRepository._sort)
+        rows = sorted(genres, key=lambda genre: str(genre.uuid), reverse=desc and field == "id")
+        if field != "id":
+            rows.sort(key=lambda genre: getattr(genre, field), reverse=desc)
+        return tuple(rows)
+
+
+class GenreCatalog:
+    """Справочник жанров в памяти воркера.
+
+    Жанров несколько десятков, поэтому воркер держит их все и отвечает на чтения жанров без Redis и ES.
+    Снимок заменяется целиком: раз в refresh_interval секунд и по событиям ETL об изменении жанров.
+    Пока снимок не загружен, ready ложно и сервисы читают жанры через кэш.
+    """
+
+    def __init__(
+        self,
+        genre_repository: GenreElasticsearchRepository,
+        refresh_interval: float = settings.cache.genre_catalog_refresh,
+        page_size: int = 1000,
+    ) -> None:
+        self._genre_repository = genre_repository
+        self._refresh_interval = refresh_interval
+        self._page_size = page_size
+        self._snapshot: GenreSnapshot | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def snapshot(self) -> GenreSnapshot:
+        """Текущий снимок. Ссылку стоит взять один раз на запрос, чтобы не попасть на замену снимка"""
+        if self._snapshot is None:
+            raise RuntimeError("Genre catalog is not loaded")
+        return self._snapshot
+
+    async def refresh(self) -> bool:
+        """Загрузить все жанры из ES и заменить снимок
+
+        Returns:
+            bool: снимок обновлен. При ошибке остается прежний снимок
+        """
+        try:
+            genres = await self._load()
+        except Exception as exc:
+            logger.warning("<Genre catalog refresh failed: %r>", exc)
+            return False
+        self._snapshot = GenreSnapshot(genres)
+        logger.info("<Genre catalog loaded: %s genres>", len(genres))
+        return True
+
+    async def refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+            await self.refresh()
+
+    async def listen(self, redis: Redis) -> None:
+        """Обновлять снимок по событиям ETL об изменении жанров.
+
+        Stream читается без consumer group: справочник есть в каждом воркере, и событие должен получить каждый.
+        """
+        last_id = "$"
+        while True:
+            try:
+                response = await redis.xread({settings.cache.events_stream: last_id}, count=100, block=5000)
+            except (RedisError, OSError) as exc:
+                logger.warning("<Genre catalog events reader failed: %s>", exc)
+                await asyncio.sleep(1)
+                continue
+            changed = False
+            for _, messages in response or []:
+                for message_id, fields in messages:
+                    last_id = message_id
+                    changed |= fields.get(b"index") == b"genres"
+            if changed:
+                await self.refresh()
+
+    async def _load(self) -> list[Genre]:
+        genres: list[Genre] = []
+        page_number = 1
+        while True:
+            page = await self._genre_repository.find_all(
+                sort="id", limit_offset=LimitOffset(page_size=self._page_size, page_number=page_number)
+            )
+            genres.extend(page)
+            if len(page) < self._page_size:
+                return genres
+            page_number += 1
+
+
+genre_catalog: Optional[GenreCatalog] = None
+
+
+# Функция понадобится при внедрении зависимостей
+async def get_genre_catalog() -> Optional[GenreCatalog]:
+    return genre_catalog
@@ -1,46 +1,71 @@
 import logging
-from functools import lru_cache
+from functools import lru_cache, partial
 from uuid import UUID
 
 from fastapi import Depends
 
+from db.exceptions import GenreNotFoundException
 from db.redis_repository import RedisRepository, get_redis_repo
 from db.repositories.genre_es_repository import GenreElasticsearchRepository, get_genre_repository
+from db.single_flight import SingleFlight, get_single_flight
 from models.models import Genre, LimitOffset
+from services.base_service import GENRE_CACHE, BaseService
+from services.genre_catalog import GenreCatalog, get_genre_catalog
 
 logger = logging.getLogger(__name__)
 
 
-class GenreService:
+class GenreService(BaseService):
+    """Жанры из справочника в памяти, а пока он не загружен - через кэш"""
+
     def __init__(
         self,
         redis_repository: RedisRepository,
         genre_repository: GenreElasticsearchRepository,
+        single_flight: SingleFlight | None = None,
+        genre_catalog: GenreCatalog | None = None,
     ) -> None:
+        super().__init__(redis_repository=redis_repository, single_flight=single_flight)
         self._genre_repository = genre_repository
-        self._redis_repo = redis_repository
+        self._genre_catalog = genre_catalog
 
     async def get_genre_by_id(self, id_: UUID) -> Genre:
+        if self._genre_catalog and self._genre_catalog.ready:
+            if (genre := self._genre_catalog.snapshot.by_id.get(id_)) is None:
+                raise GenreNotFoundException(f"Genre with id={id_} not found")
+            return genre
         redis_key = f"genre::{id_}"
-        if genre_from_cache := await self._redis_repo.get_object(redis_key, Genre):
-            return genre_from_cache
-        genre = await self._genre_repository.get_by_id(id_=id_)
-        await self._redis_repo.load_object(redis_key, genre)
-
-        return genre
+        return await self._get_object(
+            redis_key,
+            Genre,
+            partial(self._genre_repository.get_by_id, id_=id_),
+            GENRE_CACHE,
+            not_found=GenreNotFoundException,
+            tags={f"genre:{id_}"},
+        )
 
     async def find_genres(self, sort: str, limit_offset: LimitOffset) -> list[Genre]:
+        if self._genre_catalog and self._genre_catalog.ready:
+            return self._genre_catalog.snapshot.page(sort, limit_offset)
         redis_key = f"genre:{sort}:{limit_offset.limit}:{limit_offset.offset}"
-        if genres_from_cache := await self._redis_repo.get_objects(redis_key, Genre):
-            return genres_from_cache
-        genres = await self._genre_repository.find_all(sort=sort, limit_offset=limit_offset)
-        await self._redis_repo.load_objects(redis_key, genres)
-        return genres
+        return await self._get_objects(
+            redis_key,
+            Genre,
+            partial(self._genre_repository.find_all, sort=sort, limit_offset=limit_offset),
+            GENRE_CACHE,
+        )
 
 
 @lru_cache()
 def get_genre_service(
     redis: RedisRepository = Depends(get_redis_repo),
     genre_repository: GenreElasticsearchRepository = Depends(get_genre_repository),
+    single_flight: SingleFlight = Depends(get_single_flight),
+    genre_catalog: GenreCatalog | None = Depends(get_genre_catalog),
 ) -> GenreService:
-    return GenreService(redis_repository=redis, genre_repository=genre_repository)
+    return GenreService(
+        redis_repository=redis,
+        genre_repository=genre_repository,
+        single_flight=single_flight,
+        genre_catalog=genre_catalog,
+    )
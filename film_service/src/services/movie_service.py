@@ -1,24 +1,37 @@
 import logging
-from functools import lru_cache
+from contextlib import aclosing
+from functools import lru_cache, partial
+from typing import AsyncIterator, Awaitable, Callable, Type
 from uuid import UUID
 
 from fastapi import Depends
 
+from core.config import settings
+from db.exceptions import MovieNotFoundException, ServiceUnavailableException
+from db.prefetcher import Prefetcher, get_prefetcher
 from db.redis_repository import RedisRepository, get_redis_repo
 from db.repositories.movie_es_repository import MoviesElasticsearchRepository, get_movie_repository
-from models.models import LimitOffset, Movie, MovieInfo
+from db.single_flight import SingleFlight, get_single_flight
+from models.models import Cursor, LimitOffset, Movie, MovieInfo, movie_projection
+from services.base_service import MOVIE_CACHE, MOVIES_CACHE, SEARCH_CACHE, BaseService, normalize_query
+from services.genre_catalog import GenreCatalog, get_genre_catalog
 
 logger = logging.getLogger(__name__)
 
 
-class MovieService:
+class MovieService(BaseService):
     def __init__(
         self,
         redis_repository: RedisRepository,
         movie_repository: MoviesElasticsearchRepository,
+        single_flight: SingleFlight | None = None,
+        genre_catalog: GenreCatalog | None = None,
+        prefetcher: Prefetcher | None = None,
     ) -> None:
+        super().__init__(redis_repository=redis_repository, single_flight=single_flight)
         self._movie_repository = movie_repository
-        self._redis_repo = redis_repository
+        self._genre_catalog = genre_catalog
+        self._prefetcher = prefetcher
 
     async def get_movie_by_id(self, id_: UUID) -> Movie:
         """Получить фильм по идентификатору
@@ -26,17 +39,65 @@ class MovieService:
         Args:
             id_: идентификатор фильма
 
+        Raises:
+            MovieNotFoundException: фильм не найден, в том числе по недавнему промаху из кэша
+
         Returns:
             Movie: сущность фильма
         """
         redis_key = f"movie::{id_}"
-        if movie_from_cache := await self._redis_repo.get_object(redis_key, Movie):
-            return movie_from_cache
-        movie = await self._movie_repository.get_by_id(id_=id_)
-        await self._redis_repo.load_object(redis_key, movie)
-        return movie
+        return await self._get_object(
+            redis_key,
+            Movie,
+            partial(self._movie_repository.get_by_id, id_=id_),
+            MOVIE_CACHE,
+            not_found=MovieNotFoundException,
+            tags={f"movie:{id_}"},
+        )
+
+    async def get_movies_by_ids(self, ids: list[UUID]) -> list[Movie]:
+        """Получить фильмы по списку идентификаторов
+
+        Кэш читается одним MGET по ключам movie::{id}, промахи запрашиваются из ES одним mget
+        и записываются в кэш одним pipeline. Если ES недоступен или не ответил за бюджет запроса,
+        промахи берутся из теневых копий.
+
+        Args:
+            ids: идентификаторы фильмов
 
-    async def find_movies(self, sort: str, limit_offset: LimitOffset) -> list[MovieInfo]:
+        Returns:
+            list[Movie]: найденные фильмы в порядке запроса, без повторов
+        """
+        ids = list(dict.fromkeys(ids))
+        redis_keys = [f"movie::{id_}" for id_ in ids]
+        cached = await self._redis_repo.get_objects_by_keys(redis_keys, Movie, MOVIE_CACHE)
+        movies: dict[UUID, Movie] = {id_: movie for id_, movie in zip(ids, cached) if movie is not None}
+
+        if missed := [id_ for id_ in ids if id_ not in movies]:
+            try:
+                loaded = await self._movie_repository.get_by_ids(missed)
+            except ServiceUnavailableException as exc:
+
+                async def get_shadows() -> list[Movie] | None:
+                    shadows = await self._redis_repo.get_shadows_by_keys([f"movie::{id_}" for id_ in missed], Movie)
+                    return [movie for movie in shadows if movie is not None] or None
+
+                loaded = await self._fallback(get_shadows, exc)
+            else:
+                await self._redis_repo.load_objects_by_keys(
+                    {f"movie::{movie.uuid}": movie for movie in loaded}, MOVIE_CACHE
+                )
+            movies.update((movie.uuid, movie) for movie in loaded)
+
+        return [movies[id_] for id_ in ids if id_ in movies]
+
+    async def find_movies(
+        self,
+        sort: str,
+        limit_offset: LimitOffset,
+        cursor: Cursor | None = None,
+        fields: tuple[str, ...] = (),
+    ) -> list[MovieInfo]:
         """Получить фильмы
 
         Args:
@@ -44,52 +105,129 @@ class MovieService:
                 Пример: -imdb_rating (desc imdb_rating). Или ничего.
             limit: какое количество записей необходимо выбрать
             offset: какая "страница"
+            cursor: курсор search_after, заменяет номер страницы
+            fields: дополнительные поля Movie, кроме полей MovieInfo
 
         Returns:
-            list[Movie]: список сущностей Movie
+            list[MovieInfo]: список кратких сущностей фильма
         """
-        redis_key = f"movies:{sort}:{limit_offset.limit}:{limit_offset.offset}"
-        if movies_from_cache := await self._redis_repo.get_objects(redis_key, MovieInfo):
-            return movies_from_cache
-        movies = await self._movie_repository.find_all(sort=sort, limit_offset=limit_offset)
-        movies_info = self._get_film_info(movies)
-        await self._redis_repo.load_objects(redis_key, movies_info)
-        return movies_info
+        return await self._get_objects(*self._movies_page(sort, limit_offset, cursor, fields), MOVIES_CACHE)
 
     async def find_movies_by_genre_uuid(
-        self, genre_uuid: UUID, sort: str, limit_offset: LimitOffset
+        self,
+        genre_uuid: UUID,
+        sort: str,
+        limit_offset: LimitOffset,
+        cursor: Cursor | None = None,
+        fields: tuple[str, ...] = (),
     ) -> list[MovieInfo]:
-        redis_key = f"movies:genre_id:<{genre_uuid}>:{sort}:{limit_offset.limit}:{limit_offset.offset}"
-        if movies_from_cache := await self._redis_repo.get_objects(redis_key, MovieInfo):
-            return movies_from_cache
-        movies = await self._movie_repository.find_by_genre_id(uuid=genre_uuid, sort=sort, limit_offset=limit_offset)
-        movies_info = self._get_film_info(movies)
-        await self._redis_repo.load_objects(redis_key, movies_info)
-        return movies_info
-
-    async def search_movies(self, query: str, limit_offset: LimitOffset) -> list[Movie]:
+        # У неизвестного справочнику жанра фильмов нет: ни кэш, ни ES не запрашиваются
+        if self._genre_catalog and self._genre_catalog.ready and genre_uuid not in self._genre_catalog.snapshot.by_id:
+            return []
+        return await self._get_objects(
+            *self._movies_page(sort, limit_offset, cursor, fields, genre_uuid=genre_uuid), MOVIES_CACHE
+        )
+
+    def prefetch_next_page(
+        self,
+        rows: list[MovieInfo],
+        sort: str,
+        limit_offset: LimitOffset,
+        cursor: Cursor | None = None,
+        fields: tuple[str, ...] = (),
+        genre_uuid: UUID | None = None,
+    ) -> None:
+        """Построить в фоне страницу, следующую за rows: при листании списка ее почти всегда запрашивают следом
+
+        Страница строится, только если предвыборка включена, rows - не последняя страница и следующей нет в кэше.
+        Следующая страница запрашивается тем же способом, что и текущая: по номеру или по курсору.
+
+        Args:
+            rows: фильмы текущей страницы
+            sort, limit_offset, cursor, fields, genre_uuid: параметры, с которыми получена текущая страница
+        """
+        if self._prefetcher is None or len(rows) < limit_offset.limit:
+            return
+        if cursor is not None:
+            next_cursor, next_page = self.next_cursor(rows, sort, limit_offset), limit_offset
+        else:
+            next_cursor = None
+            next_page = LimitOffset(page_size=limit_offset.limit, page_number=limit_offset.offset + 1)
+        key, projection, loader = self._movies_page(sort, next_page, next_cursor, fields, genre_uuid=genre_uuid)
+        self._prefetcher.submit(key, partial(self._prefetch_objects, key, projection, loader, MOVIES_CACHE))
+
+    async def search_movies(self, query: str, limit_offset: LimitOffset) -> list[MovieInfo]:
+        query = normalize_query(query)
         redis_key = f"movies:search_by:<{query}>:{limit_offset.limit}:{limit_offset.offset}"
-        if movies_from_cache := await self._redis_repo.get_objects(redis_key, Movie):
-            return movies_from_cache
-        movies = await self._movie_repository.search(query=query, limit_offset=limit_offset)
-        await self._redis_repo.load_objects(redis_key, movies)
-        return movies
+        return await self._get_objects(
+            redis_key,
+            MovieInfo,
+            partial(self._movie_repository.search, query=query, limit_offset=limit_offset, projection=MovieInfo),
+            SEARCH_CACHE,
+        )
+
+    async def export_movies(
+        self, genre_uuid: UUID | None = None, fields: tuple[str, ...] = ()
+    ) -> AsyncIterator[list[MovieInfo]]:
+        """Выгрузить весь каталог или фильмы жанра пачками в порядке id, минуя кэш
+
+        Args:
+            genre_uuid: идентификатор жанра
+            fields: дополнительные поля Movie, как в find_movies
+
+        Yields:
+            list[MovieInfo]: пачки по settings.elastic.export_batch_size фильмов
+        """
+        if genre_uuid and self._genre_catalog and self._genre_catalog.ready:
+            if genre_uuid not in self._genre_catalog.snapshot.by_id:
+                return
+        batches = self._movie_repository.export(
+            projection=movie_projection(fields),
+            batch_size=settings.elastic.export_batch_size,
+            keep_alive=settings.elastic.export_keep_alive,
+            genre_uuid=genre_uuid,
+        )
+        async with aclosing(batches):
+            async for batch in batches:
+                yield batch
+
+    def _movies_page(
+        self,
+        sort: str,
+        limit_offset: LimitOffset,
+        cursor: Cursor | None,
+        fields: tuple[str, ...],
+        genre_uuid: UUID | None = None,
+    ) -> tuple[str, Type[MovieInfo], Callable[[], Awaitable[list[MovieInfo]]]]:
+        """Ключ кэша, модель и запрос в ES страницы списка фильмов или фильмов жанра"""
+        page = f"{sort}:{self._page_key(limit_offset, cursor)}{self._fields_key(fields)}"
+        projection = movie_projection(fields)
+        params = {"sort": sort, "limit_offset": limit_offset, "cursor": cursor, "projection": projection}
+        if genre_uuid is None:
+            return f"movies:{page}", projection, partial(self._movie_repository.find_all, **params)
+        return (
+            f"movies:genre_id:<{genre_uuid}>:{page}",
+            projection,
+            partial(self._movie_repository.find_by_genre_id, uuid=genre_uuid, **params),
+        )
 
     @staticmethod
-    def _get_film_info(movies: list[Movie]) -> list[MovieInfo]:
-        return [
-            MovieInfo(
-                id=movie.uuid,
-                title=movie.title,
-                imdb_rating=movie.imdb_rating,
-            )
-            for movie in movies
-        ]
+    def _fields_key(fields: tuple[str, ...]) -> str:
+        return f":fields:<{','.join(fields)}>" if fields else ""
 
 
 @lru_cache()
 def get_movie_service(
     redis: RedisRepository = Depends(get_redis_repo),
     movie_repository: MoviesElasticsearchRepository = Depends(get_movie_repository),
+    single_flight: SingleFlight = Depends(get_single_flight),
+    genre_catalog: GenreCatalog | None = Depends(get_genre_catalog),
+    prefetcher: Prefetcher | None = Depends(get_prefetcher),
 ) -> MovieService:
-    return MovieService(redis_repository=redis, movie_repository=movie_repository)
+    return MovieService(
+        redis_repository=redis,
+        movie_repository=movie_repository,
+        single_flight=single_flight,
+        genre_catalog=genre_catalog,
+        prefetcher=prefetcher,
+    )
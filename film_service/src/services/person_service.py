@@ -1,91 +1,82 @@
 import logging
-from collections import defaultdict
-from functools import lru_cache
+from functools import lru_cache, partial
 from uuid import UUID
 
 from fastapi import Depends
 
 from db.es_repository import ESRepository
+from db.exceptions import PersonNotFoundException
 from db.redis_repository import RedisRepository, get_redis_repo
 from db.repositories.movie_es_repository import MoviesElasticsearchRepository, get_movie_repository
 from db.repositories.person_es_repository import PersonElasticsearchRepository, get_person_repository
-from models.models import LimitOffset, Movie, MovieInfo, Person, PersonInfo, Role
+from db.single_flight import SingleFlight, get_single_flight
+from models.models import Cursor, LimitOffset, Movie, MovieInfo, Person, PersonFilmography, PersonInfo
+from services.base_service import MOVIES_CACHE, PERSON_CACHE, SEARCH_CACHE, BaseService, normalize_query
 
 logger = logging.getLogger(__name__)
 
 
-class PersonService:
+class PersonService(BaseService):
+    """Персоны и их фильмы. Персона с ролями в фильмах берется из одного документа индекса persons,
+    а страница фильмов персоны запрашивается из индекса movies"""
+
     def __init__(
         self,
         redis_repository: RedisRepository,
         person_repository: PersonElasticsearchRepository,
         movie_repository: MoviesElasticsearchRepository,
+        single_flight: SingleFlight | None = None,
     ) -> None:
+        super().__init__(redis_repository=redis_repository, single_flight=single_flight)
         self._movie_repository = movie_repository
         self._person_repository = person_repository
-        self._redis_repo = redis_repository
 
     async def search_persons(self, query: str, limit_offset: LimitOffset) -> list[PersonInfo]:
+        query = normalize_query(query)
         redis_key = f"person:search_by:<{query}>:{limit_offset.limit}:{limit_offset.offset}"
-        if persons_from_cache := await self._redis_repo.get_objects(redis_key, PersonInfo):
-            return persons_from_cache
-        persons: list[Person] = await self._person_repository.search(query=query, limit_offset=limit_offset)
-        movies: list[Movie] = await self._movie_repository.find_by_person_ids([person.id for person in persons])
-        person_films = self._get_person_films(movies)
-        persons_info = self._get_persons_info(person_films, persons)
-        await self._redis_repo.load_objects(redis_key, persons_info)
-        return persons_info
+
+        async def load_persons() -> list[PersonInfo]:
+            persons = await self._person_repository.search(query=query, limit_offset=limit_offset)
+            return [self._get_person_info(person) for person in persons]
+
+        return await self._get_objects(redis_key, PersonInfo, load_persons, SEARCH_CACHE)
 
     async def find_movies_by_person_uuid(self, person_uuid: UUID, limit_offset: LimitOffset) -> list[MovieInfo]:
         redis_key = f"person:<{person_uuid}>:movies:{limit_offset.limit}:{limit_offset.offset}"
-        if movies_from_cache := await self._redis_repo.get_objects(redis_key, MovieInfo):
-            return movies_from_cache
-        movies = await self._movie_repository.find_by_person_ids([person_uuid], limit_offset)
-        movies_info = self._get_film_info(movies)
-        await self._redis_repo.load_objects(redis_key, movies_info)
-        return movies
+
+        async def load_movies() -> list[MovieInfo]:
+            movies = await self._movie_repository.find_by_person_ids([person_uuid], limit_offset)
+            return self._get_film_info(movies)
+
+        # Нового фильма персоны нет в тегах страницы: ее удаляет событие об изменении самой персоны
+        return await self._get_objects(redis_key, MovieInfo, load_movies, MOVIES_CACHE, tags={f"person:{person_uuid}"})
 
     async def get_person_by_id(self, id_: UUID) -> PersonInfo:
         redis_key = f"person:::{id_}"
-        if person_from_cache := await self._redis_repo.get_object(redis_key, PersonInfo):
-            return person_from_cache
-        person: Person = await self._person_repository.get_by_id(id_=id_)
-        movies: list[Movie] = await self._movie_repository.find_by_person_ids([person.id])
-        person_films = self._get_person_films(movies)
-        person_info = self._get_persons_info(person_films, [person])[0]
-        await self._redis_repo.load_object(redis_key, person_info)
-        return person_info
-
-    async def find_persons(self, sort: str, limit_offset: LimitOffset) -> list[Person]:
-        redis_key = f"persons:{sort}:{limit_offset.limit}:{limit_offset.offset}"
-        if persons_from_cache := await self._redis_repo.get_objects(redis_key, Person):
-            return persons_from_cache
-        persons: list[Person] = await self._person_repository.find_all(sort=sort, limit_offset=limit_offset)
-        await self._redis_repo.load_objects(redis_key, persons)
-        return persons
 
-    @staticmethod
-    def _get_persons_info(person_films: defaultdict, persons: list[Person]) -> list[PersonInfo]:
-        return [
-            PersonInfo(
-                uuid=person.id,
-                full_name=person.full_name,
-                films=[{"uuid": key, "roles": value} for key, value in person_films[person.id]["films"].items()],
-            )
-            for person in persons
-        ]
+        async def load_person() -> PersonInfo:
+            return self._get_person_info(await self._person_repository.get_by_id(id_=id_))
+
+        return await self._get_object(
+            redis_key, PersonInfo, load_person, PERSON_CACHE, not_found=PersonNotFoundException, tags={f"person:{id_}"}
+        )
+
+    async def find_persons(self, sort: str, limit_offset: LimitOffset, cursor: Cursor | None = None) -> list[Person]:
+        redis_key = f"persons:{sort}:{self._page_key(limit_offset, cursor)}"
+        return await self._get_objects(
+            redis_key,
+            Person,
+            partial(self._person_repository.find_all, sort=sort, limit_offset=limit_offset, cursor=cursor),
+            PERSON_CACHE,
+        )
 
     @staticmethod
-    def _get_person_films(movies: list[Movie]):
-        person_films = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
-        for movie in movies:
-            for actor in movie.actors:
-                person_films[actor.id]["films"][movie.uuid].append(Role.ACTOR)
-            for writer in movie.writers:
-                person_films[writer.id]["films"][movie.uuid].append(Role.WRITER)
-            for director in movie.directors:
-                person_films[director.id]["films"][movie.uuid].append(Role.DIRECTOR)
-        return person_films
+    def _get_person_info(person: PersonFilmography) -> PersonInfo:
+        return PersonInfo(
+            uuid=person.id,
+            full_name=person.full_name,
+            films=[{"uuid": film.uuid, "roles": film.roles} for film in person.films],
+        )
 
     @staticmethod
     def _get_film_info(movies: list[Movie]) -> list[MovieInfo]:
@@ -104,5 +95,11 @@ def get_person_service(
     redis: RedisRepository = Depends(get_redis_repo),
     person_repository: ESRepository = Depends(get_person_repository),
     movie_repository: ESRepository = Depends(get_movie_repository),
+    single_flight: SingleFlight = Depends(get_single_flight),
 ) -> PersonService:
-    return PersonService(redis_repository=redis, person_repository=person_repository, movie_repository=movie_repository)
+    return PersonService(
+        redis_repository=redis,
+        person_repository=person_repository,
+        movie_repository=movie_repository,
+        single_flight=single_flight,
+    )
@@ -0,0 +1,78 @@
+import asyncio
+from functools import lru_cache
+
+from fastapi import Depends
+
+from db.redis_repository import RedisRepository, get_redis_repo
+from db.repositories.movie_es_repository import MoviesElasticsearchRepository, get_movie_repository
+from db.repositories.person_es_repository import PersonElasticsearchRepository, get_person_repository
+from db.single_flight import SingleFlight, get_single_flight
+from models.models import Suggestions
+from services.base_service import SUGGEST_CACHE, BaseService
+
+# max_gram фильтра autocomplete_edge_ngram в индексах: более длинные слова ES обрезает при поиске
+SUGGEST_MAX_GRAM = 20
+
+
+def normalize_prefix(prefix: str) -> str:
+    """Префикс в том виде, в котором его ищет анализатор autocomplete_search.
+
+    Регистр, лишние пробелы и хвосты длинных слов не меняют результат, поэтому не создают новых ключей кэша.
+    lower, а не casefold: ES приводит регистр так же и, например, не заменяет ß на ss.
+    """
+    return " ".join(word[:SUGGEST_MAX_GRAM] for word in prefix.lower().split())
+
+
+class SuggestService(BaseService):
+    """Подсказки при наборе по подполям suggest названий фильмов и имен персон"""
+
+    def __init__(
+        self,
+        redis_repository: RedisRepository,
+        movie_repository: MoviesElasticsearchRepository,
+        person_repository: PersonElasticsearchRepository,
+        single_flight: SingleFlight | None = None,
+    ) -> None:
+        super().__init__(redis_repository=redis_repository, single_flight=single_flight)
+        self._movie_repository = movie_repository
+        self._person_repository = person_repository
+
+    async def suggest(self, prefix: str, size: int) -> Suggestions:
+        """Фильмы и персоны по началу слов
+
+        Args:
+            prefix: введенная пользователем строка
+            size: количество подсказок каждого вида
+
+        Returns:
+            Suggestions: подсказки, пустые, если в prefix нет слов
+        """
+        prefix = normalize_prefix(prefix)
+        if not prefix:
+            return Suggestions(films=[], persons=[])
+        redis_key = f"suggest:<{prefix}>:{size}"
+
+        async def load_suggestions() -> Suggestions:
+            # С включенным _msearch оба запроса уходят в ES одним
+            films, persons = await asyncio.gather(
+                self._movie_repository.suggest(prefix=prefix, size=size),
+                self._person_repository.suggest(prefix=prefix, size=size),
+            )
+            return Suggestions(films=films, persons=persons)
+
+        return await self._get_object(redis_key, Suggestions, load_suggestions, SUGGEST_CACHE)
+
+
+@lru_cache()
+def get_suggest_service(
+    redis: RedisRepository = Depends(get_redis_repo),
+    movie_repository: MoviesElasticsearchRepository = Depends(get_movie_repository),
+    person_repository: PersonElasticsearchRepository = Depends(get_person_repository),
+    single_flight: SingleFlight = Depends(get_single_flight),
+) -> SuggestService:
+    return SuggestService(
+        redis_repository=redis,
+        movie_repository=movie_repository,
+        person_repository=person_repository,
+        single_flight=single_flight,
+    )
@@ -0,0 +1,107 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+
+from api.admission import AdmissionController, AdmissionMiddleware, RouteClass
+from core.config import settings
+
+DETAIL = RouteClass("test_detail", 0, concurrency=10, queue=10)
+SEARCH = RouteClass("test_search", 2, concurrency=1, queue=1)
+
+
+@pytest.mark.asyncio
+class TestAdmissionController:
+    async def test_full_queue_is_shed(self) -> None:
+        controller = AdmissionController(max_concurrency=10, queue_timeout=1)
+        assert await controller.acquire(SEARCH)
+        waiting = asyncio.create_task(controller.acquire(SEARCH))
+        await asyncio.sleep(0)
+
+        assert not await controller.acquire(SEARCH)
+        assert REGISTRY.get_sample_value("film_service_admission_queue_depth", {"route_class": "test_search"}) == 1
+        assert REGISTRY.get_sample_value(
+            "film_service_admission_shed_total", {"route_class": "test_search", "reason": "queue_full"}
+        )
+
+        controller.release(SEARCH)
+        assert await waiting
+        assert REGISTRY.get_sample_value("film_service_admission_queue_depth", {"route_class": "test_search"}) == 0
+
+    async def test_wait_is_bounded(self) -> None:
+        controller = AdmissionController(max_concurrency=1, queue_timeout=0.01)
+        assert await controller.acquire(DETAIL)
+
+        assert not await controller.acquire(DETAIL)
+
+        controller.release(DETAIL)
+        assert await controller.acquire(DETAIL)
+
+    async def test_freed_slot_goes_to_higher_priority(self) -> None:
+        controller = AdmissionController(max_concurrency=1, queue_timeout=1)
+        search = RouteClass("test_priority_search", 2, concurrency=1, queue=1)
+        assert await controller.acquire(search)
+        expensive = asyncio.create_task(controller.acquire(search))
+        await asyncio.sleep(0)
+        cheap = asyncio.create_task(controller.acquire(DETAIL))
+        await asyncio.sleep(0)
+
+        controller.release(search)
+
+        assert await cheap
+        assert not expensive.done()
+        controller.release(DETAIL)
+        assert await expensive
+
+    async def test_capped_class_does_not_block_others(self) -> None:
+        controller = AdmissionController(max_concurrency=10, queue_timeout=1)
+        assert await controller.acquire(SEARCH)
+        waiting = asyncio.create_task(controller.acquire(SEARCH))
+        await asyncio.sleep(0)
+
+        assert await controller.acquire(DETAIL)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert REGISTRY.get_sample_value("film_service_admission_queue_depth", {"route_class": "test_search"}) == 0
+
+
+def make_app(release: asyncio.Event) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/films/search/")
+    async def search() -> dict:
+        await release.wait()
+        return {}
+
+    @app.get("/api/v1/films/{film_id}/")
+    async def film(film_id: str) -> dict:
+        return {"id": film_id}
+
+    app.add_middleware(AdmissionMiddleware)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_overloaded_route_is_rejected_with_retry_after(mocker) -> None:
+    mocker.patch.object(settings.admission, "search_concurrency", 1)
+    mocker.patch.object(settings.admission, "search_queue", 0)
+    release = asyncio.Event()
+
+    async with AsyncClient(app=make_app(release), base_url="http://test") as client:
+        running = asyncio.create_task(client.get("/api/v1/films/search/"))
+        while not running.done() and not REGISTRY.get_sample_value(
+            "film_service_admission_in_flight", {"route_class": "search"}
+        ):
+            await asyncio.sleep(0)
+        rejected = await client.get("/api/v1/films/search/", params={"query": "star"})
+        film = await client.get("/api/v1/films/1/")
+        release.set()
+
+        assert (await running).status_code == HTTPStatus.OK
+    assert rejected.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert rejected.headers["Retry-After"] == "1"
+    assert film.status_code == HTTPStatus.OK
@@ -0,0 +1,37 @@
+from http import HTTPStatus
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from api import cache_warmup
+from services.cache_warmer import WarmupReport, get_cache_warmer
+
+app = FastAPI()
+app.include_router(cache_warmup.router)
+
+
+@pytest.mark.asyncio
+class TestCacheWarmupEndpoint:
+    def teardown_method(self) -> None:
+        app.dependency_overrides.clear()
+
+    async def test_warmup_returns_report(self) -> None:
+        warmer = MagicMock()
+        warmer.warm_now = AsyncMock(return_value=WarmupReport(keys=12, failed=1, duration=0.5))
+        app.dependency_overrides[get_cache_warmer] = lambda: warmer
+
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post("/cache/warmup")
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {"keys": 12, "failed": 1, "duration": 0.5}
+
+    async def test_warmup_disabled(self) -> None:
+        app.dependency_overrides[get_cache_warmer] = lambda: None
+
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post("/cache/warmup")
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
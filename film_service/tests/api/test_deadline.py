@@ -0,0 +1,60 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from httpx import AsyncClient
+
+from api.deadline import DeadlineMiddleware, request_timeout
+from core import deadline
+from core.config import settings
+from db.exceptions import DeadlineExceededException
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [(None, 3), ("0.5", 0.5), ("10", 3), ("soon", 3), ("-1", 3)],
+)
+def test_request_timeout_is_capped_by_route_class(mocker, header: str | None, expected: float) -> None:
+    mocker.patch.object(settings.deadline, "detail_timeout", 3)
+
+    assert request_timeout("detail", header) == expected
+
+
+def test_unlimited_route_class_takes_header(mocker) -> None:
+    mocker.patch.object(settings.deadline, "export_timeout", 0)
+
+    assert request_timeout("export", None) == 0
+    assert request_timeout("export", "30") == 30
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/films/{film_id}/")
+    async def film(film_id: str) -> dict:
+        await deadline.bounded(asyncio.sleep(1))
+        return {"id": film_id}
+
+    @app.get("/metrics")
+    async def metrics() -> dict:
+        return {"remaining": deadline.remaining()}
+
+    @app.exception_handler(DeadlineExceededException)
+    async def deadline_exceeded(*_) -> ORJSONResponse:
+        return ORJSONResponse(status_code=HTTPStatus.GATEWAY_TIMEOUT, content={})
+
+    app.add_middleware(DeadlineMiddleware)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_cut_by_header_budget() -> None:
+    async with AsyncClient(app=make_app(), base_url="http://test") as client:
+        response = await client.get("/api/v1/films/1/", headers={"X-Request-Timeout": "0.01"})
+        outside_api = await client.get("/metrics")
+
+    assert response.status_code == HTTPStatus.GATEWAY_TIMEOUT
+    assert outside_api.json() == {"remaining": None}
+    assert deadline.remaining() is None
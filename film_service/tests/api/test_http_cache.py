@@ -0,0 +1,88 @@
+from http import HTTPStatus
+from typing import Annotated
+
+import orjson
+import pytest
+from fastapi import Depends, FastAPI, Request, Response
+from httpx import AsyncClient
+
+from api.http_cache import STALE_HEADER, Conditional, StaleResponseMiddleware, etag_matches, make_etag
+from core.degradation import mark_served_stale
+from models.models import Genre
+
+GENRE = Genre(id="3d8d9bf5-0d90-4353-88ba-4ccc5d2c07ff", name="Action")
+ETAG = make_etag(orjson.dumps(GENRE.dict()))
+
+app = FastAPI()
+
+
+def conditional(request: Request, response: Response) -> Conditional:
+    return Conditional(request, response, 300)
+
+
+@app.get("/genre", response_model=Genre, response_model_by_alias=False)
+async def genre(http_cache: Annotated[Conditional, Depends(conditional)]) -> Genre:
+    return http_cache.not_modified(ETAG) or GENRE
+
+
+@app.get("/stale", response_model=Genre, response_model_by_alias=False)
+async def stale(http_cache: Annotated[Conditional, Depends(conditional)]) -> Genre:
+    mark_served_stale()
+    return http_cache.not_modified(ETAG) or GENRE
+
+
+app.add_middleware(StaleResponseMiddleware)
+
+
+def test_etag_depends_on_content() -> None:
+    assert make_etag(b'{"name":"Action"}') == make_etag(b'{"name":"Action"}')
+    assert make_etag(b'{"name":"Action"}') != make_etag(b'{"name":"Drama"}')
+    assert make_etag(b"[]").startswith('W/"')
+
+
+@pytest.mark.parametrize(
+    "if_none_match, matches",
+    [
+        (None, False),
+        ('W/"abc"', True),
+        ('"abc"', True),
+        ('"other", W/"abc"', True),
+        ("*", True),
+        ('"other"', False),
+    ],
+)
+def test_etag_matches(if_none_match: str | None, matches: bool) -> None:
+    assert etag_matches(if_none_match, 'W/"abc"') is matches
+
+
+@pytest.mark.asyncio
+class TestConditionalGet:
+    async def test_response_has_etag_and_cache_control(self) -> None:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/genre")
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["ETag"] == ETAG
+        assert response.headers["Cache-Control"] == "private, max-age=300"
+        assert response.json()["uuid"] == str(GENRE.uuid)
+
+    async def test_matching_etag_returns_not_modified(self) -> None:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/genre", headers={"If-None-Match": ETAG})
+
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response.content == b""
+        assert response.headers["ETag"] == ETAG
+        assert response.headers["Cache-Control"] == "private, max-age=300"
+
+
+@pytest.mark.asyncio
+async def test_stale_response_is_marked() -> None:
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        fresh = await client.get("/genre")
+        stale = await client.get("/stale")
+
+    assert STALE_HEADER not in fresh.headers
+    assert stale.headers[STALE_HEADER] == "1"
+    assert stale.headers["Cache-Control"] == "no-cache"
+    assert stale.json()["uuid"] == str(GENRE.uuid)
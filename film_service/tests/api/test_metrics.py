@@ -0,0 +1,42 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+
+from api import metrics
+from api.metrics import MetricsMiddleware
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+app.include_router(metrics.router)
+
+
+@app.get("/films/{film_id}/")
+async def film(film_id: str) -> dict:
+    return {"uuid": film_id}
+
+
+@pytest.mark.asyncio
+class TestMetrics:
+    async def test_requests_are_labeled_by_route_template(self) -> None:
+        labels = {"method": "GET", "route": "/films/{film_id}/", "status": "200"}
+        before = REGISTRY.get_sample_value("film_service_http_request_duration_seconds_count", labels) or 0
+
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            await client.get("/films/1/")
+            await client.get("/films/2/")
+
+        assert REGISTRY.get_sample_value("film_service_http_request_duration_seconds_count", labels) == before + 2
+        assert REGISTRY.get_sample_value("film_service_http_requests_in_progress", {"method": "GET"}) == 0
+
+    async def test_metrics_endpoint(self) -> None:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            await client.get("/unknown")
+            response = await client.get("/metrics")
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["Content-Type"].startswith("text/plain")
+        assert 'route="unmatched"' in response.text
+        assert "film_service_cache_requests_total" in response.text
@@ -0,0 +1,115 @@
+from http import HTTPStatus
+from typing import Annotated
+from unittest.mock import AsyncMock, MagicMock
+
+import orjson
+import pytest
+from fastapi import Depends, FastAPI, Response
+from httpx import AsyncClient
+
+from api.http_cache import make_etag
+from api.response_cache import ResponseCache, response_cache
+from db.redis_repository import CachePolicy, get_redis_repo
+from models.models import NEXT_CURSOR_HEADER, Genre
+
+GENRE = Genre(id="3d8d9bf5-0d90-4353-88ba-4ccc5d2c07ff", name="Action")
+BODY = orjson.dumps({"uuid": str(GENRE.uuid), "name": "Action"})
+POLICY = CachePolicy(soft_ttl=60, hard_ttl=300)
+
+app = FastAPI()
+loader = AsyncMock(return_value=GENRE)
+
+
+@app.get("/genre", response_model=Genre, response_model_by_alias=False)
+async def genre(cache: Annotated[ResponseCache, Depends(response_cache(300, POLICY, by_alias=False))]) -> Genre:
+    if cached := await cache.get():
+        return cached
+    return await cache.set(await loader())
+
+
+@app.get("/genres", response_model=list[Genre], response_model_by_alias=False)
+async def genres(
+    response: Response,
+    cache: Annotated[
+        ResponseCache, Depends(response_cache(300, POLICY, by_alias=False, headers=(NEXT_CURSOR_HEADER,)))
+    ],
+) -> list[Genre]:
+    if cached := await cache.get():
+        return cached
+    response.headers[NEXT_CURSOR_HEADER] = "next"
+    return await cache.set([await loader()])
+
+
+@pytest.mark.asyncio
+class TestResponseCache:
+    def setup_method(self) -> None:
+        self.redis_repository = MagicMock()
+        self.redis_repository.get_bytes = AsyncMock(return_value=None)
+        self.redis_repository.load_bytes = AsyncMock()
+        app.dependency_overrides[get_redis_repo] = lambda: self.redis_repository
+        loader.reset_mock()
+
+    def teardown_method(self) -> None:
+        app.dependency_overrides.clear()
+
+    async def test_miss_stores_serialized_response(self) -> None:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/genre", params={"b": "2", "a": "1"})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.content == BODY
+        assert response.headers["ETag"] == make_etag(BODY)
+        key, data, rows, policy = self.redis_repository.load_bytes.await_args.args
+        assert key == "response:/genre?a=1&b=2"
+        assert data == BODY
+        assert rows == [GENRE]
+        assert policy.hard_ttl == POLICY.soft_ttl
+
+    async def test_hit_returns_cached_bytes(self) -> None:
+        self.redis_repository.get_bytes.return_value = BODY
+
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/genre")
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.content == BODY
+        assert response.headers["Content-Type"] == "application/json"
+        loader.assert_not_awaited()
+
+    async def test_hit_with_matching_etag_returns_not_modified(self) -> None:
+        self.redis_repository.get_bytes.return_value = BODY
+
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/genre", headers={"If-None-Match": make_etag(BODY)})
+
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response.content == b""
+        loader.assert_not_awaited()
+
+    async def test_search_query_is_normalized_in_key(self) -> None:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            await client.get("/genre", params={"query": "  STAR ", "page_size": "2"})
+            await client.get("/genre", params={"query": "star", "page_size": "2"})
+
+        first, second = self.redis_repository.load_bytes.await_args_list
+        assert first.args[0] == second.args[0] == "response:/genre?page_size=2&query=star"
+
+    async def test_headers_are_stored_with_body(self) -> None:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/genres")
+
+        body = b"[" + BODY + b"]"
+        assert response.headers[NEXT_CURSOR_HEADER] == "next"
+        assert response.headers["ETag"] == make_etag(body)
+        stored = self.redis_repository.load_bytes.await_args.args[1]
+        assert stored == orjson.dumps({NEXT_CURSOR_HEADER: "next"}) + b"\n" + body
+
+        self.redis_repository.get_bytes.return_value = stored
+        loader.reset_mock()
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            cached = await client.get("/genres")
+
+        assert cached.content == body
+        assert cached.headers[NEXT_CURSOR_HEADER] == "next"
+        assert cached.headers["ETag"] == make_etag(body)
+        loader.assert_not_awaited()
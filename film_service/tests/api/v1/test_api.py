@@ -1,20 +1,36 @@
 from http import HTTPStatus
-from typing import Any
+from typing import Any, AsyncIterator
 from unittest.mock import AsyncMock
 
+import orjson
 import pytest
 from asgi_lifespan import LifespanManager
 from elasticsearch import AsyncElasticsearch, NotFoundError
 from httpx import AsyncClient
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
 
+from api.v1.films import ndjson
+from core.config import settings
 from main import app
+from models.models import MovieInfo
+
+
+@pytest.fixture(autouse=True)
+def warmup_disabled(mocker):
+    mocker.patch.object(settings.warmup, "enabled", False)
+
+
+@pytest.fixture(autouse=True)
+def genre_catalog_disabled(mocker):
+    mocker.patch.object(settings.cache, "genre_catalog_enabled", False)
 
 
 @pytest.fixture(autouse=True)
 def redis_mock(mocker):
     mocker.patch.object(Redis, "set", mocker.AsyncMock(return_value=None))
     mocker.patch.object(Redis, "get", mocker.AsyncMock(return_value=None))
+    mocker.patch.object(Pipeline, "execute", mocker.AsyncMock(return_value=[None, -2]))
 
 
 @pytest.fixture(autouse=True)
@@ -168,3 +184,22 @@ async def test_search(aes_search_mock: AsyncMock, es_index_search_movies: dict)
             "imdb_rating": 9.5,
         },
     ]
+
+
+async def export_batches() -> AsyncIterator[list[MovieInfo]]:
+    yield [MovieInfo(id="3bdae84f-9a04-4b04-9f7c-c05582d529e5", title="Star", imdb_rating=8.1)]
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson() -> None:
+    first = [MovieInfo(id="05d7341e-e367-4e2e-acf5-4652a8435f93", title="Wars", imdb_rating=7.5)]
+    batches = export_batches()
+
+    got = b"".join([chunk async for chunk in ndjson(first, batches)])
+
+    assert [orjson.loads(line)["id"] for line in got.splitlines()] == [
+        "05d7341e-e367-4e2e-acf5-4652a8435f93",
+        "3bdae84f-9a04-4b04-9f7c-c05582d529e5",
+    ]
+    assert got.endswith(b"\n")
+    assert batches.ag_running is False and batches.ag_frame is None
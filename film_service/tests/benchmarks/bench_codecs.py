@@ -0,0 +1,53 @@
+"""Сравнение форматов кэша на страницах фильмов.
+
+Запуск: PYTHONPATH=src python tests/benchmarks/bench_codecs.py
+"""
+
+import random
+import timeit
+import uuid
+
+from db.codecs import Codec, LegacyJsonCodec, OrjsonCodec
+from models.models import Movie, MovieInfo
+
+PAGE_SIZE = 50
+ROUNDS = 200
+
+
+def person() -> dict:
+    return {"id": str(uuid.uuid4()), "name": f"Person {random.randint(0, 10_000)} Janhunen Calderón"}
+
+
+def movie() -> Movie:
+    return Movie(
+        id=str(uuid.uuid4()),
+        title=f"Star Wars: Episode {random.randint(1, 100)}",
+        description="The Jedi temple gets attacked by an army of Siths. " * 5,
+        imdb_rating=round(random.uniform(1, 10), 1),
+        genres=[{"id": str(uuid.uuid4()), "name": "Sci-Fi"} for _ in range(3)],
+        actors=[person() for _ in range(10)],
+        writers=[person() for _ in range(2)],
+        directors=[person()],
+    )
+
+
+def bench(codec: Codec, name: str, page: list) -> None:
+    mapper = type(page[0])
+    data = codec.encode_objects(page)
+    encode = timeit.timeit(lambda: codec.encode_objects(page), number=ROUNDS) / ROUNDS * 1000
+    decode = timeit.timeit(lambda: codec.decode_objects(data, mapper), number=ROUNDS) / ROUNDS * 1000
+    print(f"{name:<28} {mapper.__name__:<10} {len(data):>8} B  encode {encode:7.3f} ms  decode {decode:7.3f} ms")
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    movies = [movie() for _ in range(PAGE_SIZE)]
+    movies_info = [MovieInfo(id=m.uuid, title=m.title, imdb_rating=m.imdb_rating) for m in movies]
+    codecs = {
+        "legacy (json of json)": LegacyJsonCodec(),
+        "v1 orjson": OrjsonCodec(compress_threshold=0),
+        "v1 orjson + zlib > 4 KiB": OrjsonCodec(compress_threshold=4096),
+    }
+    for page in (movies, movies_info):
+        for name, codec in codecs.items():
+            bench(codec, name, page)
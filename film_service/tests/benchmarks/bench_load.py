@@ -0,0 +1,211 @@
+"""Нагрузочный тест film_service без docker-compose.
+
+Приложение поднимается целиком, с lifespan, но Elasticsearch заменен на FakeElastic с данными функциональных
+тестов, размноженными --scale раз, Redis на fakeredis, а auth-сервис на aiohttp-заглушку /auth/me.
+Запросы идут через ASGI-транспорт httpx в том же процессе, поэтому в латентность входит работа приложения,
+клиентов ES и Redis и фейков, но не сеть.
+Настройки кэша, msearch и прогрева берутся из переменных окружения, как у сервиса.
+
+Запуск: PYTHONPATH=src:. python tests/benchmarks/bench_load.py --scale 100 --concurrency 50 --requests 5000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+# До импорта приложения: sentry_sdk.init вызывается при импорте main
+os.environ.setdefault("SENTRY_DSN", "")
+
+import fakeredis.aioredis  # noqa: E402
+import orjson  # noqa: E402
+from aiohttp import web  # noqa: E402
+from asgi_lifespan import LifespanManager  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from jose import jwt  # noqa: E402
+
+import main  # noqa: E402
+from core.config import settings  # noqa: E402
+from tests.benchmarks.fake_elastic import FakeElastic, scale_data  # noqa: E402
+from tests.functional.testdata.es_settings import ES_DATA, IndexName  # noqa: E402
+
+# Доля запросов каждого вида в нагрузке
+MIX = {"films": 0.35, "film": 0.25, "search": 0.1, "suggest": 0.15, "person": 0.15}
+PAGES = 5
+
+
+class Scenario:
+    """Генератор путей запросов по данным индексов"""
+
+    def __init__(self, data: dict[str, list[dict]], page_size: int, rng: random.Random) -> None:
+        self._movies = [doc["id"] for doc in data[IndexName.MOVIES]]
+        self._genres = [doc["id"] for doc in data[IndexName.GENRES]]
+        self._persons = [doc["id"] for doc in data[IndexName.PERSONS]]
+        self._words = sorted({word for doc in data[IndexName.MOVIES] for word in doc["title"].split() if len(word) > 3})
+        self._page_size = page_size
+        self._rng = rng
+        self._builders: dict[str, Callable[[], str]] = {
+            "films": self._films,
+            "film": lambda: f"/api/v1/films/{rng.choice(self._movies)}/",
+            "search": lambda: f"/api/v1/films/search/?query={rng.choice(self._words)}",
+            "suggest": self._suggest,
+            "person": lambda: f"/api/v1/persons/{rng.choice(self._persons)}/",
+        }
+
+    def next(self) -> tuple[str, str]:
+        kind = self._rng.choices(list(MIX), weights=list(MIX.values()))[0]
+        return kind, self._builders[kind]()
+
+    def _suggest(self) -> str:
+        # Префикс, который пользователь успел набрать к моменту запроса
+        word = self._rng.choice(self._words)
+        return f"/api/v1/suggest?query={word[: self._rng.randint(1, len(word))]}"
+
+    def _films(self) -> str:
+        sort = self._rng.choice(["-imdb_rating", "imdb_rating"])
+        path = f"/api/v1/films?sort={sort}&page_size={self._page_size}&page_number={self._rng.randint(1, PAGES)}"
+        if self._rng.random() < 0.5:
+            path += f"&genre={self._rng.choice(self._genres)}"
+        return path
+
+
+async def start_auth() -> tuple[web.AppRunner, int]:
+    """Заглушка auth-сервиса: любой токен с верной подписью действителен"""
+
+    async def me(_: web.Request) -> web.Response:
+        return web.json_response({"login": "load-test"})
+
+    app = web.Application()
+    app.router.add_get("/api/v1/auth/me/", me)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+def access_token() -> str:
+    settings.jwt_algorithm = "HS256"
+    payload = {"sub": "load-test", "jti": "load-test", "exp": datetime.now(timezone.utc) + timedelta(hours=1)}
+    return jwt.encode(payload, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+
+
+def percentile(values: list[float], percent: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def summary(latencies: list[float], errors: int, duration: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / duration, 1) if duration else 0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def drive(client: AsyncClient, scenario: Scenario, requests: int, concurrency: int) -> dict:
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            kind, path = scenario.next()
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies[kind].append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors[kind] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    report = {kind: summary(values, errors[kind], duration) for kind, values in sorted(latencies.items())}
+    report["total"] = summary(
+        [value for values in latencies.values() for value in values], sum(errors.values()), duration
+    )
+    report["total"]["duration_s"] = round(duration, 3)
+    return report
+
+
+async def run(args: argparse.Namespace) -> dict:
+    data = scale_data(
+        {str(index.value): docs for index, docs in ES_DATA.items()}, args.scale, keep={IndexName.GENRES.value}
+    )
+    elastic = FakeElastic(data, latency=args.es_latency / 1000)
+    await elastic.start()
+    settings.elastic.host, settings.elastic.port = "127.0.0.1", elastic.port
+    auth, settings.port_auth = await start_auth()
+    settings.host_auth = "127.0.0.1"
+    server = fakeredis.FakeServer()
+    main.Redis = lambda **_: fakeredis.aioredis.FakeRedis(server=server)
+    # fakeredis падает на XREAD "$" по несуществующему stream, а справочник жанров начинает чтение до ETL
+    await fakeredis.aioredis.FakeRedis(server=server).xgroup_create(
+        settings.cache.events_stream, settings.cache.events_group, id="$", mkstream=True
+    )
+
+    scenario = Scenario(data, args.page_size, random.Random(args.seed))
+    try:
+        # Исключения приложения считаются ошибками (500), а не прерывают замер
+        transport = ASGITransport(app=main.app, raise_app_exceptions=False)
+        headers = {"Authorization": f"Bearer {access_token()}"}
+        async with (
+            LifespanManager(main.app),
+            AsyncClient(transport=transport, base_url="http://test", headers=headers) as client,
+        ):
+            if args.warmup:
+                await drive(client, scenario, args.warmup, args.concurrency)
+            report = await drive(client, scenario, args.requests, args.concurrency)
+    finally:
+        await elastic.stop()
+        await auth.cleanup()
+
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "params": vars(args) | {"documents": {index: len(docs) for index, docs in data.items()}},
+        "settings": orjson.loads(settings.json(include={"cache", "elastic", "warmup", "http_cache"})),
+        "results": report,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"{'':<8} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for kind, row in report["results"].items():
+        print(
+            f"{kind:<8} {row['requests']:>9} {row['errors']:>7} {row['rps']:>9} "
+            f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}"
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=100, help="во сколько раз размножить фильмы и персоны")
+    parser.add_argument("--concurrency", type=int, default=50, help="число одновременных клиентов")
+    parser.add_argument("--requests", type=int, default=5000, help="число запросов в замере")
+    parser.add_argument("--warmup", type=int, default=500, help="запросы перед замером, не учитываются")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--es-latency", type=float, default=0, help="задержка каждого ответа ES, мс")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="load_test.json", help="файл для результатов в JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    result = asyncio.run(run(arguments))
+    print_report(result)
+    with open(arguments.output, "wb") as file:
+        file.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
+    print(f"Saved to {arguments.output}")
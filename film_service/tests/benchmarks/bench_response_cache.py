@@ -0,0 +1,89 @@
+"""Стоимость ответа из кэша: модели через response_model против готовых байтов.
+
+Запуск: PYTHONPATH=src python tests/benchmarks/bench_response_cache.py
+"""
+
+import asyncio
+import random
+import time
+import uuid
+
+import orjson
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from db.codecs import OrjsonCodec
+from models.models import Movie, MovieInfo
+
+PAGE_SIZE = 50
+ROUNDS = 2000
+SEARCH_INCLUDE = {"uuid", "title", "imdb_rating"}
+
+
+def person() -> dict:
+    return {"id": str(uuid.uuid4()), "name": f"Person {random.randint(0, 10_000)} Janhunen Calderón"}
+
+
+def movie() -> Movie:
+    return Movie(
+        id=str(uuid.uuid4()),
+        title=f"Star Wars: Episode {random.randint(1, 100)}",
+        description="The Jedi temple gets attacked by an army of Siths. " * 5,
+        imdb_rating=round(random.uniform(1, 10), 1),
+        genres=[{"id": str(uuid.uuid4()), "name": "Sci-Fi"} for _ in range(3)],
+        actors=[person() for _ in range(10)],
+        writers=[person() for _ in range(2)],
+        directors=[person()],
+    )
+
+
+async def model_path(codec: OrjsonCodec, cached: bytes, mapper, field, include, many: bool) -> Response:
+    """Попадание в кэш моделей: декодирование, валидация по response_model, сериализация"""
+    content = codec.decode_objects(cached, mapper) if many else codec.decode_object(cached, mapper)
+    body = await serialize_response(
+        field=field, response_content=content, include=include, by_alias=False, is_coroutine=True
+    )
+    return ORJSONResponse(body)
+
+
+async def bytes_path(cached: bytes) -> Response:
+    """Попадание в кэш ответа: байты отдаются как есть"""
+    return Response(content=cached, media_type="application/json")
+
+
+async def bench(name: str, make) -> float:
+    started = time.process_time()
+    for _ in range(ROUNDS):
+        await make()
+    per_request = (time.process_time() - started) / ROUNDS * 1_000_000
+    print(f"{name:<44} {per_request:9.1f} µs CPU / request")
+    return per_request
+
+
+async def main() -> None:
+    random.seed(0)
+    codec = OrjsonCodec(compress_threshold=0)
+    detail = movie()
+    page = [MovieInfo(id=m.uuid, title=m.title, imdb_rating=m.imdb_rating) for m in (movie() for _ in range(PAGE_SIZE))]
+    cases = {
+        "/films/{id}/": (detail, Movie, Movie, None, False),
+        "/films/search/ (response_model_include)": (page, MovieInfo, list[MovieInfo], SEARCH_INCLUDE, True),
+    }
+    for route, (content, mapper, response_type, include, many) in cases.items():
+        cached_models = codec.encode_objects(content) if many else codec.encode_object(content)
+        # FastAPI создает поле response_model один раз при регистрации роута
+        field = create_response_field(name="response", type_=response_type)
+        cached_response = orjson.dumps(jsonable_encoder(content, include=include, by_alias=False))
+        models = await bench(
+            f"{route} models",
+            lambda: model_path(codec, cached_models, mapper, field, include, many),
+        )
+        raw = await bench(f"{route} bytes", lambda: bytes_path(cached_response))
+        print(f"{'':<44} {models / raw:9.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,229 @@
+"""Elasticsearch в процессе теста: aiohttp-сервер с HTTP API, который использует film_service.
+
+Поддерживаются _doc, _mget, _search и _msearch с запросами, которые строят репозитории: match_all, match, term(s),
+ids, nested и bool. Полнотекстовый match сравнивает слова без анализаторов и fuzziness, а релевантность считается
+по числу совпавших слов, поэтому результаты поиска близки к ES, но не совпадают с ним. match по подполю suggest
+ищет слова по началу, как edge n-граммы.
+"""
+
+import asyncio
+import re
+import time
+import uuid
+from typing import Any
+
+import orjson
+from aiohttp import web
+
+HEADERS = {"X-Elastic-Product": "Elasticsearch"}
+CONTENT_TYPE = "application/json"
+
+
+def scale_data(data: dict[str, list[dict]], scale: int, keep: set[str]) -> dict[str, list[dict]]:
+    """Размножить документы индексов scale раз.
+
+    В k-й копии все идентификаторы, кроме индексов keep, заменяются на uuid5 от исходного и k,
+    поэтому связи фильмов и персон сохраняются внутри копии.
+    """
+    kept_ids = {doc["id"] for index in keep for doc in data[index]}
+
+    def clone(value: Any, copy: int) -> Any:
+        if isinstance(value, dict):
+            return {key: clone(item, copy) for key, item in value.items()}
+        if isinstance(value, list):
+            return [clone(item, copy) for item in value]
+        if copy and isinstance(value, str) and value not in kept_ids and _is_uuid(value):
+            # Модели принимают только uuid4
+            return str(uuid.UUID(bytes=uuid.uuid5(uuid.NAMESPACE_OID, f"{value}:{copy}").bytes, version=4))
+        return value
+
+    return {
+        index: docs if index in keep else [clone(doc, copy) for copy in range(scale) for doc in docs]
+        for index, docs in data.items()
+    }
+
+
+class FakeElastic:
+    def __init__(self, data: dict[str, list[dict]], latency: float = 0) -> None:
+        self._indexes = {index: {doc["id"]: doc for doc in docs} for index, docs in data.items()}
+        self._latency = latency
+        self._runner: web.AppRunner | None = None
+        self.port: int | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/"
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/{index}/_doc/{id}", self._get)
+        app.router.add_post("/{index}/_mget", self._mget)
+        app.router.add_post("/{index}/_search", self._search)
+        app.router.add_post("/_msearch", self._msearch)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _get(self, request: web.Request) -> web.Response:
+        await self._delay()
+        index, id_ = request.match_info["index"], request.match_info["id"]
+        doc = self._indexes.get(index, {}).get(id_)
+        body = {"_index": index, "_id": id_, "found": doc is not None}
+        if doc is not None:
+            body["_source"] = doc
+        return self._json(body, status=200 if doc is not None else 404)
+
+    async def _mget(self, request: web.Request) -> web.Response:
+        await self._delay()
+        index = request.match_info["index"]
+        docs = []
+        for id_ in orjson.loads(await request.read())["ids"]:
+            doc = self._indexes.get(index, {}).get(id_)
+            docs.append({"_index": index, "_id": id_, "found": doc is not None, **({"_source": doc} if doc else {})})
+        return self._json({"docs": docs})
+
+    async def _search(self, request: web.Request) -> web.Response:
+        await self._delay()
+        body = orjson.loads(await request.read() or b"{}")
+        if includes := request.query.get("_source_includes"):
+            body["_source"] = includes.split(",")
+        return self._json(self.search(request.match_info["index"], body))
+
+    async def _msearch(self, request: web.Request) -> web.Response:
+        await self._delay()
+        lines = [orjson.loads(line) for line in (await request.read()).splitlines() if line.strip()]
+        responses = [
+            {**self.search(header["index"], body), "status": 200} for header, body in zip(lines[::2], lines[1::2])
+        ]
+        return self._json({"took": 0, "responses": responses})
+
+    def search(self, index: str, body: dict[str, Any]) -> dict[str, Any]:
+        started = time.perf_counter()
+        query = body.get("query", {"match_all": {}})
+        scored = [(score, doc) for doc in self._indexes.get(index, {}).values() if (score := _score(doc, query))]
+        sort = body.get("sort")
+        if sort:
+            # Сортировка устойчивая: проходы от последнего поля к первому дают порядок по всем полям
+            for spec in reversed(sort):
+                ((field, options),) = spec.items()
+                scored.sort(key=lambda item: _values(item[1], field)[0], reverse=options.get("order") == "desc")
+            if search_after := body.get("search_after"):
+                scored = [item for item in scored if _compare(_sort_values(item[1], sort), search_after, sort) > 0]
+        else:
+            scored.sort(key=lambda item: -item[0])
+        start = body.get("from") or 0
+        page = scored[start : start + body.get("size", 10)]  # noqa: E203
+        includes = body.get("_source")
+        hits = [
+            {
+                "_index": index,
+                "_id": doc["id"],
+                "_score": None if sort else score,
+                "_source": {key: value for key, value in doc.items() if key in includes} if includes else doc,
+                **({"sort": _sort_values(doc, sort)} if sort else {}),
+            }
+            for score, doc in page
+        ]
+        return {
+            "took": int((time.perf_counter() - started) * 1000),
+            "timed_out": False,
+            "hits": {"total": {"value": len(scored), "relation": "eq"}, "hits": hits},
+        }
+
+    async def _delay(self) -> None:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+
+    @staticmethod
+    def _json(body: dict, status: int = 200) -> web.Response:
+        return web.Response(body=orjson.dumps(body), status=status, content_type=CONTENT_TYPE, headers=HEADERS)
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _values(doc: Any, path: str) -> list[Any]:
+    """Значения поля по пути через точку, с обходом вложенных списков"""
+    values = [doc]
+    for name in path.split("."):
+        next_values = []
+        for value in values:
+            value = value.get(name) if isinstance(value, dict) else None
+            next_values.extend(value if isinstance(value, list) else [] if value is None else [value])
+        values = next_values
+    return values
+
+
+def _words(value: Any) -> set[str]:
+    return set(re.findall(r"\w+", str(value).lower()))
+
+
+def _has_prefixes(words: set[str], prefixes: set[str]) -> bool:
+    return all(any(word.startswith(prefix) for word in words) for prefix in prefixes)
+
+
+def _score(doc: dict, query: dict[str, Any]) -> float:
+    """Релевантность документа запросу, 0 - не подходит"""
+    ((kind, body),) = query.items()
+    if kind == "match_all":
+        return 1
+    if kind == "ids":
+        return float(doc["id"] in body["values"])
+    if kind == "nested":
+        return _score(doc, body["query"])
+    if kind in ("match", "term", "terms"):
+        ((field, expected),) = body.items()
+        if isinstance(expected, dict):
+            expected = expected.get("query", expected.get("value"))
+        field, suggest, _ = field.partition(".suggest")
+        values = [str(value) for value in _values(doc, field)]
+        if kind == "terms":
+            return float(bool({str(item) for item in expected} & set(values)))
+        if kind == "term" or field.split(".")[-1] == "id":
+            return float(str(expected) in values)
+        words = _words(expected)
+        if suggest:
+            # Подполе suggest с edge n-граммами: каждое слово запроса - начало какого-либо слова значения
+            return float(any(_has_prefixes(_words(value), words) for value in values))
+        return max((len(words & _words(value)) for value in values), default=0)
+    if kind == "bool":
+        required = [_score(doc, item) for item in _as_list(body.get("must")) + _as_list(body.get("filter"))]
+        if not all(required) or any(_score(doc, item) for item in _as_list(body.get("must_not"))):
+            return 0
+        should = [_score(doc, item) for item in _as_list(body.get("should"))]
+        minimum = body.get("minimum_should_match", 0 if required or not should else 1)
+        if sum(1 for score in should if score) < minimum:
+            return 0
+        return sum(required) + sum(should) or 1
+    raise ValueError(f"Unsupported query {kind}")
+
+
+def _as_list(value: Any) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _sort_values(doc: dict, sort: list[dict]) -> list[Any]:
+    return [next(iter(_values(doc, field)), None) for spec in sort for field in spec]
+
+
+def _compare(left: list[Any], right: list[Any], sort: list[dict]) -> int:
+    for a, b, spec in zip(left, right, sort):
+        if a == b:
+            continue
+        order = next(iter(spec.values())).get("order", "asc")
+        result = -1 if a < b else 1
+        return result if order == "asc" else -result
+    return 0
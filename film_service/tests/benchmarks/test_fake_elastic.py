@@ -0,0 +1,82 @@
+from tests.benchmarks.fake_elastic import FakeElastic, scale_data
+
+GENRE = {"id": "3d8d9bf5-0d90-4353-88ba-4ccc5d2c07ff", "name": "Action"}
+MOVIES = [
+    {
+        "id": "3bdae84f-9a04-4b04-9f7c-c05582d529e5",
+        "title": "Star Wars",
+        "imdb_rating": 7.2,
+        "genres": [GENRE],
+        "genre_ids": [GENRE["id"]],
+    },
+    {
+        "id": "05d7341e-e367-4e2e-acf5-4652a8435f93",
+        "title": "Star Trek",
+        "imdb_rating": 8.1,
+        "genres": [],
+        "genre_ids": [],
+    },
+    {
+        "id": "e7e6d147-cc10-406c-a7a2-5e0be2231327",
+        "title": "Wars",
+        "imdb_rating": 7.2,
+        "genres": [GENRE],
+        "genre_ids": [GENRE["id"]],
+    },
+]
+SORT = [{"imdb_rating": {"order": "desc"}}, {"id": {"order": "asc"}}]
+
+
+def ids(response: dict) -> list[str]:
+    return [hit["_id"] for hit in response["hits"]["hits"]]
+
+
+class TestFakeElastic:
+    def setup_method(self) -> None:
+        self.elastic = FakeElastic({"movies": MOVIES, "genres": [GENRE]})
+
+    def test_sort_and_search_after(self) -> None:
+        first = self.elastic.search("movies", {"query": {"match_all": {}}, "size": 2, "sort": SORT})
+        after = self.elastic.search(
+            "movies",
+            {"query": {"match_all": {}}, "size": 2, "sort": SORT, "search_after": first["hits"]["hits"][-1]["sort"]},
+        )
+
+        assert ids(first) == [MOVIES[1]["id"], MOVIES[0]["id"]]
+        assert ids(after) == [MOVIES[2]["id"]]
+
+    def test_nested_filter_and_source(self) -> None:
+        query = {"nested": {"path": "genres", "query": {"match": {"genres.id": GENRE["id"]}}}}
+
+        got = self.elastic.search("movies", {"query": query, "sort": SORT, "_source": ["id", "title"]})
+
+        assert ids(got) == [MOVIES[0]["id"], MOVIES[2]["id"]]
+        assert got["hits"]["hits"][0]["_source"] == {"id": MOVIES[0]["id"], "title": "Star Wars"}
+
+    def test_term_filter_on_flat_ids(self) -> None:
+        query = {"bool": {"filter": [{"term": {"genre_ids": GENRE["id"]}}]}}
+
+        got = self.elastic.search("movies", {"query": query, "sort": SORT})
+
+        assert ids(got) == [MOVIES[0]["id"], MOVIES[2]["id"]]
+
+    def test_match_ranks_by_matched_words(self) -> None:
+        got = self.elastic.search(
+            "movies", {"query": {"match": {"title": {"query": "star wars", "fuzziness": "auto"}}}}
+        )
+
+        assert ids(got)[0] == MOVIES[0]["id"]
+        assert set(ids(got)) == {movie["id"] for movie in MOVIES}
+
+    def test_suggest_matches_word_prefixes(self) -> None:
+        got = self.elastic.search("movies", {"query": {"match": {"title.suggest": {"query": "wa st"}}}})
+
+        assert ids(got) == [MOVIES[0]["id"]]
+
+    def test_scale_keeps_references_inside_copy(self) -> None:
+        data = scale_data({"movies": MOVIES, "genres": [GENRE]}, 2, keep={"genres"})
+
+        copies = data["movies"][len(MOVIES) :]  # noqa: E203
+        assert len(data["movies"]) == 2 * len(MOVIES)
+        assert copies[0]["id"] != MOVIES[0]["id"]
+        assert copies[0]["genres"] == [GENRE]
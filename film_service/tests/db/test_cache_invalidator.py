@@ -0,0 +1,85 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from db.cache_invalidator import CacheInvalidator
+from db.codecs import OrjsonCodec
+
+MOVIE_ID = "3bdae84f-9a04-4b04-9f7c-c05582d529e5"
+
+
+def redis_client(*results: list) -> MagicMock:
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(side_effect=results)
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=None)
+
+    client = MagicMock()
+    client.pipeline.return_value = pipe
+    client.xack = AsyncMock()
+    return client
+
+
+@pytest.mark.asyncio
+class TestCacheInvalidator:
+    async def test_invalidate_deletes_tagged_keys(self) -> None:
+        client = redis_client([{b"movie::" + MOVIE_ID.encode(), b"movies:imdb_rating:50:1"}], [])
+        invalidator = CacheInvalidator(redis=client, codec=OrjsonCodec(compress_threshold=0))
+
+        got = await invalidator.invalidate("movies", [MOVIE_ID])
+
+        assert got == 2
+        pipe = client.pipeline.return_value
+        assert pipe.zrangebyscore.call_args.args[0] == f"tags:movie:{MOVIE_ID}"
+        deleted = pipe.delete.call_args.args
+        assert deleted[0] == f"tags:movie:{MOVIE_ID}"
+        assert set(deleted[1:]) == {f"v1:movie::{MOVIE_ID}", "v1:movies:imdb_rating:50:1"}
+        assert pipe.publish.call_count == 2
+
+    async def test_unknown_index_is_ignored(self) -> None:
+        client = redis_client()
+        invalidator = CacheInvalidator(redis=client, codec=OrjsonCodec(compress_threshold=0))
+
+        assert await invalidator.invalidate("unknown", [MOVIE_ID]) == 0
+        client.pipeline.assert_not_called()
+
+    async def test_consume_acknowledges_processed_events(self) -> None:
+        client = redis_client([set()], [])
+        client.xreadgroup = AsyncMock(
+            return_value=[[b"etl:changes", [(b"1-0", {b"index": b"genres", b"ids": MOVIE_ID.encode()})]]]
+        )
+        invalidator = CacheInvalidator(redis=client, codec=OrjsonCodec(compress_threshold=0))
+
+        await invalidator._consume()
+
+        assert client.pipeline.return_value.zrangebyscore.call_args.args[0] == f"tags:genre:{MOVIE_ID}"
+        client.xack.assert_awaited_once_with("etl:changes", "film_service", b"1-0")
+
+    async def test_consume_notifies_about_deleted_keys(self) -> None:
+        client = redis_client([{b"genre::" + MOVIE_ID.encode()}], [])
+        client.xreadgroup = AsyncMock(
+            return_value=[[b"etl:changes", [(b"1-0", {b"index": b"genres", b"ids": MOVIE_ID.encode()})]]]
+        )
+        on_change = MagicMock()
+        invalidator = CacheInvalidator(redis=client, codec=OrjsonCodec(compress_threshold=0), on_change=on_change)
+
+        await invalidator._consume()
+
+        on_change.assert_called_once_with()
+
+    async def test_consume_skips_malformed_events(self) -> None:
+        client = redis_client([{b"genre::" + MOVIE_ID.encode()}], [])
+        client.xreadgroup = AsyncMock(
+            return_value=[
+                [
+                    b"etl:changes",
+                    [(b"1-0", {b"ids": MOVIE_ID.encode()}), (b"2-0", {b"index": b"genres", b"ids": MOVIE_ID.encode()})],
+                ]
+            ]
+        )
+        invalidator = CacheInvalidator(redis=client, codec=OrjsonCodec(compress_threshold=0))
+
+        await invalidator._consume()
+
+        assert [call.args[2] for call in client.xack.await_args_list] == [b"1-0", b"2-0"]
+        client.pipeline.return_value.delete.assert_called_once()
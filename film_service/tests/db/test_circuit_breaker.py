@@ -0,0 +1,90 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from elasticsearch import ConnectionError, NotFoundError
+from prometheus_client import REGISTRY
+
+from core import deadline
+from db.circuit_breaker import CircuitBreaker, CircuitState
+from db.es_repository import is_es_failure
+from db.exceptions import DeadlineExceededException, ServiceUnavailableException
+
+
+def breaker(name: str, timeout: float = 1) -> CircuitBreaker:
+    return CircuitBreaker(name, timeout=timeout, failure_threshold=2, recovery_timeout=10, is_failure=is_es_failure)
+
+
+@pytest.mark.asyncio
+class TestCircuitBreaker:
+    async def test_opens_after_consecutive_failures_and_fails_fast(self) -> None:
+        circuit = breaker("opens")
+        search = AsyncMock(side_effect=ConnectionError("down"))
+
+        for _ in range(2):
+            with pytest.raises(ServiceUnavailableException):
+                await circuit.call(search)
+        with pytest.raises(ServiceUnavailableException, match="open"):
+            await circuit.call(search)
+
+        assert circuit.state == CircuitState.OPEN
+        assert search.await_count == 2
+        assert REGISTRY.get_sample_value("film_service_circuit_state", {"name": "opens"}) == 2
+        assert REGISTRY.get_sample_value("film_service_circuit_transitions_total", {"name": "opens", "state": "open"})
+
+    async def test_timeout_is_a_failure(self) -> None:
+        circuit = breaker("timeout", timeout=0.01)
+
+        with pytest.raises(ServiceUnavailableException) as exc_info:
+            await circuit.call(asyncio.sleep, 1)
+
+        assert isinstance(exc_info.value.__cause__, asyncio.TimeoutError)
+
+    async def test_request_deadline_is_not_a_failure(self) -> None:
+        circuit = breaker("deadline")
+
+        with deadline.limit(0.01):
+            for _ in range(3):
+                with pytest.raises(DeadlineExceededException):
+                    await circuit.call(asyncio.sleep, 1)
+
+        assert circuit.state == CircuitState.CLOSED
+
+    async def test_no_time_left_skips_call(self) -> None:
+        circuit = breaker("no_time_left")
+        search = AsyncMock()
+
+        with deadline.limit(0):
+            with pytest.raises(DeadlineExceededException):
+                await circuit.call(search)
+
+        search.assert_not_awaited()
+
+    async def test_not_found_is_not_a_failure(self, not_found_error_from_es: NotFoundError) -> None:
+        circuit = breaker("not_found")
+        get = AsyncMock(side_effect=not_found_error_from_es)
+
+        for _ in range(3):
+            with pytest.raises(NotFoundError):
+                await circuit.call(get)
+
+        assert circuit.state == CircuitState.CLOSED
+
+    async def test_probe_after_recovery_timeout(self) -> None:
+        circuit = breaker("probe")
+        search = AsyncMock(side_effect=[ConnectionError("down"), ConnectionError("down"), ConnectionError("down"), {}])
+        for _ in range(2):
+            with pytest.raises(ServiceUnavailableException):
+                await circuit.call(search)
+
+        # Время восстановления прошло
+        circuit._opened_at -= 10
+        assert circuit.retry_after == 0
+        # Неудачная проба снова размыкает предохранитель
+        with pytest.raises(ServiceUnavailableException):
+            await circuit.call(search)
+        assert circuit.state == CircuitState.OPEN
+
+        circuit._opened_at -= 10
+        assert await circuit.call(search) == {}
+        assert circuit.state == CircuitState.CLOSED
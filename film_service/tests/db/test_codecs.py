@@ -0,0 +1,37 @@
+import zlib
+
+import pytest
+
+from db.codecs import LegacyJsonCodec, OrjsonCodec, get_codec
+from models.models import Movie, MovieInfo
+
+
+@pytest.mark.parametrize("codec", [LegacyJsonCodec(), OrjsonCodec(compress_threshold=0)])
+def test_round_trip(codec, default_movie: Movie, search_movies_fixture: list[Movie]) -> None:
+    assert codec.decode_object(codec.encode_object(default_movie), Movie) == default_movie
+    assert codec.decode_objects(codec.encode_objects(search_movies_fixture), Movie) == search_movies_fixture
+    assert codec.decode_objects(codec.encode_objects([]), MovieInfo) == []
+
+
+def test_orjson_codec_is_single_document(default_movie: Movie) -> None:
+    codec = OrjsonCodec(compress_threshold=0)
+
+    got = codec.encode_objects([MovieInfo(id=default_movie.uuid, title="Star", imdb_rating=7)])
+
+    assert got == b'[{"id":"3bdae84f-9a04-4b04-9f7c-c05582d529e5","title":"Star","imdb_rating":7.0}]'
+
+
+def test_orjson_codec_compresses_above_threshold(search_movies_fixture: list[Movie]) -> None:
+    codec = OrjsonCodec(compress_threshold=100)
+
+    got = codec.encode_objects(search_movies_fixture)
+
+    assert zlib.decompress(got).startswith(b"[{")
+    assert codec.decode_objects(got, Movie) == search_movies_fixture
+
+
+def test_key_version_prefix() -> None:
+    assert get_codec("v1").key("movie::1") == "v1:movie::1"
+    assert get_codec("legacy").key("movie::1") == "movie::1"
+    with pytest.raises(ValueError):
+        get_codec("v0")
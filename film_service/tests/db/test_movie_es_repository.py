@@ -4,10 +4,11 @@ from uuid import UUID
 
 import pytest
 from elasticsearch import AsyncElasticsearch, NotFoundError
+from prometheus_client import REGISTRY
 
 from db.exceptions import MovieNotFoundException
 from db.repositories.movie_es_repository import MoviesElasticsearchRepository
-from models.models import LimitOffset, Movie
+from models.models import Cursor, LimitOffset, Movie, MovieInfo, movie_projection
 
 
 @pytest.mark.asyncio
@@ -102,6 +103,23 @@ class TestMovieElasticsearchRepository:
         assert isinstance(got[0], Movie)
         assert got[0].uuid == UUID("3bdae84f-9a04-4b04-9f7c-c05582d529e5")
 
+    @patch.object(AsyncElasticsearch, "search", new_callable=AsyncMock)
+    async def test_find_by_person_ids_filters_flat_ids(
+        self, mock_search: AsyncMock, es_index_search_movies: dict
+    ) -> None:
+        mock_search.return_value = es_index_search_movies
+        person_id = "67503a36-dc38-4104-abfe-3cea92db2e89"
+
+        got = await self.repo.find_by_person_ids([UUID(person_id)], LimitOffset(limit=50, offset=1))
+
+        assert all(isinstance(movie, Movie) for movie in got)
+        person_filter = mock_search.await_args.kwargs["query"]["bool"]["filter"][0]["bool"]
+        assert person_filter["should"] == [
+            {"terms": {"actor_ids": [person_id]}},
+            {"terms": {"writer_ids": [person_id]}},
+            {"terms": {"director_ids": [person_id]}},
+        ]
+
     @patch.object(AsyncElasticsearch, "search", new_callable=AsyncMock)
     async def test_search(self, mock_search: AsyncMock, es_index_search_movies: dict) -> None:
         mock_search.return_value = es_index_search_movies
@@ -128,3 +146,129 @@ class TestMovieElasticsearchRepository:
         got = await self.repo.search(query="lksaoiauroiqwhalasdljlk", limit_offset=LimitOffset(limit=2, offset=2))
 
         assert got == []
+
+    @patch.object(AsyncElasticsearch, "search", new_callable=AsyncMock)
+    async def test_suggest(self, mock_search: AsyncMock, es_index_search_movies: dict) -> None:
+        mock_search.return_value = es_index_search_movies
+
+        got = await self.repo.suggest(prefix="star wa", size=5)
+
+        assert len(got) == 2
+        assert all(type(movie) is MovieInfo for movie in got)
+        params = mock_search.await_args.kwargs
+        assert params["query"] == {"match": {"title.suggest": {"query": "star wa", "operator": "and"}}}
+        assert params["size"] == 5
+        assert params["source_includes"] == ["id", "title", "imdb_rating"]
+
+    @patch.object(AsyncElasticsearch, "search", new_callable=AsyncMock)
+    async def test_find_all_after_cursor(self, mock_search: AsyncMock, desc_es_index_search_movies: dict) -> None:
+        mock_search.return_value = self.find_limit_offset(desc_es_index_search_movies, 2, 2)
+        cursor = Cursor(sort="-imdb_rating", search_after=[8.1, "05d7341e-e367-4e2e-acf5-4652a8435f93"])
+
+        got = await self.repo.find_all(sort="-imdb_rating", limit_offset=LimitOffset(limit=1, offset=5), cursor=cursor)
+
+        assert got[0].uuid == UUID("3bdae84f-9a04-4b04-9f7c-c05582d529e5")
+        kwargs = mock_search.call_args.kwargs
+        assert kwargs["search_after"] == [8.1, "05d7341e-e367-4e2e-acf5-4652a8435f93"]
+        assert kwargs["from_"] is None
+        assert kwargs["sort"] == [{"imdb_rating": {"order": "desc"}}, {"id": {"order": "asc"}}]
+
+    @patch.object(AsyncElasticsearch, "search", new_callable=AsyncMock)
+    async def test_find_all_with_projection(self, mock_search: AsyncMock, es_index_search_movies: dict) -> None:
+        mock_search.return_value = es_index_search_movies
+        projection = movie_projection(("genres",))
+
+        got = await self.repo.find_all(
+            sort="imdb_rating", limit_offset=LimitOffset(limit=10, offset=1), projection=projection
+        )
+
+        assert mock_search.call_args.kwargs["source_includes"] == ["id", "title", "imdb_rating", "genres"]
+        assert isinstance(got[0], MovieInfo)
+        assert got[0].genres[0].name == "Action"
+
+    @patch.object(AsyncElasticsearch, "search", new_callable=AsyncMock)
+    async def test_find_all_records_metrics(self, mock_search: AsyncMock, es_index_search_movies: dict) -> None:
+        mock_search.return_value = es_index_search_movies | {"took": 12}
+        labels = {"index": "movies", "method": "find_all"}
+        requests = REGISTRY.get_sample_value("film_service_es_request_duration_seconds_count", labels) or 0
+        took = REGISTRY.get_sample_value("film_service_es_took_seconds_sum", labels) or 0
+
+        await self.repo.find_all(sort="imdb_rating", limit_offset=LimitOffset(page_size=10, page_number=1))
+
+        assert REGISTRY.get_sample_value("film_service_es_request_duration_seconds_count", labels) == requests + 1
+        assert REGISTRY.get_sample_value("film_service_es_took_seconds_sum", labels) == pytest.approx(took + 0.012)
+
+    @patch.object(AsyncElasticsearch, "mget", new_callable=AsyncMock)
+    async def test_get_by_ids(self, mock_mget: AsyncMock, es_index_movie_one: dict[str, Any]) -> None:
+        mock_mget.return_value = {
+            "docs": [
+                es_index_movie_one,
+                {"_index": "movies", "_id": "00000000-0000-0000-0000-000000000000", "found": False},
+            ]
+        }
+        es_index_movie_one["found"] = True
+
+        got = await self.repo.get_by_ids(
+            [UUID("3bdae84f-9a04-4b04-9f7c-c05582d529e5"), UUID("00000000-0000-0000-0000-000000000000")]
+        )
+
+        assert [movie.uuid for movie in got] == [UUID("3bdae84f-9a04-4b04-9f7c-c05582d529e5")]
+        assert mock_mget.call_args.kwargs["ids"] == [
+            "3bdae84f-9a04-4b04-9f7c-c05582d529e5",
+            "00000000-0000-0000-0000-000000000000",
+        ]
+
+    @staticmethod
+    def export_page(ids: list[str], pit_id: str) -> dict:
+        hits = [{"_source": {"id": id_, "title": f"Movie {id_[:1]}", "imdb_rating": 7.0}, "sort": [id_]} for id_ in ids]
+        return {"pit_id": pit_id, "hits": {"hits": hits}}
+
+    @patch.object(AsyncElasticsearch, "close_point_in_time", new_callable=AsyncMock)
+    @patch.object(AsyncElasticsearch, "search", new_callable=AsyncMock)
+    @patch.object(AsyncElasticsearch, "open_point_in_time", new_callable=AsyncMock)
+    async def test_export_walks_index_with_point_in_time(
+        self, mock_open: AsyncMock, mock_search: AsyncMock, mock_close: AsyncMock
+    ) -> None:
+        mock_open.return_value = {"id": "pit-1"}
+        first = ["11111111-1111-4111-8111-111111111111", "22222222-2222-4222-8222-222222222222"]
+        mock_search.side_effect = [
+            self.export_page(first, "pit-2"),
+            self.export_page(["33333333-3333-4333-8333-333333333333"], "pit-2"),
+        ]
+
+        batches = self.repo.export(
+            projection=MovieInfo,
+            batch_size=2,
+            keep_alive="1m",
+            genre_uuid=UUID("3d8d9bf5-0d90-4353-88ba-4ccc5d2c07ff"),
+        )
+        got = [[str(movie.uuid) for movie in batch] async for batch in batches]
+
+        assert got == [first, ["33333333-3333-4333-8333-333333333333"]]
+        mock_open.assert_awaited_once_with(index="movies", keep_alive="1m")
+        first_params, second_params = (call.kwargs for call in mock_search.await_args_list)
+        assert "index" not in first_params and "from_" not in first_params
+        genre_filter = {"term": {"genre_ids": "3d8d9bf5-0d90-4353-88ba-4ccc5d2c07ff"}}
+        assert first_params["query"] == {"bool": {"filter": [genre_filter]}}
+        assert first_params["sort"] == [{"id": {"order": "asc"}}]
+        assert first_params["pit"] == {"id": "pit-1", "keep_alive": "1m"}
+        assert first_params["search_after"] is None
+        assert second_params["pit"] == {"id": "pit-2", "keep_alive": "1m"}
+        assert second_params["search_after"] == [first[-1]]
+        mock_close.assert_awaited_once_with(id="pit-2")
+
+    @patch.object(AsyncElasticsearch, "close_point_in_time", new_callable=AsyncMock)
+    @patch.object(AsyncElasticsearch, "search", new_callable=AsyncMock)
+    @patch.object(AsyncElasticsearch, "open_point_in_time", new_callable=AsyncMock)
+    async def test_abandoned_export_closes_point_in_time(
+        self, mock_open: AsyncMock, mock_search: AsyncMock, mock_close: AsyncMock
+    ) -> None:
+        mock_open.return_value = {"id": "pit-1"}
+        mock_search.return_value = self.export_page(["11111111-1111-4111-8111-111111111111"], "pit-1")
+
+        batches = self.repo.export(projection=MovieInfo, batch_size=1, keep_alive="1m")
+        await anext(batches)
+        await batches.aclose()
+
+        assert mock_search.await_count == 1
+        mock_close.assert_awaited_once_with(id="pit-1")
@@ -0,0 +1,102 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig, ObjectApiResponse
+from elasticsearch import ApiError, ConnectionError
+
+from db.es_repository import is_es_failure
+from db.multi_search import MultiSearch
+from db.repositories.person_es_repository import PersonElasticsearchRepository
+from models.models import LimitOffset
+
+PERSON = {"id": "67503a36-dc38-4104-abfe-3cea92db2e89", "name": "Chaim Elmakias"}
+
+
+def hits(*sources: dict) -> dict:
+    return {"hits": {"hits": [{"_source": source} for source in sources]}}
+
+
+@pytest.mark.asyncio
+class TestMultiSearch:
+    def setup_method(self) -> None:
+        self.client = AsyncMock()
+        self.multi_search = MultiSearch(client=self.client, window=0.01, max_batch=10)
+
+    async def test_concurrent_searches_share_one_request(self) -> None:
+        self.client.msearch.return_value = {"responses": [hits(PERSON), hits()]}
+
+        first, second = await asyncio.gather(
+            self.multi_search.search("persons", query={"match_all": {}}, from_=0, source_includes=["id"]),
+            self.multi_search.search("movies", query={"match_all": {}}, sort=None),
+        )
+
+        assert first == hits(PERSON) and second == hits()
+        self.client.msearch.assert_awaited_once_with(
+            searches=[
+                {"index": "persons"},
+                {"query": {"match_all": {}}, "from": 0, "_source": ["id"]},
+                {"index": "movies"},
+                {"query": {"match_all": {}}},
+            ]
+        )
+
+    async def test_max_batch_flushes_immediately(self) -> None:
+        self.multi_search = MultiSearch(client=self.client, window=10, max_batch=2)
+        self.client.msearch.return_value = {"responses": [hits(), hits()]}
+
+        await asyncio.wait_for(
+            asyncio.gather(self.multi_search.search("persons"), self.multi_search.search("persons")), timeout=1
+        )
+
+        self.client.msearch.assert_awaited_once()
+
+    async def test_error_fails_only_its_search(self) -> None:
+        self.client.msearch.return_value = {
+            "responses": [{"error": {"type": "parse_exception"}, "status": 400}, hits()]
+        }
+
+        failed, succeeded = await asyncio.gather(
+            self.multi_search.search("persons"), self.multi_search.search("persons"), return_exceptions=True
+        )
+
+        assert isinstance(failed, ApiError)
+        assert succeeded == hits()
+
+    async def test_item_error_has_its_own_status(self) -> None:
+        meta = ApiResponseMeta(200, "1.1", HttpHeaders(), 0.01, NodeConfig("http", "localhost", 9200))
+        self.client.msearch.return_value = ObjectApiResponse(
+            body={
+                "responses": [
+                    {"error": {"type": "parse_exception"}, "status": 400},
+                    {"error": {"type": "search_phase_execution_exception"}, "status": 503},
+                ]
+            },
+            meta=meta,
+        )
+
+        bad_request, unavailable = await asyncio.gather(
+            self.multi_search.search("persons"), self.multi_search.search("persons"), return_exceptions=True
+        )
+
+        assert (bad_request.meta.status, unavailable.meta.status) == (400, 503)
+        assert not is_es_failure(bad_request)
+        assert is_es_failure(unavailable)
+
+    async def test_transport_error_fails_all_searches(self) -> None:
+        self.client.msearch.side_effect = ConnectionError("down")
+
+        results = await asyncio.gather(
+            self.multi_search.search("persons"), self.multi_search.search("movies"), return_exceptions=True
+        )
+
+        assert all(isinstance(result, ConnectionError) for result in results)
+
+    async def test_repository_uses_multi_search(self) -> None:
+        self.client.msearch.return_value = {"responses": [hits(PERSON)]}
+        repo = PersonElasticsearchRepository(client=self.client, multi_search=self.multi_search)
+
+        got = await repo.search(query="Chaim", limit_offset=LimitOffset())
+
+        assert got[0].full_name == "Chaim Elmakias"
+        self.client.search.assert_not_called()
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from core import deadline
+from db.prefetcher import Prefetcher
+
+
+def dropped() -> float:
+    return REGISTRY.get_sample_value("film_service_prefetch_jobs_total", {"result": "dropped"}) or 0
+
+
+@pytest.mark.asyncio
+class TestPrefetcher:
+    async def test_pool_is_bounded(self) -> None:
+        prefetcher = Prefetcher(concurrency=1, max_pending=2)
+        release = asyncio.Event()
+        running = []
+
+        async def job(key: str) -> bool:
+            running.append(key)
+            await release.wait()
+            return True
+
+        before = dropped()
+        assert prefetcher.submit("movies:1", lambda: job("movies:1"))
+        assert prefetcher.submit("movies:2", lambda: job("movies:2"))
+        assert not prefetcher.submit("movies:3", lambda: job("movies:3"))
+        await asyncio.sleep(0.01)
+
+        assert running == ["movies:1"]
+        assert dropped() == before + 1
+        release.set()
+        await asyncio.sleep(0.01)
+        assert running == ["movies:1", "movies:2"]
+        assert prefetcher.submit("movies:3", lambda: job("movies:3"))
+        await prefetcher.close()
+
+    async def test_same_key_is_submitted_once(self) -> None:
+        prefetcher = Prefetcher(concurrency=2, max_pending=10)
+        calls = []
+
+        async def job() -> bool:
+            calls.append(deadline.remaining())
+            return False
+
+        with deadline.limit(1):
+            assert prefetcher.submit("movies:2", job)
+            assert not prefetcher.submit("movies:2", job)
+        await asyncio.sleep(0.01)
+
+        # Задание не ограничено бюджетом запроса, который его поставил
+        assert calls == [None]
+        assert prefetcher.submit("movies:2", job)
+        await prefetcher.close()
@@ -0,0 +1,274 @@
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import fakeredis.aioredis
+import pytest
+from prometheus_client import REGISTRY
+
+from core import deadline
+from db.exceptions import DeadlineExceededException
+from db.redis_repository import CachePolicy, LocalCache, RedisRepository
+from models.models import Genre
+
+GENRE = {"id": "3d8d9bf5-0d90-4353-88ba-4ccc5d2c07ff", "name": "Action"}
+
+
+def redis_client(data: bytes | None, ttl: int) -> MagicMock:
+    pipe = MagicMock()
+    pipe.get.return_value = pipe
+    pipe.ttl.return_value = pipe
+    pipe.execute = AsyncMock(return_value=[data, ttl])
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=None)
+
+    client = MagicMock()
+    client.get = AsyncMock(return_value=data)
+    client.set = AsyncMock(return_value=None)
+    client.pipeline.return_value = pipe
+    return client
+
+
+@pytest.mark.asyncio
+class TestRedisRepository:
+    policy = CachePolicy(soft_ttl=60, hard_ttl=300)
+
+    async def test_fresh_entry(self) -> None:
+        repo = RedisRepository(client=redis_client(json.dumps(GENRE).encode(), ttl=290))
+
+        got = await repo.get_object_entry("genre::1", Genre, self.policy)
+
+        assert got.value == Genre(**GENRE)
+        assert not got.stale
+
+    async def test_stale_entry(self) -> None:
+        repo = RedisRepository(client=redis_client(json.dumps([GENRE]).encode(), ttl=100))
+
+        got = await repo.get_objects_entry("genre:name:50:1", Genre, self.policy)
+
+        assert got.value == [Genre(**GENRE)]
+        assert got.stale
+
+    async def test_miss(self) -> None:
+        repo = RedisRepository(client=redis_client(None, ttl=-2))
+
+        got = await repo.get_objects_entry("genre:name:50:1", Genre, self.policy)
+
+        assert got.value == []
+        assert not got.stale
+
+    async def test_read_is_bounded_by_request_deadline(self) -> None:
+        async def slow_get(key: str) -> None:
+            await asyncio.sleep(1)
+
+        client = redis_client(None, ttl=-2)
+        client.get = slow_get
+        repo = RedisRepository(client=client)
+
+        with deadline.limit(0.01):
+            with pytest.raises(DeadlineExceededException):
+                await repo.get_object("genre::1", Genre)
+
+    async def test_without_policy_uses_plain_get(self) -> None:
+        client = redis_client(json.dumps(GENRE).encode(), ttl=1)
+        repo = RedisRepository(client=client)
+
+        got = await repo.get_object("genre::1", Genre)
+
+        assert got == Genre(**GENRE)
+        client.pipeline.assert_not_called()
+
+    async def test_load_uses_hard_ttl(self) -> None:
+        client = redis_client(None, ttl=-2)
+        repo = RedisRepository(client=client)
+
+        await repo.load_objects("genre:name:50:1", [Genre(**GENRE)], self.policy)
+
+        assert client.set.call_args.kwargs["ex"] == 300
+
+    async def test_get_by_keys_uses_single_mget(self) -> None:
+        client = redis_client(None, ttl=-2)
+        client.mget = AsyncMock(return_value=[json.dumps(GENRE).encode(), None])
+        repo = RedisRepository(client=client)
+
+        got = await repo.get_objects_by_keys(["genre::1", "genre::2"], Genre)
+
+        assert got == [Genre(**GENRE), None]
+        client.mget.assert_awaited_once_with(["v1:genre::1", "v1:genre::2"])
+
+    async def test_load_by_keys_uses_single_pipeline(self) -> None:
+        client = redis_client(None, ttl=-2)
+        repo = RedisRepository(client=client)
+
+        await repo.load_objects_by_keys({"genre::1": Genre(**GENRE), "genre::2": Genre(**GENRE)}, self.policy)
+
+        pipe = client.pipeline.return_value
+        assert pipe.set.call_count == 2
+        assert pipe.set.call_args.kwargs["ex"] == 300
+        pipe.execute.assert_awaited_once()
+        client.set.assert_not_called()
+
+    async def test_tag_index_records_key_for_each_entity(self) -> None:
+        client = redis_client(None, ttl=-2)
+        repo = RedisRepository(client=client, tag_index=True)
+
+        await repo.load_objects("genre:name:50:1", [Genre(**GENRE)], self.policy)
+
+        pipe = client.pipeline.return_value
+        pipe.set.assert_called_once()
+        tag, members = pipe.zadd.call_args.args
+        assert tag == f"tags:genre:{GENRE['id']}" and list(members) == ["genre:name:50:1"]
+        pipe.zremrangebyscore.assert_called_once()
+        pipe.expire.assert_called_once()
+        client.set.assert_not_called()
+
+    async def test_tag_set_drops_expired_keys(self, monkeypatch) -> None:
+        client = fakeredis.aioredis.FakeRedis()
+        repo = RedisRepository(client=client, tag_index=True)
+        now = time.time()
+
+        monkeypatch.setattr(time, "time", lambda: now)
+        await repo.load_objects("genre:name:50:1", [Genre(**GENRE)], CachePolicy(soft_ttl=10, hard_ttl=10))
+        await repo.load_objects("genre:name:50:2", [Genre(**GENRE)], self.policy)
+        monkeypatch.setattr(time, "time", lambda: now + 20)
+        await repo.load_objects("genre:name:50:3", [Genre(**GENRE)], self.policy)
+
+        members = await client.zrange(f"tags:genre:{GENRE['id']}", 0, -1, withscores=True)
+        assert members == [(b"genre:name:50:2", now + 300), (b"genre:name:50:3", now + 320)]
+
+    async def test_extra_tags_are_recorded(self) -> None:
+        client = redis_client(None, ttl=-2)
+        repo = RedisRepository(client=client, tag_index=True)
+
+        await repo.load_objects("person:<1>:movies:50:1", [], self.policy, {"person:1"})
+
+        tag, members = client.pipeline.return_value.zadd.call_args.args
+        assert tag == "tags:person:1" and list(members) == ["person:<1>:movies:50:1"]
+
+    async def test_shadow_copy_outlives_entry(self) -> None:
+        client = redis_client(None, ttl=-2)
+        repo = RedisRepository(client=client, shadow_ttl=86400)
+        data = json.dumps(GENRE).encode()
+
+        await repo.load_object("genre::1", Genre(**GENRE), self.policy)
+        client.get.return_value = data
+
+        pipe = client.pipeline.return_value
+        assert pipe.set.call_args_list[1].args == ("v1:shadow:genre::1", pipe.set.call_args_list[0].args[1])
+        assert pipe.set.call_args_list[1].kwargs == {"ex": 86400}
+        assert await repo.get_object_shadow("genre::1", Genre) == Genre(**GENRE)
+        client.get.assert_awaited_with("v1:shadow:genre::1")
+
+    async def test_missing_entry_is_short_lived_and_tagged(self) -> None:
+        client = redis_client(None, ttl=-2)
+        repo = RedisRepository(client=client, tag_index=True, shadow_ttl=86400, negative_ttl=30)
+
+        assert await repo.get_missing("genre::1") is None
+        await repo.load_missing("genre::1", "Genre with id=1 not found", {"genre:1"})
+        client.get.return_value = b"Genre with id=1 not found"
+
+        assert await repo.get_missing("genre::1") == "Genre with id=1 not found"
+        client.get.assert_awaited_with("v1:missing:genre::1")
+        pipe = client.pipeline.return_value
+        pipe.set.assert_called_once_with("v1:missing:genre::1", b"Genre with id=1 not found", ex=30)
+        tag, members = pipe.zadd.call_args.args
+        assert tag == "tags:genre:1" and list(members) == ["missing:genre::1"]
+
+    async def test_missing_entries_disabled(self) -> None:
+        client = redis_client(b"Genre with id=1 not found", ttl=-2)
+        repo = RedisRepository(client=client)
+
+        await repo.load_missing("genre::1", "Genre with id=1 not found")
+
+        assert await repo.get_missing("genre::1") is None
+        client.get.assert_not_awaited()
+        client.set.assert_not_awaited()
+
+    async def test_bytes_are_stored_as_is_with_tags(self) -> None:
+        client = redis_client(None, ttl=-2)
+        repo = RedisRepository(client=client, tag_index=True)
+        data = json.dumps(GENRE).encode()
+
+        await repo.load_bytes("response:/genre", data, [Genre(**GENRE)], self.policy)
+        client.get.return_value = data
+
+        assert await repo.get_bytes("response:/genre") == data
+        pipe = client.pipeline.return_value
+        pipe.set.assert_called_once_with("v1:response:/genre", data, ex=300)
+        tag, members = pipe.zadd.call_args.args
+        assert tag == f"tags:genre:{GENRE['id']}" and list(members) == ["response:/genre"]
+
+    async def test_reads_are_counted_by_key_family(self) -> None:
+        repo = RedisRepository(client=redis_client(None, ttl=-2))
+        labels = {"family": "genre", "result": "miss"}
+        before = REGISTRY.get_sample_value("film_service_cache_requests_total", labels) or 0
+
+        await repo.get_object_entry("genre::1", Genre, self.policy)
+
+        assert REGISTRY.get_sample_value("film_service_cache_requests_total", labels) == before + 1
+
+    async def test_local_cache_hit_skips_redis(self) -> None:
+        client = redis_client(json.dumps(GENRE).encode(), ttl=290)
+        local_cache = LocalCache(max_entries=10, max_bytes=1024, ttl=5)
+        repo = RedisRepository(client=client, local_cache=local_cache)
+
+        first = await repo.get_object_entry("genre::1", Genre, self.policy)
+        second = await repo.get_object_entry("genre::1", Genre, self.policy)
+
+        assert first.value == second.value == Genre(**GENRE)
+        assert client.pipeline.call_count == 1
+        assert local_cache.stats["hits"] == 1 and local_cache.stats["misses"] == 1
+
+    async def test_local_cache_skips_stale_entries(self) -> None:
+        local_cache = LocalCache(max_entries=10, max_bytes=1024, ttl=5)
+        repo = RedisRepository(client=redis_client(json.dumps(GENRE).encode(), ttl=100), local_cache=local_cache)
+
+        await repo.get_object_entry("genre::1", Genre, self.policy)
+
+        assert local_cache.get("genre::1") is None
+
+
+class TestLocalCache:
+    def test_evicts_least_recently_used_by_count(self) -> None:
+        cache = LocalCache(max_entries=2, max_bytes=1024, ttl=5)
+        cache.set("a", 1, size=1)
+        cache.set("b", 2, size=1)
+        cache.get("a")
+        cache.set("c", 3, size=1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_evicts_by_bytes(self) -> None:
+        cache = LocalCache(max_entries=10, max_bytes=10, ttl=5)
+        cache.set("a", 1, size=6)
+        cache.set("b", 2, size=6)
+        cache.set("huge", 3, size=11)
+
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.get("huge") is None
+        assert cache.stats["bytes"] == 6
+
+    def test_expires_by_ttl(self) -> None:
+        cache = LocalCache(max_entries=10, max_bytes=1024, ttl=5)
+        cache.set("a", 1, size=1, ttl=-1)
+
+        assert cache.get("a") is None
+        assert cache.stats["entries"] == 0
+
+    def test_invalidation_from_other_worker(self) -> None:
+        cache = LocalCache(max_entries=10, max_bytes=1024, ttl=5)
+        cache.set("movies:search_by:<star wars>:50:1", 1, size=1)
+        cache.set("genre::1", 2, size=1)
+
+        cache._invalidate(f"{cache.origin} genre::1")
+        cache._invalidate("other-worker movies:search_by:<star wars>:50:1")
+
+        assert cache.get("genre::1") == 2
+        assert cache.get("movies:search_by:<star wars>:50:1") is None
+
+        cache._invalidate("*")
+        assert cache.stats["entries"] == 0
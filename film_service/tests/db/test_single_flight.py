@@ -0,0 +1,72 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core import deadline
+from db.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+class TestSingleFlight:
+    async def test_concurrent_calls_share_one_loader(self) -> None:
+        single_flight = SingleFlight()
+        loader = AsyncMock()
+
+        async def slow_loader() -> list[int]:
+            await loader()
+            await asyncio.sleep(0.01)
+            return [1, 2, 3]
+
+        got = await asyncio.gather(*(single_flight.do("movies:-imdb_rating:50:1", slow_loader) for _ in range(10)))
+
+        assert got == [[1, 2, 3]] * 10
+        loader.assert_awaited_once()
+
+    async def test_loader_is_not_bound_by_request_deadline(self) -> None:
+        single_flight = SingleFlight()
+
+        async def loader() -> float | None:
+            return deadline.remaining()
+
+        with deadline.limit(1):
+            assert await single_flight.do("movie::1", loader) is None
+            assert deadline.remaining() is not None
+
+    async def test_different_keys_are_not_coalesced(self) -> None:
+        single_flight = SingleFlight()
+        loader = AsyncMock(return_value=[])
+
+        await asyncio.gather(single_flight.do("genre::1", loader), single_flight.do("genre::2", loader))
+
+        assert loader.await_count == 2
+
+    async def test_error_is_shared_and_key_released(self) -> None:
+        single_flight = SingleFlight()
+        loader = AsyncMock(side_effect=ValueError("es is down"))
+
+        got = await asyncio.gather(
+            single_flight.do("movie::1", loader), single_flight.do("movie::1", loader), return_exceptions=True
+        )
+
+        assert all(isinstance(exc, ValueError) for exc in got)
+        loader.assert_awaited_once()
+
+        loader.side_effect = None
+        loader.return_value = "movie"
+        assert await single_flight.do("movie::1", loader) == "movie"
+
+    async def test_distributed_lock(self) -> None:
+        lock = MagicMock()
+        lock.acquire = AsyncMock(return_value=True)
+        lock.release = AsyncMock()
+        redis = MagicMock()
+        redis.lock.return_value = lock
+        single_flight = SingleFlight(redis=redis)
+
+        got = await single_flight.do("movie::1", AsyncMock(return_value="movie"))
+
+        assert got == "movie"
+        assert single_flight.distributed
+        assert redis.lock.call_args.args == ("lock:movie::1",)
+        lock.release.assert_awaited_once()
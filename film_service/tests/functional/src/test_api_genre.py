@@ -1,4 +1,3 @@
-import json
 from http import HTTPStatus
 
 import aiohttp
@@ -89,43 +88,26 @@ async def test_genres(
 
 @pytest.mark.functional
 @pytest.mark.parametrize(
-    ("query_data", "redis_key", "expected_cache"),
+    ("query_data", "redis_key"),
     [
-        (
-            {"sort": "+name", "page_size": 1},
-            "genre:+name:1:1",
-            ['{"id":"6a0a479b-cfec-41ac-b520-41b2b007b611","name":"Animation"}'],
-        ),
-        (
-            {"sort": "-name", "page_size": 2},
-            "genre:-name:2:1",
-            [
-                '{"id":"0b105f87-e0a5-45dc-8ce7-f8632088f390","name":"Western"}',
-                '{"id":"a886d0ec-c3f3-4b16-b973-dedcf5bfa395","name":"Short"}',
-            ],
-        ),
-        (
-            {"sort": "name", "page_size": 2, "page_number": 5},
-            "genre:name:2:5",
-            ['{"id":"0b105f87-e0a5-45dc-8ce7-f8632088f390","name":"Western"}'],
-        ),
+        ({"sort": "+name", "page_size": 1}, "v1:genre:+name:1:1"),
+        ({"sort": "-name", "page_size": 2}, "v1:genre:-name:2:1"),
+        ({"sort": "name", "page_size": 2, "page_number": 5}, "v1:genre:name:2:5"),
     ],
 )
 @pytest.mark.asyncio
-async def test_genres_from_redis(
+async def test_genres_served_from_catalog(
     client: aiohttp.ClientSession,
     redis_client: Redis,
     query_data: dict[str, str | int],
     redis_key: str,
-    expected_cache: list[str],
 ) -> None:
     await redis_client.delete(redis_key)
-    await client.get(url=f"{settings.fast_api_dsn}/api/v1/genres", params=query_data)
+    async with client.get(url=f"{settings.fast_api_dsn}/api/v1/genres", params=query_data) as response:
+        assert response.status == HTTPStatus.OK
 
-    got = await redis_client.get(redis_key)
-
-    assert json.loads(got) == expected_cache
-    await redis_client.delete(redis_key)
+    # Жанры отдаются из справочника в памяти и в Redis не кэшируются
+    assert await redis_client.get(redis_key) is None
 
 
 @pytest.mark.functional
@@ -197,27 +179,18 @@ async def test_genre_details_unknown_genre(
 
 @pytest.mark.functional
 @pytest.mark.parametrize(
-    ("genre_id", "redis_key", "expected_cache"),
-    [
-        (
-            "fb58fd7f-7afd-447f-b833-e51e45e2a778",
-            "genre::fb58fd7f-7afd-447f-b833-e51e45e2a778",
-            {"id": "fb58fd7f-7afd-447f-b833-e51e45e2a778", "name": "Game-Show"},
-        ),
-    ],
+    ("genre_id", "redis_key"),
+    [("fb58fd7f-7afd-447f-b833-e51e45e2a778", "v1:genre::fb58fd7f-7afd-447f-b833-e51e45e2a778")],
 )
 @pytest.mark.asyncio
-async def test_genre_details_from_redis(
+async def test_genre_details_served_from_catalog(
     client: aiohttp.ClientSession,
     redis_client: Redis,
     genre_id: str,
     redis_key: str,
-    expected_cache: dict[str, str],
 ) -> None:
     await redis_client.delete(redis_key)
-    await client.get(f"{settings.fast_api_dsn}/api/v1/genres/{genre_id}/")
-
-    got = await redis_client.get(redis_key)
+    async with client.get(f"{settings.fast_api_dsn}/api/v1/genres/{genre_id}/") as response:
+        assert response.status == HTTPStatus.OK
 
-    assert json.loads(got) == expected_cache
-    await redis_client.delete(redis_key)
+    assert await redis_client.get(redis_key) is None
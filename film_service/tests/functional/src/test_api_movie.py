@@ -120,33 +120,33 @@ async def test_films(
     [
         (
             {"sort": "+imdb_rating", "page_size": 2},
-            "movies:+imdb_rating:2:1",
+            "v1:movies:+imdb_rating:2:1",
             [
-                '{"id":"c516192c-fa26-431f-bb42-4fb6c6075998","title":"To Be a Star","imdb_rating":6.1}',
-                '{"id":"a010b701-9a46-4a23-aa5d-b029c18353dd","title":"Big Star\'s Little Star","imdb_rating":6.3}',
+                {"id": "c516192c-fa26-431f-bb42-4fb6c6075998", "title": "To Be a Star", "imdb_rating": 6.1},
+                {"id": "a010b701-9a46-4a23-aa5d-b029c18353dd", "title": "Big Star's Little Star", "imdb_rating": 6.3},
             ],
         ),
         (
             {"sort": "-imdb_rating", "page_size": 3},
-            "movies:-imdb_rating:3:1",
+            "v1:movies:-imdb_rating:3:1",
             [
-                '{"id":"4df8c0cb-2cbf-4e40-b79c-fb07635775b9","title":"Star Shaped Scar","imdb_rating":8.0}',
-                '{"id":"ce98c597-42ed-4a60-af20-ec6f985d2ea2","title":"Star","imdb_rating":7.0}',
-                '{"id":"b164fef5-0867-46d8-b635-737e1721f6bf","title":"Tar with a Star","imdb_rating":6.7}',
+                {"id": "4df8c0cb-2cbf-4e40-b79c-fb07635775b9", "title": "Star Shaped Scar", "imdb_rating": 8.0},
+                {"id": "ce98c597-42ed-4a60-af20-ec6f985d2ea2", "title": "Star", "imdb_rating": 7.0},
+                {"id": "b164fef5-0867-46d8-b635-737e1721f6bf", "title": "Tar with a Star", "imdb_rating": 6.7},
             ],
         ),
         (
             {"sort": "imdb_rating", "page_size": 2, "page_number": 2},
-            "movies:imdb_rating:2:2",
+            "v1:movies:imdb_rating:2:2",
             [
-                '{"id":"b164fef5-0867-46d8-b635-737e1721f6bf","title":"Tar with a Star","imdb_rating":6.7}',
-                '{"id":"ce98c597-42ed-4a60-af20-ec6f985d2ea2","title":"Star","imdb_rating":7.0}',
+                {"id": "b164fef5-0867-46d8-b635-737e1721f6bf", "title": "Tar with a Star", "imdb_rating": 6.7},
+                {"id": "ce98c597-42ed-4a60-af20-ec6f985d2ea2", "title": "Star", "imdb_rating": 7.0},
             ],
         ),
         (
             {"genre": "6a0a479b-cfec-41ac-b520-41b2b007b611"},
-            "movies:genre_id:<6a0a479b-cfec-41ac-b520-41b2b007b611>:imdb_rating:50:1",
-            ['{"id":"b164fef5-0867-46d8-b635-737e1721f6bf","title":"Tar with a Star","imdb_rating":6.7}'],
+            "v1:movies:genre_id:<6a0a479b-cfec-41ac-b520-41b2b007b611>:imdb_rating:50:1",
+            [{"id": "b164fef5-0867-46d8-b635-737e1721f6bf", "title": "Tar with a Star", "imdb_rating": 6.7}],
         ),
     ],
 )
@@ -258,7 +258,7 @@ async def test_film_details_unknown_film(
     [
         (
             "ce98c597-42ed-4a60-af20-ec6f985d2ea2",
-            "movie::ce98c597-42ed-4a60-af20-ec6f985d2ea2",
+            "v1:movie::ce98c597-42ed-4a60-af20-ec6f985d2ea2",
             {
                 "id": "ce98c597-42ed-4a60-af20-ec6f985d2ea2",
                 "title": "Star",
@@ -84,23 +84,23 @@ async def test_persons(
     [
         (
             {"sort": "+id", "page_size": 1},
-            "persons:+id:1:1",
-            ['{"id":"0d7379fb-3013-4f24-a45b-aa1954c55a8f","name":"Haim Idisis"}'],
+            "v1:persons:+id:1:1",
+            [{"id": "0d7379fb-3013-4f24-a45b-aa1954c55a8f", "name": "Haim Idisis"}],
         ),
         (
             {"sort": "-id", "page_size": 2},
-            "persons:-id:2:1",
+            "v1:persons:-id:2:1",
             [
-                '{"id":"fcfe6f65-846f-4fc7-b034-7a9237956b7b","name":"Matthew Leitch"}',
-                '{"id":"dbdf8a38-6e59-4c83-bee6-99679cf19ca2","name":"Tony Graimes"}',
+                {"id": "fcfe6f65-846f-4fc7-b034-7a9237956b7b", "name": "Matthew Leitch"},
+                {"id": "dbdf8a38-6e59-4c83-bee6-99679cf19ca2", "name": "Tony Graimes"},
             ],
         ),
         (
             {"sort": "id", "page_size": 2, "page_number": 5},
-            "persons:id:2:5",
+            "v1:persons:id:2:5",
             [
-                '{"id":"5fc24d3d-fa60-4477-ab50-9c1d6abbefee","name":"Arnon Zadok"}',
-                '{"id":"67503a36-dc38-4104-abfe-3cea92db2e89","name":"Chaim Elmakias"}',
+                {"id": "5fc24d3d-fa60-4477-ab50-9c1d6abbefee", "name": "Arnon Zadok"},
+                {"id": "67503a36-dc38-4104-abfe-3cea92db2e89", "name": "Chaim Elmakias"},
             ],
         ),
     ],
@@ -200,7 +200,7 @@ async def test_person_details_unknown_person(
     [
         (
             "67503a36-dc38-4104-abfe-3cea92db2e89",
-            "person:::67503a36-dc38-4104-abfe-3cea92db2e89",
+            "v1:person:::67503a36-dc38-4104-abfe-3cea92db2e89",
             {
                 "uuid": "67503a36-dc38-4104-abfe-3cea92db2e89",
                 "full_name": "Chaim Elmakias",
@@ -256,8 +256,8 @@ async def test_person_films(
         (
             "67503a36-dc38-4104-abfe-3cea92db2e89",
             {"page_size": 1, "page_number": 1},
-            "person:<67503a36-dc38-4104-abfe-3cea92db2e89>:movies:1:1",
-            ['{"id":"c516192c-fa26-431f-bb42-4fb6c6075998","title":"To Be a Star","imdb_rating":6.1}'],
+            "v1:person:<67503a36-dc38-4104-abfe-3cea92db2e89>:movies:1:1",
+            [{"id": "c516192c-fa26-431f-bb42-4fb6c6075998", "title": "To Be a Star", "imdb_rating": 6.1}],
         ),
     ],
 )
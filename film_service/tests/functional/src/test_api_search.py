@@ -113,30 +113,35 @@ async def test_search(
 @pytest.mark.parametrize(
     ("url", "query_data", "redis_key", "expected_len"),
     [
-        (f"{settings.fast_api_dsn}/api/v1/films/search/", {"query": "Star"}, "movies:search_by:<Star>:50:1", 5),
+        (f"{settings.fast_api_dsn}/api/v1/films/search/", {"query": "Star"}, "v1:movies:search_by:<star>:50:1", 5),
         (
             f"{settings.fast_api_dsn}/api/v1/films/search/",
             {"query": "Star", "page_size": 2, "page_number": 1},
-            "movies:search_by:<Star>:2:1",
+            "v1:movies:search_by:<star>:2:1",
             2,
         ),
         (
             f"{settings.fast_api_dsn}/api/v1/films/search/",
             {"query": "Star", "page_size": 2, "page_number": 2},
-            "movies:search_by:<Star>:2:2",
+            "v1:movies:search_by:<star>:2:2",
+            2,
+        ),
+        (
+            f"{settings.fast_api_dsn}/api/v1/persons/search/",
+            {"query": "Kunttu"},
+            "v1:person:search_by:<kunttu>:50:1",
             2,
         ),
-        (f"{settings.fast_api_dsn}/api/v1/persons/search/", {"query": "Kunttu"}, "person:search_by:<Kunttu>:50:1", 2),
         (
             f"{settings.fast_api_dsn}/api/v1/persons/search/",
             {"query": "Kunttu", "page_size": 2, "page_number": 1},
-            "person:search_by:<Kunttu>:2:1",
+            "v1:person:search_by:<kunttu>:2:1",
             2,
         ),
         (
             f"{settings.fast_api_dsn}/api/v1/persons/search/",
             {"query": "Kunttu", "page_size": 2, "page_number": 2},
-            "person:search_by:<Kunttu>:2:2",
+            "v1:person:search_by:<kunttu>:2:2",
             0,
         ),
     ],
@@ -159,3 +164,21 @@ async def test_search_redis(
     assert got is not None
     assert len(got_data) == expected_len
     await redis_client.delete(redis_key)
+
+
+@pytest.mark.functional
+@pytest.mark.asyncio
+async def test_search_redis_normalized_query(client: aiohttp.ClientSession, redis_client: Redis) -> None:
+    url = f"{settings.fast_api_dsn}/api/v1/films/search/"
+    redis_key = "v1:movies:search_by:<star>:50:1"
+    await redis_client.delete(redis_key)
+
+    async with client.get(url=url, params={"query": "  STAR "}) as response:
+        spaced = await response.json()
+    assert await redis_client.get(redis_key) is not None
+    async with client.get(url=url, params={"query": "star"}) as response:
+        plain = await response.json()
+
+    assert spaced == plain
+    assert await redis_client.keys("v1:movies:search_by:*STAR*") == []
+    await redis_client.delete(redis_key)
@@ -16,6 +16,8 @@ SETTINGS = {
             "english_possessive_stemmer": {"type": "stemmer", "language": "possessive_english"},
             "russian_stop": {"type": "stop", "stopwords": "_russian_"},
             "russian_stemmer": {"type": "stemmer", "language": "russian"},
+            "autocomplete_edge_ngram": {"type": "edge_ngram", "min_gram": 1, "max_gram": 20},
+            "autocomplete_truncate": {"type": "truncate", "length": 20},
         },
         "analyzer": {
             "ru_en": {
@@ -29,17 +31,25 @@ SETTINGS = {
                     "russian_stemmer",
                 ],
             },
+            "autocomplete": {"tokenizer": "standard", "filter": ["lowercase", "autocomplete_edge_ngram"]},
+            "autocomplete_search": {"tokenizer": "standard", "filter": ["lowercase", "autocomplete_truncate"]},
         },
     },
 }
 
+SUGGEST_FIELD = {"type": "text", "analyzer": "autocomplete", "search_analyzer": "autocomplete_search"}
+
 INDEXES = {
     IndexName.MOVIES: {
         "dynamic": "strict",
         "properties": {
             "id": {"type": "keyword"},
             "imdb_rating": {"type": "float"},
-            "title": {"type": "text", "analyzer": "ru_en", "fields": {"raw": {"type": "keyword"}}},
+            "title": {
+                "type": "text",
+                "analyzer": "ru_en",
+                "fields": {"raw": {"type": "keyword"}, "suggest": SUGGEST_FIELD},
+            },
             "description": {"type": "text", "analyzer": "ru_en"},
             "genres_name": {"type": "keyword"},
             "directors_name": {"type": "text", "analyzer": "ru_en"},
@@ -65,6 +75,10 @@ INDEXES = {
                 "dynamic": "strict",
                 "properties": {"id": {"type": "keyword"}, "name": {"type": "text", "analyzer": "ru_en"}},
             },
+            "genre_ids": {"type": "keyword"},
+            "director_ids": {"type": "keyword"},
+            "actor_ids": {"type": "keyword"},
+            "writer_ids": {"type": "keyword"},
         },
     },
     IndexName.GENRES: {
@@ -79,7 +93,21 @@ INDEXES = {
         "dynamic": "strict",
         "properties": {
             "id": {"type": "keyword"},
-            "name": {"type": "text", "analyzer": "ru_en", "fields": {"raw": {"type": "keyword"}}},
+            "name": {
+                "type": "text",
+                "analyzer": "ru_en",
+                "fields": {"raw": {"type": "keyword"}, "suggest": SUGGEST_FIELD},
+            },
+            "films": {
+                "type": "nested",
+                "dynamic": "strict",
+                "properties": {
+                    "id": {"type": "keyword"},
+                    "title": {"type": "keyword", "index": False},
+                    "imdb_rating": {"type": "float"},
+                    "roles": {"type": "keyword"},
+                },
+            },
         },
     },
 }
@@ -199,24 +227,223 @@ ES_DATA = {
         {"id": "6d141ad2-d407-4252-bda4-95590aaf062a", "name": "Documentary"},
     ],
     IndexName.PERSONS: [
-        {"id": "2e01e457-f993-4bfe-87c3-de2ef8626cc7", "name": "Mae Questel"},
-        {"id": "448b9382-f235-478b-a013-d127f421ea4a", "name": "Jackson Beck"},
-        {"id": "89d4622f-5dde-4257-9401-36e3052de105", "name": "Jack Mercer"},
-        {"id": "cb7d11c1-9041-4bf5-84b2-728847bbf035", "name": "Carl Meyer"},
-        {"id": "3138e609-870f-4764-9a57-97d39feef7a8", "name": "Bill Tytla"},
-        {"id": "96f18d84-55e0-4718-b87f-4a9e63544d76", "name": "George Germanetti"},
-        {"id": "ae8d0f5e-3ef6-4154-97e7-389995800077", "name": "Jasmin Britney Koskiranta"},
-        {"id": "2cd4f104-b13d-4ea7-9855-e5657eb177d6", "name": "Virva Kunttu"},
-        {"id": "7065d231-afe8-402f-a8ba-7b5f8a29e1fa", "name": "Vuokko Kunttu"},
-        {"id": "31b84bca-0603-4b1d-a273-348f0085aa5f", "name": "Stephen Mulhern"},
-        {"id": "2dfcc75b-24b2-407e-bec8-a3d1d9fdb1fd", "name": "Liam Darbon"},
-        {"id": "aa486390-de5d-4988-87f4-cc867539af0b", "name": "Sasha Jackson"},
-        {"id": "dbdf8a38-6e59-4c83-bee6-99679cf19ca2", "name": "Tony Graimes"},
-        {"id": "fcfe6f65-846f-4fc7-b034-7a9237956b7b", "name": "Matthew Leitch"},
-        {"id": "578deb06-d70d-4f8c-8174-fe0cec7ae9b7", "name": "Alona Tal"},
-        {"id": "5fc24d3d-fa60-4477-ab50-9c1d6abbefee", "name": "Arnon Zadok"},
-        {"id": "67503a36-dc38-4104-abfe-3cea92db2e89", "name": "Chaim Elmakias"},
-        {"id": "ad4fe264-7624-490e-8c84-6dd53b4c5eab", "name": "Oshri Cohen"},
-        {"id": "0d7379fb-3013-4f24-a45b-aa1954c55a8f", "name": "Haim Idisis"},
+        {
+            "id": "2e01e457-f993-4bfe-87c3-de2ef8626cc7",
+            "name": "Mae Questel",
+            "films": [
+                {
+                    "id": "b164fef5-0867-46d8-b635-737e1721f6bf",
+                    "title": "Tar with a Star",
+                    "imdb_rating": 6.7,
+                    "roles": ["actor"],
+                },
+            ],
+        },
+        {
+            "id": "448b9382-f235-478b-a013-d127f421ea4a",
+            "name": "Jackson Beck",
+            "films": [
+                {
+                    "id": "b164fef5-0867-46d8-b635-737e1721f6bf",
+                    "title": "Tar with a Star",
+                    "imdb_rating": 6.7,
+                    "roles": ["actor"],
+                },
+            ],
+        },
+        {
+            "id": "89d4622f-5dde-4257-9401-36e3052de105",
+            "name": "Jack Mercer",
+            "films": [
+                {
+                    "id": "b164fef5-0867-46d8-b635-737e1721f6bf",
+                    "title": "Tar with a Star",
+                    "imdb_rating": 6.7,
+                    "roles": ["actor", "writer"],
+                },
+            ],
+        },
+        {
+            "id": "cb7d11c1-9041-4bf5-84b2-728847bbf035",
+            "name": "Carl Meyer",
+            "films": [
+                {
+                    "id": "b164fef5-0867-46d8-b635-737e1721f6bf",
+                    "title": "Tar with a Star",
+                    "imdb_rating": 6.7,
+                    "roles": ["writer"],
+                },
+            ],
+        },
+        {
+            "id": "3138e609-870f-4764-9a57-97d39feef7a8",
+            "name": "Bill Tytla",
+            "films": [
+                {
+                    "id": "b164fef5-0867-46d8-b635-737e1721f6bf",
+                    "title": "Tar with a Star",
+                    "imdb_rating": 6.7,
+                    "roles": ["director"],
+                },
+            ],
+        },
+        {
+            "id": "96f18d84-55e0-4718-b87f-4a9e63544d76",
+            "name": "George Germanetti",
+            "films": [
+                {
+                    "id": "b164fef5-0867-46d8-b635-737e1721f6bf",
+                    "title": "Tar with a Star",
+                    "imdb_rating": 6.7,
+                    "roles": ["director"],
+                },
+            ],
+        },
+        {
+            "id": "ae8d0f5e-3ef6-4154-97e7-389995800077",
+            "name": "Jasmin Britney Koskiranta",
+            "films": [
+                {
+                    "id": "4df8c0cb-2cbf-4e40-b79c-fb07635775b9",
+                    "title": "Star Shaped Scar",
+                    "imdb_rating": 8,
+                    "roles": ["actor"],
+                },
+            ],
+        },
+        {
+            "id": "2cd4f104-b13d-4ea7-9855-e5657eb177d6",
+            "name": "Virva Kunttu",
+            "films": [
+                {
+                    "id": "4df8c0cb-2cbf-4e40-b79c-fb07635775b9",
+                    "title": "Star Shaped Scar",
+                    "imdb_rating": 8,
+                    "roles": ["writer", "director"],
+                },
+            ],
+        },
+        {
+            "id": "7065d231-afe8-402f-a8ba-7b5f8a29e1fa",
+            "name": "Vuokko Kunttu",
+            "films": [
+                {
+                    "id": "4df8c0cb-2cbf-4e40-b79c-fb07635775b9",
+                    "title": "Star Shaped Scar",
+                    "imdb_rating": 8,
+                    "roles": ["writer", "director"],
+                },
+            ],
+        },
+        {
+            "id": "31b84bca-0603-4b1d-a273-348f0085aa5f",
+            "name": "Stephen Mulhern",
+            "films": [
+                {
+                    "id": "a010b701-9a46-4a23-aa5d-b029c18353dd",
+                    "title": "Big Star's Little Star",
+                    "imdb_rating": 6.3,
+                    "roles": ["actor"],
+                },
+            ],
+        },
+        {
+            "id": "2dfcc75b-24b2-407e-bec8-a3d1d9fdb1fd",
+            "name": "Liam Darbon",
+            "films": [
+                {"id": "ce98c597-42ed-4a60-af20-ec6f985d2ea2", "title": "Star", "imdb_rating": 7, "roles": ["actor"]},
+            ],
+        },
+        {
+            "id": "aa486390-de5d-4988-87f4-cc867539af0b",
+            "name": "Sasha Jackson",
+            "films": [
+                {"id": "ce98c597-42ed-4a60-af20-ec6f985d2ea2", "title": "Star", "imdb_rating": 7, "roles": ["actor"]},
+            ],
+        },
+        {
+            "id": "dbdf8a38-6e59-4c83-bee6-99679cf19ca2",
+            "name": "Tony Graimes",
+            "films": [
+                {"id": "ce98c597-42ed-4a60-af20-ec6f985d2ea2", "title": "Star", "imdb_rating": 7, "roles": ["actor"]},
+            ],
+        },
+        {
+            "id": "fcfe6f65-846f-4fc7-b034-7a9237956b7b",
+            "name": "Matthew Leitch",
+            "films": [
+                {"id": "ce98c597-42ed-4a60-af20-ec6f985d2ea2", "title": "Star", "imdb_rating": 7, "roles": ["actor"]},
+            ],
+        },
+        {
+            "id": "578deb06-d70d-4f8c-8174-fe0cec7ae9b7",
+            "name": "Alona Tal",
+            "films": [
+                {
+                    "id": "c516192c-fa26-431f-bb42-4fb6c6075998",
+                    "title": "To Be a Star",
+                    "imdb_rating": 6.1,
+                    "roles": ["actor"],
+                },
+            ],
+        },
+        {
+            "id": "5fc24d3d-fa60-4477-ab50-9c1d6abbefee",
+            "name": "Arnon Zadok",
+            "films": [
+                {
+                    "id": "c516192c-fa26-431f-bb42-4fb6c6075998",
+                    "title": "To Be a Star",
+                    "imdb_rating": 6.1,
+                    "roles": ["actor", "director"],
+                },
+            ],
+        },
+        {
+            "id": "67503a36-dc38-4104-abfe-3cea92db2e89",
+            "name": "Chaim Elmakias",
+            "films": [
+                {
+                    "id": "c516192c-fa26-431f-bb42-4fb6c6075998",
+                    "title": "To Be a Star",
+                    "imdb_rating": 6.1,
+                    "roles": ["actor"],
+                },
+            ],
+        },
+        {
+            "id": "ad4fe264-7624-490e-8c84-6dd53b4c5eab",
+            "name": "Oshri Cohen",
+            "films": [
+                {
+                    "id": "c516192c-fa26-431f-bb42-4fb6c6075998",
+                    "title": "To Be a Star",
+                    "imdb_rating": 6.1,
+                    "roles": ["actor"],
+                },
+            ],
+        },
+        {
+            "id": "0d7379fb-3013-4f24-a45b-aa1954c55a8f",
+            "name": "Haim Idisis",
+            "films": [
+                {
+                    "id": "c516192c-fa26-431f-bb42-4fb6c6075998",
+                    "title": "To Be a Star",
+                    "imdb_rating": 6.1,
+                    "roles": ["writer"],
+                },
+            ],
+        },
     ],
 }
+
+# Плоские массивы идентификаторов, как их строит MovieTransformer в ETL
+for movie in ES_DATA[IndexName.MOVIES]:
+    for field, nested in (
+        ("genre_ids", "genres"),
+        ("director_ids", "directors"),
+        ("actor_ids", "actors"),
+        ("writer_ids", "writers"),
+    ):
+        movie[field] = [item["id"] for item in movie[nested]]
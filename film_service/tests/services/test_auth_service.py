@@ -0,0 +1,95 @@
+import asyncio
+import time
+from http import HTTPStatus
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+from redis.exceptions import RedisError
+from starlette.requests import Request
+
+from core.config import settings
+from db import http_client, redis
+from services.auth_service import JWTBearer
+
+
+def make_request(token: str) -> Request:
+    return Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+
+def auth_session(status: int = HTTPStatus.OK) -> MagicMock:
+    response = MagicMock(status=status)
+    response.json = AsyncMock(return_value={"detail": "Unauthorized"})
+    response.__aenter__ = AsyncMock(return_value=response)
+    response.__aexit__ = AsyncMock(return_value=None)
+    session = MagicMock()
+    session.get.return_value = response
+    return session
+
+
+@pytest.fixture(autouse=True)
+def jwt_algorithm(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "jwt_algorithm", "HS256")
+
+
+@pytest.mark.asyncio
+class TestJWTBearer:
+    @pytest.fixture(autouse=True)
+    def setup(self, jwt_algorithm) -> None:
+        self.token = jwt.encode(
+            {"sub": "user", "jti": "token-jti", "exp": time.time() + 600},
+            settings.jwt_secret_key,
+            algorithm=settings.jwt_algorithm,
+        )
+        self.bearer = JWTBearer()
+        redis.redis = AsyncMock()
+        redis.redis.get.return_value = None
+        http_client.session = auth_session()
+
+    def teardown_method(self) -> None:
+        redis.redis = None
+        http_client.session = None
+
+    async def test_introspection_is_cached_by_jti(self) -> None:
+        first = await self.bearer(make_request(self.token))
+        second = await self.bearer(make_request(self.token))
+
+        assert first["jti"] == second["jti"] == "token-jti"
+        assert http_client.session.get.call_count == 1
+        assert redis.redis.get.await_count == 2
+
+    async def test_revoked_token(self) -> None:
+        await self.bearer(make_request(self.token))
+        redis.redis.get.return_value = b"true"
+
+        with pytest.raises(HTTPException) as exc:
+            await self.bearer(make_request(self.token))
+
+        assert exc.value.status_code == HTTPStatus.UNAUTHORIZED
+
+    async def test_redis_unavailable_skips_cache(self) -> None:
+        redis.redis.get.side_effect = RedisError("down")
+
+        await self.bearer(make_request(self.token))
+        await self.bearer(make_request(self.token))
+
+        assert http_client.session.get.call_count == 2
+
+    async def test_failed_introspection_is_not_cached(self) -> None:
+        http_client.session = auth_session(HTTPStatus.UNAUTHORIZED)
+
+        with pytest.raises(HTTPException):
+            await self.bearer(make_request(self.token))
+        http_client.session = auth_session()
+        await self.bearer(make_request(self.token))
+
+        assert http_client.session.get.call_count == 1
+
+    async def test_session_timeout_is_gateway_timeout(self) -> None:
+        http_client.session.get.return_value.__aenter__.side_effect = asyncio.TimeoutError
+
+        with pytest.raises(HTTPException) as exc:
+            await self.bearer(make_request(self.token))
+
+        assert exc.value.status_code == HTTPStatus.GATEWAY_TIMEOUT
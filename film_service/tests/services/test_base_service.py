@@ -0,0 +1,222 @@
+import asyncio
+from unittest.mock import AsyncMock
+from uuid import UUID
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from core import deadline
+from core.degradation import served_stale, track_request
+from db.exceptions import DeadlineExceededException, GenreNotFoundException, ServiceUnavailableException
+from db.redis_repository import CacheEntry, CachePolicy
+from models.models import Cursor, Genre, LimitOffset, MovieInfo, Person, get_cursor
+from services.base_service import BaseService, normalize_query
+
+GENRE = Genre(id="3d8d9bf5-0d90-4353-88ba-4ccc5d2c07ff", name="Action")
+POLICY = CachePolicy(soft_ttl=60, hard_ttl=300)
+
+
+async def slow_loader() -> Genre:
+    await asyncio.sleep(1)
+    return GENRE
+
+
+@pytest.mark.asyncio
+class TestBaseService:
+    def setup_method(self) -> None:
+        self.redis_repo = AsyncMock()
+        self.service = BaseService(redis_repository=self.redis_repo)
+
+    async def test_miss_loads_and_caches(self) -> None:
+        self.redis_repo.get_object_entry.return_value = CacheEntry(None)
+        loader = AsyncMock(return_value=GENRE)
+
+        got = await self.service._get_object("genre::1", Genre, loader, POLICY)
+
+        assert got == GENRE
+        loader.assert_awaited_once()
+        self.redis_repo.load_object.assert_awaited_once_with("genre::1", GENRE, POLICY)
+
+    async def test_stale_value_is_served_and_refreshed_in_background(self) -> None:
+        stale = Genre(id="3d8d9bf5-0d90-4353-88ba-4ccc5d2c07ff", name="Old action")
+        self.redis_repo.get_object_entry.return_value = CacheEntry(stale, stale=True)
+        loader = AsyncMock(return_value=GENRE)
+
+        got = await self.service._get_object("genre::1", Genre, loader, POLICY)
+        await asyncio.sleep(0)
+
+        assert got == stale
+        loader.assert_awaited_once()
+        self.redis_repo.load_object.assert_awaited_once_with("genre::1", GENRE, POLICY)
+
+    async def test_fresh_value_is_not_refreshed(self) -> None:
+        self.redis_repo.get_objects_entry.return_value = CacheEntry([GENRE])
+        loader = AsyncMock()
+
+        got = await self.service._get_objects("genre:name:50:1", Genre, loader, POLICY)
+        await asyncio.sleep(0)
+
+        assert got == [GENRE]
+        loader.assert_not_awaited()
+
+    async def test_shadow_copy_is_served_when_es_is_unavailable(self) -> None:
+        track_request()
+        self.redis_repo.get_objects_entry.return_value = CacheEntry([])
+        self.redis_repo.get_objects_shadow.return_value = [GENRE]
+        loader = AsyncMock(side_effect=ServiceUnavailableException("Circuit elasticsearch is open"))
+
+        got = await self.service._get_objects("genre:name:50:1", Genre, loader, POLICY)
+
+        assert got == [GENRE]
+        assert served_stale()
+        self.redis_repo.load_objects.assert_not_awaited()
+
+    async def test_unavailable_without_shadow_copy(self) -> None:
+        track_request()
+        self.redis_repo.get_object_entry.return_value = CacheEntry(None)
+        self.redis_repo.get_object_shadow.return_value = None
+        loader = AsyncMock(side_effect=ServiceUnavailableException("Circuit elasticsearch is open"))
+
+        with pytest.raises(ServiceUnavailableException):
+            await self.service._get_object("genre::1", Genre, loader, POLICY)
+        assert not served_stale()
+
+    async def test_shadow_copy_is_served_when_deadline_allows_partial(self) -> None:
+        track_request()
+        self.redis_repo.get_object_entry.return_value = CacheEntry(None)
+        self.redis_repo.get_object_shadow.return_value = GENRE
+
+        with deadline.limit(0.06, partial=True, reserve=0.05):
+            got = await self.service._get_object("genre::1", Genre, slow_loader, POLICY)
+            assert deadline.remaining() > 0
+
+        assert got == GENRE
+        assert served_stale()
+
+    async def test_deadline_without_partial(self) -> None:
+        track_request()
+        self.redis_repo.get_object_entry.return_value = CacheEntry(None)
+
+        with deadline.limit(0.01):
+            with pytest.raises(DeadlineExceededException):
+                await self.service._get_object("genre::1", Genre, slow_loader, POLICY)
+
+        self.redis_repo.get_object_shadow.assert_not_awaited()
+        assert not served_stale()
+
+    async def test_prefetch_skips_cached_key(self) -> None:
+        self.redis_repo.exists.return_value = True
+        loader = AsyncMock()
+
+        assert not await self.service._prefetch_objects("genre:name:50:2", Genre, loader, POLICY)
+
+        loader.assert_not_awaited()
+        self.redis_repo.load_objects.assert_not_awaited()
+
+    async def test_not_found_is_cached(self) -> None:
+        self.redis_repo.get_object_entry.return_value = CacheEntry(None)
+        self.redis_repo.get_missing.return_value = None
+        loader = AsyncMock(side_effect=GenreNotFoundException("Genre with id=1 not found"))
+
+        with pytest.raises(GenreNotFoundException):
+            await self.service._get_object(
+                "genre::1", Genre, loader, POLICY, not_found=GenreNotFoundException, tags={"genre:1"}
+            )
+
+        self.redis_repo.load_missing.assert_awaited_once_with("genre::1", "Genre with id=1 not found", {"genre:1"})
+
+    async def test_cached_not_found_skips_loader(self) -> None:
+        self.redis_repo.get_object_entry.return_value = CacheEntry(None)
+        self.redis_repo.get_missing.return_value = "Genre with id=1 not found"
+        loader = AsyncMock()
+
+        with pytest.raises(GenreNotFoundException) as exc_info:
+            await self.service._get_object("genre::1", Genre, loader, POLICY, not_found=GenreNotFoundException)
+
+        assert exc_info.value.detail == "Genre with id=1 not found"
+        loader.assert_not_awaited()
+
+    async def test_not_found_without_negative_caching(self) -> None:
+        self.redis_repo.get_object_entry.return_value = CacheEntry(None)
+        loader = AsyncMock(side_effect=GenreNotFoundException("Genre with id=1 not found"))
+
+        with pytest.raises(GenreNotFoundException):
+            await self.service._get_object("genre::1", Genre, loader, POLICY)
+
+        self.redis_repo.get_missing.assert_not_awaited()
+        self.redis_repo.load_missing.assert_not_awaited()
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("Star Wars", "star wars"),
+        ("  star \t\n  WARS ", "star wars"),
+        ("ＳＴＡＲ", "star"),
+        ("Straße", "strasse"),
+        ("   ", ""),
+    ],
+)
+def test_normalize_query(query: str, expected: str) -> None:
+    assert normalize_query(query) == expected
+
+
+class TestNextCursor:
+    def test_cursor_from_last_row_with_id_tiebreaker(self) -> None:
+        movies = [
+            MovieInfo(id="05d7341e-e367-4e2e-acf5-4652a8435f93", title="Star Wars", imdb_rating=8.1),
+            MovieInfo(id="3bdae84f-9a04-4b04-9f7c-c05582d529e5", title="Star Wars III", imdb_rating=7.2),
+        ]
+
+        got = BaseService.next_cursor(movies, "-imdb_rating", LimitOffset(page_size=2))
+
+        assert got.search_after == [7.2, UUID("3bdae84f-9a04-4b04-9f7c-c05582d529e5")]
+        decoded = Cursor.decode(got.encode(), "-imdb_rating")
+        assert decoded.search_after == [7.2, "3bdae84f-9a04-4b04-9f7c-c05582d529e5"]
+
+    def test_cursor_by_id(self) -> None:
+        person = Person(id="06c281cf-c2be-46b7-930c-8f4975f07b02", name="David Anghel")
+
+        got = BaseService.next_cursor([person], "id", LimitOffset(page_size=1))
+
+        assert got.search_after == [UUID("06c281cf-c2be-46b7-930c-8f4975f07b02")]
+
+    def test_last_page_has_no_cursor(self) -> None:
+        assert BaseService.next_cursor([GENRE], "id", LimitOffset(page_size=2)) is None
+        assert BaseService.next_cursor([], "id", LimitOffset(page_size=2)) is None
+
+    @pytest.mark.parametrize(
+        ("search_after", "sort"),
+        [
+            ([7.2, "3bdae84f-9a04-4b04-9f7c-c05582d529e5"], "imdb_rating"),
+            (["3bdae84f-9a04-4b04-9f7c-c05582d529e5"], "-imdb_rating"),
+            (["x", "3bdae84f-9a04-4b04-9f7c-c05582d529e5"], "-imdb_rating"),
+            ([None, "3bdae84f-9a04-4b04-9f7c-c05582d529e5"], "-imdb_rating"),
+        ],
+    )
+    def test_cursor_for_other_sort_is_rejected(self, search_after: list, sort: str) -> None:
+        token = Cursor(sort="-imdb_rating", search_after=search_after).encode()
+
+        with pytest.raises(ValueError):
+            Cursor.decode(token, sort)
+
+    def test_cursor_sort_with_explicit_asc(self) -> None:
+        token = Cursor(sort="imdb_rating", search_after=[7, "3bdae84f-9a04-4b04-9f7c-c05582d529e5"]).encode()
+
+        assert Cursor.decode(token, "+imdb_rating").search_after == [7, "3bdae84f-9a04-4b04-9f7c-c05582d529e5"]
+
+    @pytest.mark.parametrize("token", ["W10", "WyJ4Il0", "e30"])
+    def test_invalid_cursor(self, token: str) -> None:
+        with pytest.raises(ValueError):
+            Cursor.decode(token, "id")
+
+    def test_cursor_dependency_rejects_mismatch_with_422(self) -> None:
+        token = Cursor(sort="id", search_after=["06c281cf-c2be-46b7-930c-8f4975f07b02"]).encode()
+        request = Request({"type": "http", "query_string": b"sort=-imdb_rating", "headers": []})
+
+        with pytest.raises(HTTPException) as exc:
+            get_cursor("imdb_rating")(request, token)
+
+        assert exc.value.status_code == 422
+        assert get_cursor("id")(Request({"type": "http", "query_string": b"", "headers": []}), token).sort == "id"
@@ -0,0 +1,53 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from core.config import WarmupConfig
+from models.models import Genre
+from services.cache_warmer import CacheWarmer
+
+
+def genres(count: int) -> list[Genre]:
+    return [Genre(id=uuid4(), name=f"genre {index}") for index in range(count)]
+
+
+@pytest.mark.asyncio
+class TestCacheWarmer:
+    def setup_method(self) -> None:
+        self.movie_service = MagicMock()
+        self.movie_service.find_movies = AsyncMock(return_value=[])
+        self.movie_service.find_movies_by_genre_uuid = AsyncMock(return_value=[])
+        self.genre_service = MagicMock()
+        self.config = WarmupConfig(movie_sorts=["-imdb_rating", "imdb_rating"], movie_pages=2, page_size=2)
+        self.warmer = CacheWarmer(self.movie_service, self.genre_service, self.config)
+
+    async def test_warm_replays_hot_queries(self) -> None:
+        self.genre_service.find_genres = AsyncMock(side_effect=[genres(2), genres(1)])
+
+        report = await self.warmer.warm()
+
+        assert self.genre_service.find_genres.await_count == 2
+        assert self.movie_service.find_movies.await_count == 4
+        assert self.movie_service.find_movies_by_genre_uuid.await_count == 6
+        assert report.keys == 12
+        assert report.failed == 0
+
+    async def test_failed_queries_are_reported(self) -> None:
+        self.genre_service.find_genres = AsyncMock(side_effect=ConnectionError)
+        self.movie_service.find_movies.side_effect = [[], ConnectionError, [], []]
+
+        report = await self.warmer.warm()
+
+        self.movie_service.find_movies_by_genre_uuid.assert_not_awaited()
+        assert report.keys == 3
+        assert report.failed == 2
+
+    async def test_concurrent_warm_now_share_one_run(self) -> None:
+        self.genre_service.find_genres = AsyncMock(return_value=genres(1))
+
+        first, second = await asyncio.gather(self.warmer.warm_now(), self.warmer.warm_now())
+
+        assert first == second
+        assert self.genre_service.find_genres.await_count == 1
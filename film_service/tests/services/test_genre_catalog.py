@@ -0,0 +1,126 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+from uuid import UUID
+
+import pytest
+
+from db.exceptions import GenreNotFoundException
+from models.models import Genre, LimitOffset
+from services.genre_catalog import GenreCatalog, GenreSnapshot
+from services.genre_service import GenreService
+from services.movie_service import MovieService
+
+DRAMA = Genre(id=UUID("00000000-0000-4000-8000-000000000003"), name="Drama")
+ACTION = Genre(id=UUID("00000000-0000-4000-8000-000000000002"), name="Action")
+# Жанр с тем же названием: при равных значениях порядок по возрастанию id
+ACTION_2 = Genre(id=UUID("00000000-0000-4000-8000-000000000001"), name="Action")
+GENRES = [DRAMA, ACTION, ACTION_2]
+
+
+@pytest.mark.parametrize(
+    ("sort", "expected"),
+    [
+        ("name", [ACTION_2, ACTION, DRAMA]),
+        ("+name", [ACTION_2, ACTION, DRAMA]),
+        ("-name", [DRAMA, ACTION_2, ACTION]),
+        ("id", [ACTION_2, ACTION, DRAMA]),
+        ("-id", [DRAMA, ACTION, ACTION_2]),
+    ],
+)
+def test_snapshot_sorting(sort: str, expected: list[Genre]) -> None:
+    snapshot = GenreSnapshot(GENRES)
+
+    assert snapshot.page(sort, LimitOffset(page_size=10, page_number=1)) == expected
+
+
+def test_snapshot_paging() -> None:
+    snapshot = GenreSnapshot(GENRES)
+
+    assert snapshot.page("name", LimitOffset(page_size=2, page_number=2)) == [DRAMA]
+    assert snapshot.page("name", LimitOffset(page_size=2, page_number=3)) == []
+    assert snapshot.by_id[DRAMA.uuid] is DRAMA
+
+
+@pytest.mark.asyncio
+class TestGenreCatalog:
+    async def test_refresh_loads_all_pages(self) -> None:
+        repo = MagicMock()
+        repo.find_all = AsyncMock(side_effect=[[ACTION_2, ACTION], [DRAMA]])
+        catalog = GenreCatalog(repo, page_size=2)
+
+        assert not catalog.ready
+        assert await catalog.refresh()
+
+        assert catalog.ready
+        assert set(catalog.snapshot.by_id) == {genre.uuid for genre in GENRES}
+        assert repo.find_all.await_args.kwargs["limit_offset"].offset == 2
+
+    async def test_failed_refresh_keeps_snapshot(self) -> None:
+        repo = MagicMock()
+        repo.find_all = AsyncMock(side_effect=[[DRAMA], ConnectionError("down")])
+        catalog = GenreCatalog(repo)
+        await catalog.refresh()
+        snapshot = catalog.snapshot
+
+        assert not await catalog.refresh()
+        assert catalog.snapshot is snapshot
+
+    async def test_listen_refreshes_on_genre_events(self) -> None:
+        catalog = GenreCatalog(MagicMock())
+        catalog.refresh = AsyncMock(return_value=True)
+        redis = MagicMock()
+        redis.xread = AsyncMock(
+            side_effect=[
+                [(b"etl:events", [(b"1-0", {b"index": b"movies"})])],
+                [(b"etl:events", [(b"2-0", {b"index": b"genres"})])],
+                asyncio.CancelledError(),
+            ]
+        )
+
+        with pytest.raises(asyncio.CancelledError):
+            await catalog.listen(redis)
+
+        catalog.refresh.assert_awaited_once()
+        assert list(redis.xread.await_args.args[0].values()) == [b"2-0"]
+
+
+@pytest.mark.asyncio
+class TestServicesWithCatalog:
+    async def catalog(self) -> GenreCatalog:
+        repo = MagicMock()
+        repo.find_all = AsyncMock(return_value=GENRES)
+        catalog = GenreCatalog(repo)
+        await catalog.refresh()
+        return catalog
+
+    async def test_genre_service_reads_from_catalog(self) -> None:
+        redis_repo = MagicMock()
+        service = GenreService(redis_repo, MagicMock(), genre_catalog=await self.catalog())
+
+        assert await service.get_genre_by_id(DRAMA.uuid) is DRAMA
+        assert await service.find_genres("-name", LimitOffset(page_size=1, page_number=1)) == [DRAMA]
+        with pytest.raises(GenreNotFoundException):
+            await service.get_genre_by_id(UUID("00000000-0000-4000-8000-000000000009"))
+        assert not redis_repo.method_calls
+
+    async def test_movies_of_unknown_genre(self) -> None:
+        redis_repo = MagicMock()
+        movie_repo = MagicMock()
+        service = MovieService(redis_repo, movie_repo, genre_catalog=await self.catalog())
+
+        got = await service.find_movies_by_genre_uuid(
+            UUID("00000000-0000-4000-8000-000000000009"), sort="-imdb_rating", limit_offset=LimitOffset()
+        )
+
+        assert got == []
+        assert not redis_repo.method_calls
+        assert not movie_repo.method_calls
+
+    async def test_export_of_unknown_genre(self) -> None:
+        movie_repo = MagicMock()
+        service = MovieService(MagicMock(), movie_repo, genre_catalog=await self.catalog())
+
+        got = [batch async for batch in service.export_movies(UUID("00000000-0000-4000-8000-000000000009"))]
+
+        assert got == []
+        assert not movie_repo.method_calls
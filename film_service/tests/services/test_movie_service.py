@@ -5,7 +5,7 @@ import pytest
 
 from db.exceptions import MovieNotFoundException
 from db.repositories.movie_es_repository import MoviesElasticsearchRepository
-from models.models import LimitOffset, Movie
+from models.models import Cursor, LimitOffset, Movie, MovieInfo
 from services.movie_service import MovieService
 
 
@@ -98,3 +98,74 @@ class TestMovieService:
         assert got == []
         self.redis_client.get.assert_called_once()
         self.redis_client.set.assert_called_once()
+
+
+@pytest.mark.asyncio
+class TestMovieServiceBatch:
+    def setup_method(self) -> None:
+        self.redis_repo = AsyncMock()
+        self.movie_repo = AsyncMock()
+        self.service = MovieService(redis_repository=self.redis_repo, movie_repository=self.movie_repo)
+
+    async def test_get_movies_by_ids_keeps_request_order(self, default_movie: Movie) -> None:
+        other = default_movie.copy(update={"uuid": UUID("05d7341e-e367-4e2e-acf5-4652a8435f93")})
+        missing = UUID("00000000-0000-0000-0000-000000000000")
+        self.redis_repo.get_objects_by_keys.return_value = [None, default_movie, None]
+        self.movie_repo.get_by_ids.return_value = [other]
+
+        got = await self.service.get_movies_by_ids([other.uuid, default_movie.uuid, missing, other.uuid])
+
+        assert got == [other, default_movie]
+        self.redis_repo.get_objects_by_keys.assert_awaited_once()
+        self.movie_repo.get_by_ids.assert_awaited_once_with([other.uuid, missing])
+        assert list(self.redis_repo.load_objects_by_keys.call_args.args[0]) == [f"movie::{other.uuid}"]
+
+    async def test_get_movies_by_ids_all_cached(self, default_movie: Movie) -> None:
+        self.redis_repo.get_objects_by_keys.return_value = [default_movie]
+
+        got = await self.service.get_movies_by_ids([default_movie.uuid])
+
+        assert got == [default_movie]
+        self.movie_repo.get_by_ids.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+class TestMovieServicePrefetch:
+    ROWS = [
+        MovieInfo(id=UUID("3bdae84f-9a04-4b04-9f7c-c05582d529e5"), title="Star", imdb_rating=8.5),
+        MovieInfo(id=UUID("05d7341e-e367-4e2e-acf5-4652a8435f93"), title="Wars", imdb_rating=7.5),
+    ]
+
+    def setup_method(self) -> None:
+        self.redis_repo = AsyncMock()
+        self.movie_repo = AsyncMock()
+        self.prefetcher = MagicMock()
+        self.service = MovieService(
+            redis_repository=self.redis_repo, movie_repository=self.movie_repo, prefetcher=self.prefetcher
+        )
+
+    async def test_next_page_number_is_loaded_if_not_cached(self) -> None:
+        self.service.prefetch_next_page(self.ROWS, "-imdb_rating", LimitOffset(page_size=2, page_number=3))
+
+        key, job = self.prefetcher.submit.call_args.args
+        assert key == "movies:-imdb_rating:2:4"
+        self.redis_repo.exists.return_value = False
+        self.movie_repo.find_all.return_value = self.ROWS
+        assert await job()
+        assert self.movie_repo.find_all.await_args.kwargs["limit_offset"].offset == 4
+        self.redis_repo.load_objects.assert_awaited_once()
+
+    async def test_next_cursor_page_of_genre(self) -> None:
+        genre = UUID("40f95fa9-7088-492f-bcf6-024e7c83cb09")
+        cursor = Cursor(sort="-imdb_rating", search_after=[9.0, "00000000-0000-0000-0000-000000000000"])
+
+        self.service.prefetch_next_page(self.ROWS, "-imdb_rating", LimitOffset(page_size=2), cursor, genre_uuid=genre)
+
+        next_cursor = Cursor(sort="-imdb_rating", search_after=[7.5, "05d7341e-e367-4e2e-acf5-4652a8435f93"])
+        key, _ = self.prefetcher.submit.call_args.args
+        assert key == f"movies:genre_id:<{genre}>:-imdb_rating:2:after:<{next_cursor.encode()}>"
+
+    async def test_last_page_is_not_prefetched(self) -> None:
+        self.service.prefetch_next_page(self.ROWS[:1], "-imdb_rating", LimitOffset(page_size=2))
+
+        self.prefetcher.submit.assert_not_called()
@@ -1,10 +1,12 @@
 from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import UUID
 
 import pytest
 from elasticsearch import AsyncElasticsearch
 
 from db.repositories.person_es_repository import PersonElasticsearchRepository
-from models.models import LimitOffset, PersonInfo
+from db.redis_repository import CacheEntry
+from models.models import LimitOffset, MovieInfo, PersonFilmography, PersonInfo, Role
 from services.person_service import PersonService
 
 
@@ -25,7 +27,6 @@ class TestMovieService:
         self.service = PersonService(
             redis_client=self.redis_client,
             person_repository=PersonElasticsearchRepository(client=AsyncElasticsearch("http://test:9200/")),
-            movie_repository=AsyncMock(),
         )
 
     @patch.object(AsyncElasticsearch, "search", new_callable=AsyncMock)
@@ -63,3 +64,79 @@ class TestMovieService:
         assert isinstance(got[0], PersonInfo)
         self.redis_client.get.assert_called_once()
         self.redis_client.set.assert_called_once()
+
+
+@pytest.mark.asyncio
+class TestPersonServiceFilmography:
+    def setup_method(self) -> None:
+        self.redis_repo = AsyncMock()
+        self.redis_repo.get_object_entry.return_value = CacheEntry(None)
+        self.redis_repo.get_objects_entry.return_value = CacheEntry([])
+        self.redis_repo.get_missing.return_value = None
+        self.person_repo = AsyncMock()
+        self.person_repo.get_by_id.return_value = PersonFilmography(
+            id="67503a36-dc38-4104-abfe-3cea92db2e89",
+            name="Chaim Elmakias",
+            films=[
+                {
+                    "id": "c516192c-fa26-431f-bb42-4fb6c6075998",
+                    "title": "To Be a Star",
+                    "imdb_rating": 6.1,
+                    "roles": ["actor", "writer"],
+                },
+                {
+                    "id": "b164fef5-0867-46d8-b635-737e1721f6bf",
+                    "title": "Tar with a Star",
+                    "imdb_rating": 5.2,
+                    "roles": ["director"],
+                },
+            ],
+        )
+        self.movie_repo = AsyncMock()
+        self.service = PersonService(
+            redis_repository=self.redis_repo, person_repository=self.person_repo, movie_repository=self.movie_repo
+        )
+
+    async def test_get_person_by_id_from_single_document(self) -> None:
+        got = await self.service.get_person_by_id(id_=UUID("67503a36-dc38-4104-abfe-3cea92db2e89"))
+
+        assert got.full_name == "Chaim Elmakias"
+        assert [film.roles for film in got.films] == [[Role.ACTOR, Role.WRITER], [Role.DIRECTOR]]
+        self.person_repo.get_by_id.assert_awaited_once()
+
+    async def test_film_without_rating(self) -> None:
+        self.person_repo.get_by_id.return_value = PersonFilmography.parse_obj(
+            {
+                "id": "67503a36-dc38-4104-abfe-3cea92db2e89",
+                "name": "Chaim Elmakias",
+                "films": [
+                    {
+                        "id": "c516192c-fa26-431f-bb42-4fb6c6075998",
+                        "title": "To Be a Star",
+                        "imdb_rating": None,
+                        "roles": ["actor"],
+                    }
+                ],
+            }
+        )
+
+        got = await self.service.get_person_by_id(id_=UUID("67503a36-dc38-4104-abfe-3cea92db2e89"))
+
+        assert [film.uuid for film in got.films] == [UUID("c516192c-fa26-431f-bb42-4fb6c6075998")]
+
+    async def test_find_movies_by_person_uuid_from_movies_index(self) -> None:
+        self.movie_repo.find_by_person_ids.return_value = [
+            MovieInfo(id="b164fef5-0867-46d8-b635-737e1721f6bf", title="Tar with a Star", imdb_rating=5.2)
+        ]
+        limit_offset = LimitOffset(page_size=1, page_number=2)
+
+        got = await self.service.find_movies_by_person_uuid(
+            person_uuid=UUID("67503a36-dc38-4104-abfe-3cea92db2e89"), limit_offset=limit_offset
+        )
+
+        assert got == [MovieInfo(id="b164fef5-0867-46d8-b635-737e1721f6bf", title="Tar with a Star", imdb_rating=5.2)]
+        self.movie_repo.find_by_person_ids.assert_awaited_once_with(
+            [UUID("67503a36-dc38-4104-abfe-3cea92db2e89")], limit_offset
+        )
+        self.person_repo.get_by_id.assert_not_awaited()
+        assert self.redis_repo.load_objects.await_args.args[3] == {"person:67503a36-dc38-4104-abfe-3cea92db2e89"}
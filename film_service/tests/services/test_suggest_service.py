@@ -0,0 +1,63 @@
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from db.redis_repository import CacheEntry
+from models.models import MovieInfo, Person, Suggestions
+from services.suggest_service import SuggestService, normalize_prefix
+
+MOVIE = MovieInfo(id=uuid4(), title="Star Wars", imdb_rating=8.6)
+PERSON = Person(id=uuid4(), name="Stanley Kubrick")
+
+
+@pytest.mark.parametrize(
+    ("prefix", "expected"),
+    [
+        ("Star", "star"),
+        ("  star   WA ", "star wa"),
+        ("Straße", "straße"),
+        ("a" * 25 + " b", "a" * 20 + " b"),
+        ("   ", ""),
+    ],
+)
+def test_normalize_prefix(prefix: str, expected: str) -> None:
+    assert normalize_prefix(prefix) == expected
+
+
+@pytest.mark.asyncio
+class TestSuggestService:
+    def setup_method(self) -> None:
+        self.redis_repo = MagicMock()
+        self.redis_repo.get_object_entry = AsyncMock(return_value=CacheEntry(None))
+        self.redis_repo.load_object = AsyncMock()
+        self.movie_repo = MagicMock()
+        self.movie_repo.suggest = AsyncMock(return_value=[MOVIE])
+        self.person_repo = MagicMock()
+        self.person_repo.suggest = AsyncMock(return_value=[PERSON])
+        self.service = SuggestService(self.redis_repo, self.movie_repo, self.person_repo)
+
+    async def test_suggest_uses_normalized_prefix(self) -> None:
+        got = await self.service.suggest("  STAR  ", size=5)
+
+        assert got == Suggestions(films=[MOVIE], persons=[PERSON])
+        self.movie_repo.suggest.assert_awaited_once_with(prefix="star", size=5)
+        self.person_repo.suggest.assert_awaited_once_with(prefix="star", size=5)
+        assert self.redis_repo.get_object_entry.await_args.args[0] == "suggest:<star>:5"
+        self.redis_repo.load_object.assert_awaited_once()
+
+    async def test_cached_suggestions(self) -> None:
+        cached = Suggestions(films=[MOVIE], persons=[])
+        self.redis_repo.get_object_entry.return_value = CacheEntry(cached)
+
+        got = await self.service.suggest("Star", size=5)
+
+        assert got is cached
+        self.movie_repo.suggest.assert_not_awaited()
+
+    async def test_blank_prefix(self) -> None:
+        got = await self.service.suggest("   ", size=5)
+
+        assert got == Suggestions(films=[], persons=[])
+        self.redis_repo.get_object_entry.assert_not_awaited()
+        self.movie_repo.suggest.assert_not_awaited()
@@ -11,6 +11,7 @@ from etl.loader.loader import EsLoader
 from etl.transformer import Transformer
 from utils.backoff import backoff
 from utils.configs import BaseConfig
+from utils.events import ChangesPublisher
 from utils.factory import EtlFactory, GenreEtlFactory, MovieEtlFactory, PersonEtlFactory
 from utils.logger import get_logger
 from utils.state import State
@@ -19,14 +20,19 @@ from utils.storage import RedisStorage
 
 @backoff(elasticsearch.exceptions.ConnectionError)
 @backoff(psycopg2.OperationalError)
+@backoff(redis.exceptions.ConnectionError)
 def etl_process(
     logger: logging.Logger,
     extractor: Extractor,
     transformer: Transformer,
     state: State,
     loader: EsLoader,
+    publisher: ChangesPublisher,
 ) -> None:
-    """Основной скрипт вызгурзки, преобразования и загрузки данных"""
+    """Основной скрипт вызгурзки, преобразования и загрузки данных.
+
+    После каждой загрузки пачки идентификаторы записей публикуются для инвалидации кэша film_service.
+    """
 
     started = datetime.now()
     last_sync = state.get_state("updated")
@@ -36,6 +42,7 @@ def etl_process(
     for extracted in extractor.extract(last_update):
         transformed = transformer.transform(extracted)
         loader.load_data_to_index(transformed)
+        publisher.publish(loader.index.name, [row["id"] for row in transformed])
         state.set_state("updated", str(started))
 
 
@@ -62,7 +69,7 @@ def etl(etl_pipline_names: list[str]) -> None:
         )
         transformer = factory.create_transformer()
         loader = EsLoader(elastic_dsn=configs.es_dsn.host, logger=logger, index=index)
-        etl_process(logger, extractor, transformer, state, loader)
+        etl_process(logger, extractor, transformer, state, loader, publisher)
 
 
 if __name__ == "__main__":
@@ -71,6 +78,9 @@ if __name__ == "__main__":
     configs = BaseConfig()
     logger = get_logger(__name__)
     redis_client = redis.from_url(url=configs.redis_dsn.host, decode_responses=True)
+    publisher = ChangesPublisher(
+        redis=redis_client, stream=configs.redis_dsn.events_stream, maxlen=configs.redis_dsn.events_maxlen
+    )
 
     etl_pipline_names = ["movie", "genre", "person"]
 
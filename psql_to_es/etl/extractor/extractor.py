@@ -72,8 +72,10 @@ class GenreExtractor(Extractor):
 
 
 class PersonExtractor(Extractor):
+    """Персоны вместе с фильмографией: персона выгружается заново и при изменении любого ее фильма"""
+
     def query(self) -> str:
         return fwq.person_query
 
     def count_modified(self) -> int:
-        return 1
+        return 2
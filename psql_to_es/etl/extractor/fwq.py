@@ -50,11 +50,20 @@ person_query: str = """
 SELECT
     p.id,
     p.full_name,
-    p.modified
+    p.modified,
+    COALESCE (JSON_AGG(DISTINCT jsonb_build_object(
+        'id', fw.id, 'title', fw.title, 'imdb_rating', fw.rating, 'role', pfw.role
+    )) FILTER (WHERE fw.id IS NOT NULL), '[]') as films
 FROM
     content.person p
+    LEFT JOIN content.person_film_work pfw ON pfw.person_id = p.id
+    LEFT JOIN content.film_work fw ON fw.id = pfw.film_work_id
 WHERE
-    p.modified > %s
+    p.modified > %s OR p.id IN (
+        SELECT pfw.person_id
+        FROM content.person_film_work pfw JOIN content.film_work fw ON fw.id = pfw.film_work_id
+        WHERE fw.modified > %s
+    )
 GROUP BY p.id
 ORDER BY p.modified DESC
 """
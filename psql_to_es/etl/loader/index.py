@@ -13,7 +13,8 @@ class Index(abc.ABC):
 
 class MovieIndex(Index):
     name = "movies"
-    redis_key = "movies"
+    # Новый ключ состояния: после добавления полей *_ids фильмы выгружаются заново
+    redis_key = "movies_flat_ids"
     mappings = idx.mappings_fw
 
 
@@ -25,5 +26,6 @@ class GenreIndex(Index):
 
 class PersonIndex(Index):
     name = "persons"
-    redis_key = "persons"
+    # Новый ключ состояния: после добавления подполя name.suggest персоны выгружаются заново
+    redis_key = "persons_suggest"
     mappings = idx.mappings_pr
@@ -7,6 +7,9 @@ settings = {
             "english_possessive_stemmer": {"type": "stemmer", "language": "possessive_english"},
             "russian_stop": {"type": "stop", "stopwords": "_russian_"},
             "russian_stemmer": {"type": "stemmer", "language": "russian"},
+            "autocomplete_edge_ngram": {"type": "edge_ngram", "min_gram": 1, "max_gram": 20},
+            # Слово запроса длиннее max_gram иначе не совпадет ни с одной n-граммой
+            "autocomplete_truncate": {"type": "truncate", "length": 20},
         },
         "analyzer": {
             "ru_en": {
@@ -19,16 +22,24 @@ settings = {
                     "russian_stop",
                     "russian_stemmer",
                 ],
-            }
+            },
+            # Префиксы слов для подсказок при наборе: n-граммы строятся при индексации, а не при поиске
+            "autocomplete": {"tokenizer": "standard", "filter": ["lowercase", "autocomplete_edge_ngram"]},
+            "autocomplete_search": {"tokenizer": "standard", "filter": ["lowercase", "autocomplete_truncate"]},
         },
     },
 }
+suggest_field = {"type": "text", "analyzer": "autocomplete", "search_analyzer": "autocomplete_search"}
 mappings_fw = {
     "dynamic": "strict",
     "properties": {
         "id": {"type": "keyword"},
         "imdb_rating": {"type": "float"},
-        "title": {"type": "text", "analyzer": "ru_en", "fields": {"raw": {"type": "keyword"}}},
+        "title": {
+            "type": "text",
+            "analyzer": "ru_en",
+            "fields": {"raw": {"type": "keyword"}, "suggest": suggest_field},
+        },
         "description": {"type": "text", "analyzer": "ru_en"},
         "genres_name": {"type": "keyword"},
         "directors_name": {"type": "text", "analyzer": "ru_en"},
@@ -54,6 +65,11 @@ mappings_fw = {
             "dynamic": "strict",
             "properties": {"id": {"type": "keyword"}, "name": {"type": "text", "analyzer": "ru_en"}},
         },
+        # Плоские копии идентификаторов из genres, directors, actors и writers для фильтров
+        "genre_ids": {"type": "keyword"},
+        "director_ids": {"type": "keyword"},
+        "actor_ids": {"type": "keyword"},
+        "writer_ids": {"type": "keyword"},
     },
 }
 mappings_gn = {
@@ -68,6 +84,16 @@ mappings_pr = {
     "dynamic": "strict",
     "properties": {
         "id": {"type": "keyword"},
-        "name": {"type": "text", "analyzer": "ru_en", "fields": {"raw": {"type": "keyword"}}},
+        "name": {"type": "text", "analyzer": "ru_en", "fields": {"raw": {"type": "keyword"}, "suggest": suggest_field}},
+        "films": {
+            "type": "nested",
+            "dynamic": "strict",
+            "properties": {
+                "id": {"type": "keyword"},
+                "title": {"type": "keyword", "index": False},
+                "imdb_rating": {"type": "float"},
+                "roles": {"type": "keyword"},
+            },
+        },
     },
 }
@@ -20,6 +20,13 @@ def es_connection(dsn: str) -> Iterator:
         connection.close()
 
 
+def missing_analyzers(es: Elasticsearch, index: Index) -> set[str]:
+    """Анализаторы из настроек index, которых нет в индексе ES. Имя индекса может быть псевдонимом"""
+    (current,) = es.indices.get_settings(index=index.name).values()
+    analyzers = current["settings"]["index"].get("analysis", {}).get("analyzer", {})
+    return set(index.settings["analysis"]["analyzer"]) - set(analyzers)
+
+
 class EsLoader:
     def __init__(self, elastic_dsn, logger: logging.Logger, index: Index) -> None:
         self.dsn = elastic_dsn
@@ -41,6 +48,16 @@ class EsLoader:
                     json.dumps(self.index.settings, indent=2),
                     json.dumps(self.index.mappings, indent=2),
                 )
+            elif missing := missing_analyzers(es, self.index):
+                # Анализ открытого индекса ES не меняет, а закрывать индекс, из которого читает film_service, нельзя
+                self.logger.warning(
+                    "Index %s has no analyzers %s, mapping is not updated: run migrate_index.py",
+                    self.index.name,
+                    ", ".join(sorted(missing)),
+                )
+            else:
+                # Новые поля добавляются в существующий индекс, тип существующих полей ES изменить не даст
+                es.indices.put_mapping(index=self.index.name, **self.index.mappings)
 
     def load_data_to_index(self, data: list[dict]) -> None:
         actions = [{"_index": self.index.name, "_id": row["id"], "_source": row} for row in data]
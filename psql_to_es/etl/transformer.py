@@ -10,11 +10,19 @@ class Transformer(abc.ABC):
 
 
 class MovieTransformer(Transformer):
-    """Преобразуем данные Postgresql под формат ElasticSearch"""
+    """Преобразуем данные Postgresql под формат ElasticSearch.
+
+    Идентификаторы жанров и персон дублируются плоскими массивами *_ids: по ним film_service фильтрует фильмы
+    без nested-запросов, а вложенные genres, actors, writers и directors остаются для ответов.
+    """
 
     def transform(self, batch: list[dict]) -> list[dict]:
         transformed = []
         for row in batch:
+            genres = row["genres"] if row["genres"] is not None else []
+            directors = row["directors"] if row["directors"] is not None else []
+            actors = row["actors"] if row["actors"] is not None else []
+            writers = row["writers"] if row["writers"] is not None else []
             transformed_row = dict(
                 id=row["id"],
                 imdb_rating=row["imdb_rating"],
@@ -24,10 +32,14 @@ class MovieTransformer(Transformer):
                 directors_name=row["directors_names"] if row["directors_names"] is not None else [],
                 actors_names=row["actors_names"] if row["actors_names"] is not None else [],
                 writers_names=row["writers_names"] if row["writers_names"] is not None else [],
-                genres=row["genres"] if row["genres"] is not None else [],
-                directors=row["directors"] if row["directors"] is not None else [],
-                actors=row["actors"] if row["actors"] is not None else [],
-                writers=row["writers"] if row["writers"] is not None else [],
+                genres=genres,
+                directors=directors,
+                actors=actors,
+                writers=writers,
+                genre_ids=[genre["id"] for genre in genres],
+                director_ids=[director["id"] for director in directors],
+                actor_ids=[actor["id"] for actor in actors],
+                writer_ids=[writer["id"] for writer in writers],
             )
             transformed.append(transformed_row)
         return transformed
@@ -43,9 +55,21 @@ class GenreTransformer(Transformer):
 
 
 class PersonTransformer(Transformer):
+    """Фильмы персоны сворачиваются в один элемент с ролями и сортируются по убыванию рейтинга"""
+
     def transform(self, batch: list[dict]) -> list[dict]:
         transformed = []
         for row in batch:
-            transformed_row = dict(id=row["id"], name=row["full_name"])
+            films = {}
+            for film in row["films"] if row["films"] is not None else []:
+                films.setdefault(
+                    film["id"],
+                    dict(id=film["id"], title=film["title"], imdb_rating=film["imdb_rating"], roles=[]),
+                )["roles"].append(film["role"])
+            transformed_row = dict(
+                id=row["id"],
+                name=row["full_name"],
+                films=sorted(films.values(), key=lambda film: film["imdb_rating"] or 0, reverse=True),
+            )
             transformed.append(transformed_row)
         return transformed
@@ -0,0 +1,62 @@
+import argparse
+import logging
+from datetime import datetime
+
+from elasticsearch import Elasticsearch
+
+from etl.loader.index import GenreIndex, Index, MovieIndex, PersonIndex
+from etl.loader.loader import es_connection, missing_analyzers
+from utils.configs import EsSettings
+from utils.logger import get_logger
+
+INDEXES = {"movie": MovieIndex, "genre": GenreIndex, "person": PersonIndex}
+
+REINDEX_TIMEOUT = 3600
+
+
+def migrate(es: Elasticsearch, index: Index, logger: logging.Logger, force: bool = False) -> None:
+    """Перенести индекс на текущие настройки и маппинг без остановки чтения.
+
+    Анализ открытого индекса ES не меняет, поэтому записи копируются в новый индекс <name>_<время>,
+    после чего имя index.name одной атомарной операцией переключается на него как псевдоним.
+    Записи, загруженные ETL во время копирования, в новый индекс не попадут: на время миграции ETL останавливают.
+    """
+    if not force and not missing_analyzers(es, index):
+        logger.info("Index %s is up to date", index.name)
+        return
+
+    is_alias = es.indices.exists_alias(name=index.name)
+    (current,) = es.indices.get_alias(index=index.name).keys()
+    target = f"{index.name}_{datetime.now():%Y%m%d%H%M%S}"
+    es.indices.create(index=target, settings=index.settings, mappings=index.mappings)
+
+    result = es.options(request_timeout=REINDEX_TIMEOUT).reindex(
+        source={"index": current}, dest={"index": target}, wait_for_completion=True, refresh=True
+    )
+    if result["failures"]:
+        es.indices.delete(index=target)
+        raise RuntimeError(f"Reindex {current} -> {target} failed: {result['failures']}")
+
+    # Конкретный индекс с именем псевдонима удаляется в той же операции, что и создается псевдоним
+    remove = {"remove": {"index": current, "alias": index.name}} if is_alias else {"remove_index": {"index": current}}
+    es.indices.update_aliases(actions=[{"add": {"index": target, "alias": index.name}}, remove])
+    if is_alias:
+        es.indices.delete(index=current)
+    logger.info("Index %s migrated: %s -> %s, %s documents", index.name, current, target, result["total"])
+
+
+if __name__ == "__main__":
+    """Миграция индексов ES на новые анализаторы. Запускается вручную при остановленном ETL:
+
+    python migrate_index.py movie person
+    """
+
+    parser = argparse.ArgumentParser(description="Перенос индексов ES на текущие настройки и маппинг")
+    parser.add_argument("indexes", nargs="+", choices=sorted(INDEXES))
+    parser.add_argument("--force", action="store_true", help="переносить, даже если анализаторы не изменились")
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+    with es_connection(EsSettings().host) as es:
+        for name in args.indexes:
+            migrate(es, INDEXES[name](), logger, force=args.force)
@@ -16,6 +16,8 @@ class EsSettings(BaseSettings):
 
 class RedisSettings(BaseSettings):
     host: RedisDsn = Field(env="REDIS_URL")
+    events_stream: str = Field(env="ETL_EVENTS_STREAM", default="etl:changes")
+    events_maxlen: int = Field(env="ETL_EVENTS_MAXLEN", default=10000)
 
 
 class BaseConfig(BaseSettings):
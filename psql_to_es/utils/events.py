@@ -0,0 +1,25 @@
+from typing import Any
+
+from redis import Redis
+
+
+class ChangesPublisher:
+    """Публикация идентификаторов загруженных в ES записей в Redis stream.
+
+    film_service читает stream и удаляет из кэша ключи, в которых есть эти записи.
+    """
+
+    def __init__(self, redis: Redis, stream: str, maxlen: int) -> None:
+        self._redis = redis
+        self.stream = stream
+        self.maxlen = maxlen
+
+    def publish(self, index: str, ids: list[Any]) -> None:
+        if not ids:
+            return
+        self._redis.xadd(
+            self.stream,
+            {"index": index, "ids": ",".join(str(id_) for id_ in ids)},
+            maxlen=self.maxlen,
+            approximate=True,
+        )